@@ -0,0 +1,41 @@
+# Generadores aleatorios reproducibles para los experimentos de Merkle-Hellman
+
+# Juan Manuel Mateos Pérez
+
+## Explicación :
+# Las funciones del criptosistema y de los ataques que sortean algo (la sucesión supercreciente, m, w, el mensaje, el
+# valor N de Coster, las estrategias del planificador, ...) reciben un parámetro opcional rng con el generador
+# aleatorio que deben usar. Si no se indica se usa el módulo random, como hasta ahora; si se indica un random.Random,
+# todo lo que se sortea depende solo de él, por lo que se puede repetir exactamente.
+# Para repartir un experimento entre varios procesos sin que sus números aleatorios estén correlacionados, cada ensayo
+# necesita su propio generador, que no dependa del proceso que lo ejecute. crearGenerador lo obtiene de la semilla del
+# experimento y de una ruta que identifica el ensayo (por ejemplo, el número de ensayo), inicializando random.Random con
+# la cadena "semilla:ruta_1:ruta_2:...", que este convierte en su estado con SHA-512. Así los generadores de rutas
+# distintas son independientes, y para repetir un ensayo aislado basta con conocer la semilla y su ruta.
+# Las partes de la ruta se separan con ":", por lo que no pueden contenerlo; en ese caso se lanza ValueError, ya que
+# si no la semilla "1:2" daría el mismo generador que la semilla 1 con la ruta 2.
+# La semilla va siempre en primer lugar, y es el mismo formato que ya usaba MH_Campana.py, por lo que las tablas de
+# campañas guardadas antes siguen obteniendo los mismos resultados.
+
+## Ejecución :
+# Este programa no se ejecuta directamente. Para generar un criptosistema reproducible basta con escribir :
+#     from MH_Aleatorio import crearGenerador
+#     merkle_hellman = iterativo.Merkle_Hellman(tam, it, rng=crearGenerador(semilla, ensayo))
+
+import random
+
+#------------------------------------------------------------------------------
+# Funciones auxiliares
+#------------------------------------------------------------------------------
+
+# devuelve la cadena con la que se inicializa el generador de una semilla y una ruta
+def derivarSemilla(semilla, *ruta):
+    partes = [str(x) for x in (semilla,) + ruta]
+    if any(":" in parte for parte in partes):
+        raise ValueError("las partes de la semilla no pueden contener ':'")
+
+    return ":".join(partes)
+
+# crea el generador aleatorio de una semilla y una ruta
+def crearGenerador(semilla, *ruta):
+    return random.Random(derivarSemilla(semilla, *ruta))
@@ -0,0 +1,261 @@
+# Barrido de densidades del ataque de Coster al criptosistema de Merkle-Hellman
+
+# Juan Manuel Mateos Pérez
+
+## Explicación :
+# En este programa realizamos lo mismo que la función medirErrores del ataque de Coster, que genera criptosistemas con
+# distintas densidades variando el módulo m y comprueba si el ataque consigue descifrarlos, pero guardando los
+# resultados en una base de datos SQLite en lugar de en un archivo de texto.
+# Cada punto del barrido es un trío (tamaño, m, semilla del barrido) y cada intento sobre un punto se identifica con su
+# número, de forma que un intento ya guardado no se vuelve a ejecutar y los barridos con distintas semillas se pueden
+# guardar en la misma base de datos sin mezclarse. Al igual que en medirErrores, sobre cada punto se hacen como mucho
+# 10 intentos y se para en cuanto uno tiene éxito. Los intentos se reparten por rondas entre varios procesos: en cada
+# ronda se lanza el siguiente intento de todos los puntos que aún no se han conseguido. Cada intento usa su propio
+# generador aleatorio, obtenido de la semilla del barrido, el tamaño, m y el número de intento, por lo que se puede
+# repetir aislado.
+# Junto a cada intento se actualiza en la misma transacción el resumen del punto (intentos hechos y si se ha obtenido),
+# por lo que la tasa de éxito por densidad se puede consultar en cualquier momento, incluso desde otro programa mientras
+# el barrido sigue en marcha, para ir actualizando la gráfica. También se puede exportar al formato de texto que
+# generaba medirErrores (tamaño, densidad y 0 si se obtuvo o 1 si no).
+# Como en medirErrores, el número de bits de m crece linealmente con el número de punto, sin redondear a un entero, por
+# lo que las densidades quedan igual de espaciadas aunque haya más puntos que bits; los límites de m se calculan con
+# enteros para que no se pierda precisión ni se desborde con tamaños grandes.
+
+## Ejecución :
+# Para ejecutar el programa, solo debemos descomentar el código del main que queramos utilizar:
+# (1) Si descomentamos la primera parte, se realiza el barrido y se muestra la tasa de éxito por densidad. Podemos
+# modificar el tamaño del mensaje (variable tam), el número de puntos (variable it), la semilla del barrido (variable
+# semilla) y el archivo de la base de datos (variable bd). Si se interrumpe, basta con volver a ejecutarlo.
+# (2) Si descomentamos la segunda parte, se exportan los puntos terminados de un barrido (variables tam y semilla) al
+# formato de texto de medirErrores (variable archivo).
+
+import math
+import multiprocessing
+import sqlite3
+import time
+
+from MH_Aleatorio import crearGenerador
+from MH_Coster import ataqueCoster
+from MH_Lagarias import densidad
+from MH_Modulos import basico
+
+# número máximo de intentos sobre cada punto
+MAX_INTENTOS = 10
+
+# bits de la parte fraccionaria con que se calcula en coma fija 2 elevado a un exponente no entero
+BITS_FRACCION = 52
+
+# tablas de la base de datos; m se guarda como texto porque no cabe en un entero de SQLite, y la semilla también para
+# admitir cualquier semilla que acepte crearGenerador
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS intentos (
+    tam      INTEGER NOT NULL,
+    m        TEXT    NOT NULL,
+    semilla  TEXT    NOT NULL,
+    intento  INTEGER NOT NULL,
+    densidad REAL    NOT NULL,
+    obtenido INTEGER NOT NULL,
+    tiempo   REAL    NOT NULL,
+    PRIMARY KEY (tam, m, semilla, intento)
+);
+CREATE TABLE IF NOT EXISTS puntos (
+    tam      INTEGER NOT NULL,
+    m        TEXT    NOT NULL,
+    semilla  TEXT    NOT NULL,
+    densidad REAL    NOT NULL,
+    intentos INTEGER NOT NULL,
+    obtenido INTEGER NOT NULL,
+    PRIMARY KEY (tam, m, semilla)
+);
+"""
+
+#------------------------------------------------------------------------------
+# Base de datos
+#------------------------------------------------------------------------------
+
+# abre la base de datos y crea las tablas si no existen
+def abrirBD(bd):
+    conexion = sqlite3.connect(bd)
+    conexion.execute("PRAGMA journal_mode=WAL")
+    conexion.executescript(ESQUEMA)
+
+    # las bases de datos de versiones anteriores no tienen la columna de la semilla
+    for tabla in ("intentos", "puntos"):
+        if "semilla" not in [fila[1] for fila in conexion.execute("PRAGMA table_info(" + tabla + ")")]:
+            conexion.close()
+            raise ValueError("la base de datos " + str(bd) + " no tiene la columna semilla; es de una versión anterior")
+
+    return conexion
+
+# guarda un intento y actualiza el resumen de su punto en la misma transacción
+def guardarIntento(conexion, resultado):
+    tam, m, semilla, intento, dens, obtenido, tiempo = resultado
+
+    with conexion:
+        cursor = conexion.execute("INSERT OR IGNORE INTO intentos VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                  (tam, str(m), str(semilla), intento, dens, int(obtenido), tiempo))
+        # si otro programa ya había guardado el intento, el punto ya lo cuenta
+        if cursor.rowcount == 0:
+            return
+        conexion.execute("""INSERT INTO puntos VALUES (?, ?, ?, ?, 1, ?)
+                            ON CONFLICT (tam, m, semilla) DO UPDATE SET
+                                densidad = excluded.densidad,
+                                intentos = intentos + 1,
+                                obtenido = max(obtenido, excluded.obtenido)""",
+                         (tam, str(m), str(semilla), dens, int(obtenido)))
+
+# devuelve el estado de los puntos de un barrido como {m: (intentos, obtenido)}
+def leerPuntos(conexion, tam, semilla):
+    filas = conexion.execute("SELECT m, intentos, obtenido FROM puntos WHERE tam = ? AND semilla = ?",
+                             (tam, str(semilla)))
+
+    return {int(m): (intentos, obtenido == 1) for m, intentos, obtenido in filas}
+
+#------------------------------------------------------------------------------
+# Barrido
+#------------------------------------------------------------------------------
+
+# calcula floor(2^e) para un exponente e >= 0 no necesariamente entero, como 2^floor(e) por 2^frac(e) en coma fija
+def potenciaDos(e):
+    entera = math.floor(e)
+    mantisa = round(2 ** (e - entera) * (1 << BITS_FRACCION))
+
+    return (mantisa << entera) >> BITS_FRACCION
+
+# calcula el módulo m del punto i, que solo depende de la semilla del barrido
+def generarModulo(tam, num_it, i, semilla):
+    inicio = tam * 5
+    fin = tam // 2
+    paso = (inicio - fin) / (num_it-1)
+
+    n = fin + i*paso
+    lim_inf = potenciaDos(2*n + 1) + 1
+    lim_sup = potenciaDos(2*n + 2) - 1
+
+    return crearGenerador(semilla, tam, i).randint(lim_inf, lim_sup)
+
+# ejecuta el intento número intento del ataque de Coster sobre el punto (tam, m), con un generador aleatorio propio
+def ejecutarIntento(tarea):
+    tam, m, intento, semilla = tarea
+    rng = crearGenerador(semilla, tam, m, intento)
+
+    merkle_hellman = basico.Merkle_Hellman(tam, m=m, rng=rng)
+    merkle_hellman.do()
+
+    inicio = time.perf_counter()
+    coster = ataqueCoster(merkle_hellman.pk, merkle_hellman.s, rng=rng)
+    tiempo = time.perf_counter() - inicio
+
+    return tam, m, semilla, intento, densidad(merkle_hellman.pk), coster == merkle_hellman.mensaje, tiempo
+
+# realiza el barrido de num_it densidades para un tamaño, saltando los intentos ya guardados
+def barrerDensidades(tam, num_it, semilla, bd, procesos=None, mostrar=True):
+    modulos  = [generarModulo(tam, num_it, i, semilla) for i in range(num_it)]
+    conexion = abrirBD(bd)
+
+    with multiprocessing.Pool(procesos) as pool:
+        while True:
+            # siguiente intento de cada punto que ni se ha obtenido ni ha agotado sus intentos
+            puntos = leerPuntos(conexion, tam, semilla)
+            tareas = []
+            for m in modulos:
+                intentos, obtenido = puntos.get(m, (0, False))
+                if not obtenido and intentos < MAX_INTENTOS:
+                    tareas.append((tam, m, intentos, semilla))
+
+            if len(tareas) == 0:
+                break
+
+            for resultado in pool.imap_unordered(ejecutarIntento, tareas):
+                guardarIntento(conexion, resultado)
+
+            if mostrar:
+                print("Ronda terminada con", len(tareas), "intentos; tasa de éxito :",
+                      tasaExito(conexion, tam, semilla))
+
+    conexion.close()
+
+#------------------------------------------------------------------------------
+# Resultados
+#------------------------------------------------------------------------------
+
+# devuelve los puntos terminados de un barrido como [(densidad, obtenido), ...] ordenados por densidad
+def puntosTerminados(conexion, tam, semilla):
+    filas = conexion.execute("""SELECT densidad, obtenido FROM puntos
+                                WHERE tam = ? AND semilla = ? AND (obtenido = 1 OR intentos >= ?)
+                                ORDER BY densidad""", (tam, str(semilla), MAX_INTENTOS))
+
+    return [(dens, obtenido == 1) for dens, obtenido in filas]
+
+# calcula la proporción de puntos terminados que se han obtenido
+def tasaExito(conexion, tam, semilla):
+    puntos = puntosTerminados(conexion, tam, semilla)
+    if len(puntos) == 0:
+        return 0
+
+    return sum(obtenido for _, obtenido in puntos) / len(puntos)
+
+# agrupa los puntos terminados por intervalos de densidad, devolviendo [(densidad, puntos, obtenidos), ...]
+def tasaPorDensidad(conexion, tam, semilla, ancho=0.1):
+    grupos = {}
+    for dens, obtenido in puntosTerminados(conexion, tam, semilla):
+        inicio = int(dens / ancho) * ancho
+        total, obtenidos = grupos.get(inicio, (0, 0))
+        grupos[inicio] = (total + 1, obtenidos + obtenido)
+
+    return [(inicio, total, obtenidos) for inicio, (total, obtenidos) in sorted(grupos.items())]
+
+# exporta los puntos terminados de un barrido al formato de texto de medirErrores
+def exportarResultados(bd, tam, semilla, archivo):
+    conexion = abrirBD(bd)
+
+    with open(archivo, 'w') as f:
+        for dens, obtenido in puntosTerminados(conexion, tam, semilla):
+            resultado = str(tam)
+            resultado += "\t" + str(dens)
+            if obtenido == True:
+                resultado += "\t 0"
+            else:
+                resultado += "\t 1"
+            f.write(resultado + "\n")
+
+    conexion.close()
+
+#------------------------------------------------------------------------------
+# Datos de salida
+#------------------------------------------------------------------------------
+
+# realiza el barrido y muestra la tasa de éxito por densidad
+def medirErrores(tam, num_it, semilla, bd):
+    barrerDensidades(tam, num_it, semilla, bd)
+
+    conexion = abrirBD(bd)
+    print()
+    print("Densidad \t Puntos \t Obtenidos")
+    for inicio, total, obtenidos in tasaPorDensidad(conexion, tam, semilla):
+        print(round(inicio, 2), "\t\t", total, "\t\t", obtenidos)
+    conexion.close()
+
+#------------------------------------------------------------------------------
+# Main
+#------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+
+    print("\nBarrido de densidades del ataque de Coster")
+    print()
+
+    # ---------- descomentar para realizar el barrido de densidades ----------
+    # tam     = 10
+    # it      = 50
+    # semilla = 1
+    # bd      = "barrido.db"
+    # medirErrores(tam, it, semilla, bd)
+
+    # ---------- descomentar para exportar los resultados al formato de medirErrores ----------
+    # tam     = 10
+    # semilla = 1
+    # bd      = "barrido.db"
+    # archivo = "resultados.txt"
+    # exportarResultados(bd, tam, semilla, archivo)
+    # print("Finalizado")
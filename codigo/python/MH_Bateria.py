@@ -0,0 +1,202 @@
+# Batería de mediciones del criptosistema de Merkle-Hellman
+
+# Juan Manuel Mateos Pérez
+
+## Explicación :
+# En este programa medimos de forma reproducible las distintas etapas del criptosistema de Merkle-Hellman iterativo
+# y de los ataques, para una rejilla de tamaños del mensaje y de números de iteraciones de la clave privada :
+#   - clave     : creación del criptosistema, es decir, generación de la clave privada, sus iteraciones y la pública.
+#   - cifrar    : cifrado de un mensaje.
+#   - descifrar : descifrado de un mensaje con la clave privada.
+#   - lagarias  : ataque de Lagarias (solo hasta el tamaño máximo indicado, ya que es mucho más lento).
+#   - coster    : ataque de Coster (igual que el anterior).
+# Cada combinación (etapa, tamaño, iteraciones) se ejecuta con una semilla fija calculada a partir de ella, de forma
+# que dos ejecuciones de la batería miden exactamente el mismo trabajo. Para cada una se obtienen las operaciones por
+# segundo, la mediana (p50) y el percentil 99 (p99) del tiempo de una operación y el pico de memoria, que se mide en
+# una ejecución aparte con tracemalloc para que no afecte a los tiempos.
+# Los resultados se guardan en JSON y se pueden comparar con los de una ejecución anterior (la referencia), marcando
+# como regresión las combinaciones cuya mediana haya empeorado más que la tolerancia indicada.
+
+## Ejecución :
+# Para ejecutar el programa, solo debemos descomentar el código del main que queramos utilizar:
+# (1) Si descomentamos la primera parte, se ejecuta la batería y se guardan los resultados en JSON. Podemos modificar
+# la lista de tamaños (variable tamanos), la lista de iteraciones (variable iteraciones), el tamaño máximo para los
+# ataques (variable max_ataque) y el archivo de resultados (variable archivo).
+# (2) Si descomentamos la segunda parte, se ejecuta la batería y se compara con una referencia guardada antes (variable
+# referencia), mostrando las regresiones con la tolerancia indicada (variable tolerancia, 0.1 es un 10 % más lenta).
+
+import json
+import math
+import platform
+import random
+import time
+import tracemalloc
+
+from MH_Coster import ataqueCoster
+from MH_Lagarias import ataqueLagarias
+from MH_Modulos import iterativo
+
+# versión del formato de los resultados
+VERSION = 1
+
+# número de repeticiones de cada etapa
+REPETICIONES = {"clave": 30, "cifrar": 200, "descifrar": 200, "lagarias": 3, "coster": 3}
+
+#------------------------------------------------------------------------------
+# Etapas
+#------------------------------------------------------------------------------
+
+# prepara la operación de una etapa, devolviendo una función sin argumentos que la ejecuta una vez; todo lo que se
+# sortea sale del generador rng
+def prepararEtapa(etapa, tamano, num_it, rng=None):
+    if etapa == "clave":
+        return lambda: iterativo.Merkle_Hellman(tamano, num_it, rng=rng)
+
+    merkle_hellman = iterativo.Merkle_Hellman(tamano, num_it, rng=rng)
+    merkle_hellman.cifrar()
+    pk, s = merkle_hellman.pk, merkle_hellman.s
+
+    if etapa == "cifrar":
+        return merkle_hellman.cifrar
+    if etapa == "descifrar":
+        return merkle_hellman.descifrar
+    if etapa == "lagarias":
+        return lambda: ataqueLagarias(pk, s)
+    if etapa == "coster":
+        return lambda: ataqueCoster(pk, s, rng=rng)
+
+    raise ValueError("etapa desconocida : " + str(etapa))
+
+# semilla fija de una combinación (etapa, tamaño, iteraciones)
+def semillaMedicion(etapa, tamano, num_it):
+    return etapa + ":" + str(tamano) + ":" + str(num_it)
+
+# devuelve el percentil p (entre 0 y 1) de una lista ordenada
+def percentil(ordenados, p):
+    return ordenados[max(0, math.ceil(p * len(ordenados)) - 1)]
+
+# mide una etapa y devuelve su resultado
+def medirEtapa(etapa, tamano, num_it, repeticiones):
+    # tiempos de cada operación, en microsegundos, tras una primera ejecución de calentamiento
+    operacion = prepararEtapa(etapa, tamano, num_it, random.Random(semillaMedicion(etapa, tamano, num_it)))
+    operacion()
+    tiempos = []
+    for i in range(repeticiones):
+        inicio = time.perf_counter()
+        operacion()
+        tiempos.append((time.perf_counter() - inicio) * 10**6)
+    tiempos.sort()
+
+    # pico de memoria de una operación, repitiendo la misma preparación
+    operacion = prepararEtapa(etapa, tamano, num_it, random.Random(semillaMedicion(etapa, tamano, num_it)))
+    tracemalloc.start()
+    operacion()
+    memoria = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {"etapa": etapa, "tamano": tamano, "num_it": num_it, "repeticiones": repeticiones,
+            "ops_s": repeticiones / (sum(tiempos) / 10**6), "p50_us": percentil(tiempos, 0.5),
+            "p99_us": percentil(tiempos, 0.99), "memoria_pico": memoria}
+
+#------------------------------------------------------------------------------
+# Batería
+#------------------------------------------------------------------------------
+
+# ejecuta la batería para la rejilla de tamaños e iteraciones
+def ejecutarBateria(tamanos, iteraciones, max_ataque, repeticiones=REPETICIONES, mostrar=True):
+    resultados = []
+
+    if mostrar:
+        print("Etapa \t\t Tamaño \t Iteraciones \t Ops/s \t\t p50 (µs) \t p99 (µs) \t Memoria (KiB)")
+
+    for tamano in tamanos:
+        for num_it in iteraciones:
+            for etapa in repeticiones:
+                if etapa in ("lagarias", "coster") and tamano > max_ataque:
+                    continue
+
+                resultado = medirEtapa(etapa, tamano, num_it, repeticiones[etapa])
+                resultados.append(resultado)
+
+                if mostrar:
+                    print(etapa, "\t", tamano, "\t\t", num_it, "\t\t", round(resultado["ops_s"], 1), "\t\t",
+                          round(resultado["p50_us"], 1), "\t\t", round(resultado["p99_us"], 1), "\t\t",
+                          round(resultado["memoria_pico"] / 1024, 1))
+
+    return {"version": VERSION, "python": platform.python_version(), "fecha": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "resultados": resultados}
+
+# guarda los resultados de la batería en JSON
+def guardarResultados(archivo, datos):
+    with open(archivo, "w") as f:
+        json.dump(datos, f, indent=1)
+
+# carga los resultados de una batería guardada
+def cargarResultados(archivo):
+    with open(archivo) as f:
+        datos = json.load(f)
+
+    if datos.get("version") != VERSION:
+        raise ValueError("versión de los resultados no soportada : " + str(datos.get("version")))
+
+    return datos
+
+# compara unos resultados con la referencia, devolviendo las regresiones como [(resultado, cociente), ...]
+def compararResultados(datos, referencia, tolerancia=0.1):
+    anteriores = {(r["etapa"], r["tamano"], r["num_it"]): r for r in referencia["resultados"]}
+    regresiones = []
+
+    for resultado in datos["resultados"]:
+        anterior = anteriores.get((resultado["etapa"], resultado["tamano"], resultado["num_it"]))
+        if anterior is None or anterior["p50_us"] == 0:
+            continue
+
+        cociente = resultado["p50_us"] / anterior["p50_us"]
+        if cociente > 1 + tolerancia:
+            regresiones.append((resultado, cociente))
+
+    return regresiones
+
+#------------------------------------------------------------------------------
+# Datos de salida
+#------------------------------------------------------------------------------
+
+# ejecuta la batería, la guarda y muestra las regresiones frente a la referencia si se indica
+def medirBateria(tamanos, iteraciones, max_ataque, archivo, referencia=None, tolerancia=0.1):
+    datos = ejecutarBateria(tamanos, iteraciones, max_ataque)
+    guardarResultados(archivo, datos)
+    print()
+
+    if referencia is not None:
+        regresiones = compararResultados(datos, cargarResultados(referencia), tolerancia)
+
+        print("Regresiones frente a", referencia, ":", len(regresiones))
+        for resultado, cociente in regresiones:
+            print("   ", resultado["etapa"], "\t tamaño", resultado["tamano"], "\t iteraciones", resultado["num_it"],
+                  "\t", round(cociente, 2), "veces más lenta")
+        print()
+
+#------------------------------------------------------------------------------
+# Main
+#------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+
+    print("\nBatería de mediciones de Merkle-Hellman")
+    print()
+
+    # ---------- descomentar para ejecutar la batería y guardar los resultados ----------
+    # tamanos     = [8, 16, 32, 64, 128, 256, 512]
+    # iteraciones = [0, 1, 2, 3, 4, 5]
+    # max_ataque  = 64
+    # archivo     = "bateria.json"
+    # medirBateria(tamanos, iteraciones, max_ataque, archivo)
+
+    # ---------- descomentar para comparar la batería con una referencia ----------
+    # tamanos     = [8, 16, 32, 64, 128, 256, 512]
+    # iteraciones = [0, 1, 2, 3, 4, 5]
+    # max_ataque  = 64
+    # archivo     = "bateria_nueva.json"
+    # referencia  = "bateria.json"
+    # tolerancia  = 0.1
+    # medirBateria(tamanos, iteraciones, max_ataque, archivo, referencia, tolerancia)
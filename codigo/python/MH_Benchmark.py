@@ -0,0 +1,332 @@
+# Medición de tiempos del criptosistema de Merkle-Hellman
+
+# Juan Manuel Mateos Pérez
+
+## Explicación :
+# En este programa medimos el tiempo que tardan las distintas partes del criptosistema de Merkle-Hellman iterativo.
+# Para la generación de claves comparamos el método original, que sortea cada elemento de la sucesión por separado y
+# repite los sorteos de m y w, con el actual, que saca de una vez los bytes aleatorios de la sucesión.
+# Para los ataques medimos la reducción LLL exacta y la de coma flotante de MH_LLL.py sobre la matriz de Lagarias, los
+# niveles de precisión de la reducción adaptativa y los ataques completos de MH_Lagarias.py y MH_Coster.py junto con el número de mensajes que consiguen descifrar.
+# Para el descifrado comparamos tres caminos que deben dar exactamente el mismo resultado :
+#   - capas    : deshace las iteraciones de la clave privada una a una, calculando el inverso en cada descifrado.
+#   - contexto : reutiliza la cadena de iteraciones precalculada y aplica la pasada voraz elemento a elemento.
+#   - rápido   : reutiliza la cadena y resuelve la pasada voraz por bloques de 8 elementos con búsqueda binaria.
+
+## Ejecución :
+# Para ejecutar el programa, solo debemos descomentar el código del main que queramos utilizar:
+# (1) Si descomentamos la primera parte, se mide el tiempo de descifrado según el número de iteraciones de la clave
+# privada. Podemos modificar el tamaño del mensaje (variable tam), el número máximo de iteraciones (variable max_it)
+# y la cantidad de mensajes cifrados sobre la que se promedia (variable num_men).
+# (2) Si descomentamos la segunda parte, se mide cuántas claves privadas por segundo se generan con el método original
+# y con el actual para distintos tamaños. Podemos modificar la lista de tamaños (variable tamanos) y la cantidad de
+# claves generadas para cada tamaño (variable num_claves).
+# (3) Si descomentamos la tercera parte, se mide el tiempo de la reducción LLL y de los ataques de Lagarias y Coster
+# para las dimensiones de los notebooks. Podemos modificar la lista de tamaños (variable tamanos), el número de
+# iteraciones de la clave privada (variable it), la cantidad de claves atacadas por tamaño (variable num_claves) y el
+# tamaño máximo para el que se ejecuta también el LLL en coma flotante, más lento (variable max_flotante).
+# (4) Si descomentamos la cuarta parte, se compara la búsqueda de la solución en la base reducida de Lagarias y Coster
+# recorriendo cada fila elemento a elemento sobre una copia de la matriz, como en los notebooks, con la actual.
+# Podemos modificar la lista de tamaños (variable tamanos) y la cantidad de claves por tamaño (variable num_claves).
+# (5) Si descomentamos la quinta parte, se compara el ataque de Coster con la matriz racional del notebook y con la
+# entera, comprobando que se obtienen la misma base reducida y la misma solución. Podemos modificar las mismas
+# variables que en la parte anterior.
+# (6) Si descomentamos la sexta parte, se mide el tiempo de lllAdaptativo de MH_LLL.py forzando cada nivel de precisión
+# (doble y exacta) sobre la matriz de Lagarias, con entradas enormes, y sobre la base ya reducida de la clave
+# con la fila del mensaje añadida, con entradas pequeñas, junto con el nivel que elige lll. Podemos modificar la lista
+# de tamaños (variable tamanos), el número de iteraciones (variable it) y la cantidad de claves (variable num_claves).
+
+import math
+import random
+import time
+
+import MH_Coster
+import MH_Lagarias
+from MH_LLL import NIVELES, PrecisionInsuficiente, bitsMatriz, lll, lllAdaptativo, lllExacto, lllFlotante
+from MH_Modulos import iterativo
+from MH_Reticulo_Clave import Reticulo_Clave
+
+#------------------------------------------------------------------------------
+# Funciones auxiliares
+#------------------------------------------------------------------------------
+
+# genera una lista de mensajes aleatorios del tamaño indicado
+def generarMensajes(tam, num_men):
+    return [[random.randint(0, 1) for i in range(tam)] for j in range(num_men)]
+
+# mide el tiempo medio, en microsegundos, de aplicar una función a cada argumento
+def medirTiempo(funcion, argumentos):
+    inicio = time.perf_counter()
+    for a in argumentos:
+        funcion(a)
+    fin = time.perf_counter()
+
+    return (fin - inicio) / len(argumentos) * 10**6
+
+#------------------------------------------------------------------------------
+# Descifrado
+#------------------------------------------------------------------------------
+
+# compara el tiempo de descifrado de cada camino según el número de iteraciones
+def benchmarkDescifrado(tam, max_it, num_men):
+    print("Iteraciones \t Capas (us) \t Contexto (us) \t Rápido (us) \t Aceleración")
+
+    for it in range(max_it + 1):
+        merkle_hellman = iterativo.Merkle_Hellman(tam, it)
+        cifrados = merkle_hellman.cifrar_lote(generarMensajes(tam, num_men))
+
+        contexto = iterativo.Contexto_Descifrado(merkle_hellman.sk)
+        rapido   = iterativo.Contexto_Descifrado(merkle_hellman.sk, True)
+
+        # los tres caminos deben coincidir bit a bit
+        for s in cifrados:
+            if not contexto.descifrarCapas(s) == contexto.descifrar(s) == rapido.descifrar(s):
+                raise ValueError("los descifrados no coinciden para s = " + str(s))
+
+        t_capas    = medirTiempo(contexto.descifrarCapas, cifrados)
+        t_contexto = medirTiempo(contexto.descifrar, cifrados)
+        t_rapido   = medirTiempo(rapido.descifrar, cifrados)
+
+        print(it, "\t\t", round(t_capas, 2), "\t\t", round(t_contexto, 2), "\t\t", round(t_rapido, 2), 
+              "\t\t", round(t_capas / t_rapido, 2))
+
+    print()
+
+#------------------------------------------------------------------------------
+# Generación de claves
+#------------------------------------------------------------------------------
+
+# genera una clave privada con el método original, como referencia
+def generarClaveOriginal(n):
+    ap = []
+    for i in range(1, n+1):
+        ap.append(random.randint(((2**(i-1))-1) * (2**n) + 1, (2**(i-1)) * (2**n)))
+    sum_ap = sum(ap)
+
+    lim_inf = 2 ** (2*n + 1) + 1
+    lim_sup = 2 ** (2*n + 2) - 1
+    while True:
+        m = random.randint(lim_inf, lim_sup)
+        if m > sum_ap:
+            break
+
+    while True:
+        wp  = random.randint(2, m-2)
+        gcd = math.gcd(m, wp)
+        w   = wp // gcd
+        if math.gcd(m, w) == 1:
+            break
+
+    return [m, w, ap]
+
+# compara las claves por segundo del método original y del actual según el tamaño
+def benchmarkClaves(tamanos, num_claves):
+    print("Tamaño 		 Original (claves/s) 	 Actual (claves/s) 	 Aceleración")
+
+    for tam in tamanos:
+        t_original = medirTiempo(generarClaveOriginal, [tam] * num_claves)
+        t_actual   = medirTiempo(iterativo.generarClavePrivada, [tam] * num_claves)
+
+        print(tam, "\t\t", round(10**6 / t_original, 1), "\t\t\t", round(10**6 / t_actual, 1), 
+              "\t\t\t", round(t_original / t_actual, 2))
+
+    print()
+
+#------------------------------------------------------------------------------
+# Reducción LLL y ataques
+#------------------------------------------------------------------------------
+
+# mide el tiempo medio, en segundos, de la reducción y de los ataques según el tamaño
+def benchmarkLLL(tamanos, it, num_claves, max_flotante):
+    print("Tamaño \t LLL exacto (s) \t LLL flotante (s) \t Lagarias (s) \t Coster (s) \t Éxitos Lagarias \t Éxitos Coster")
+
+    for tam in tamanos:
+        t_exacto, t_flotante, t_lagarias, t_coster = 0, 0, 0, 0
+        exitos_lagarias, exitos_coster = 0, 0
+
+        for i in range(num_claves):
+            merkle_hellman = iterativo.Merkle_Hellman(tam, it)
+            merkle_hellman.do()
+            pk, s = merkle_hellman.pk, merkle_hellman.s
+            matriz = MH_Lagarias.generarMatriz(pk, s, 0)
+
+            t_exacto += medirTiempo(lllExacto, [matriz]) / 10**6
+            if tam <= max_flotante:
+                t_flotante += medirTiempo(lllFlotante, [matriz]) / 10**6
+
+            inicio = time.perf_counter()
+            exitos_lagarias += MH_Lagarias.ataqueLagarias(pk, s) == merkle_hellman.mensaje
+            t_lagarias += time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            exitos_coster += MH_Coster.ataqueCoster(pk, s) == merkle_hellman.mensaje
+            t_coster += time.perf_counter() - inicio
+
+        flotante = round(t_flotante / num_claves, 3) if tam <= max_flotante else "-"
+        print(tam, "\t\t", round(t_exacto / num_claves, 3), "\t\t", flotante, "\t\t\t", round(t_lagarias / num_claves, 3),
+              "\t\t", round(t_coster / num_claves, 3), "\t\t", exitos_lagarias, "/", num_claves, 
+              "\t\t\t", exitos_coster, "/", num_claves)
+
+    print()
+
+#------------------------------------------------------------------------------
+# Niveles de precisión del LLL
+#------------------------------------------------------------------------------
+
+# mide el tiempo medio, en segundos, de cada nivel de precisión de lllAdaptativo sobre matrices con entradas grandes y
+# pequeñas; si un nivel no consigue reducir alguna matriz se indica con "fallo"
+def benchmarkNiveles(tamanos, it, num_claves):
+    print("Tamaño \t Matriz \t Bits \t Doble (s) \t Exacta (s) \t Nivel de lll")
+
+    for tam in tamanos:
+        matrices = {"Lagarias": [], "reducida": []}
+
+        for i in range(num_claves):
+            merkle_hellman = iterativo.Merkle_Hellman(tam, it)
+            merkle_hellman.do()
+            pk, s = merkle_hellman.pk, merkle_hellman.s
+
+            matriz = MH_Lagarias.generarMatriz(pk, s, 0)
+            reticulo = Reticulo_Clave(matriz[:-1])
+            matrices["Lagarias"].append(matriz)
+            matrices["reducida"].append(reticulo.base + [reticulo.reducirFila(matriz[-1])])
+
+        for nombre, lista in matrices.items():
+            tiempos = []
+            for nivel in NIVELES:
+                try:
+                    tiempos.append(round(medirTiempo(lambda m: lllAdaptativo(m, niveles=(nivel,)), lista) / 10**6, 3))
+                except PrecisionInsuficiente:
+                    tiempos.append("fallo")
+
+            elegidos = sorted(set(lllAdaptativo(m)[1] for m in lista))
+            print(tam, "\t\t", nombre, "\t", max(bitsMatriz(m) for m in lista), "\t", tiempos[0], "\t\t",
+                  tiempos[1], "\t\t", ", ".join(elegidos))
+
+    print()
+
+#------------------------------------------------------------------------------
+# Búsqueda de la solución en la base reducida
+#------------------------------------------------------------------------------
+
+# busca la solución fila a fila y, si no la hay, en una copia de la matriz con los valores intercambiados
+def extraerSolucionFilas(modulo, matriz, pk, s):
+    solucion = modulo.buscarSolucionFilas(matriz, pk, s)
+    if len(solucion) == 0:
+        solucion = modulo.buscarSolucionFilas(modulo.cambiarMatriz(matriz), pk, s)
+
+    return solucion
+
+# compara el tiempo medio, en milisegundos, de la búsqueda fila a fila y de la actual sobre las bases ya reducidas
+def benchmarkExtraccion(tamanos, num_claves):
+    print("Tamaño \t Lagarias filas (ms) \t Lagarias actual (ms) \t Coster filas (ms) \t Coster actual (ms)")
+
+    for tam in tamanos:
+        tiempos = {}
+
+        # la búsqueda fila a fila de Coster trabaja sobre la matriz racional del notebook y la actual sobre la entera
+        for modulo, matriz_filas, matriz_actual in ((MH_Lagarias, lambda pk, s, N: MH_Lagarias.generarMatriz(pk, s, 0),
+                                                     lambda pk, s, N: MH_Lagarias.generarMatriz(pk, s, 0)),
+                                                    (MH_Coster, MH_Coster.generarMatrizRacional,
+                                                     MH_Coster.generarMatriz)):
+            t_filas, t_actual = 0, 0
+
+            for i in range(num_claves):
+                merkle_hellman = iterativo.Merkle_Hellman(tam, 0)
+                merkle_hellman.do()
+                pk, s = merkle_hellman.pk, merkle_hellman.s
+                N = random.choice(MH_Coster.valoresN(tam))
+                reducida_filas  = lll(matriz_filas(pk, s, N))
+                reducida_actual = lll(matriz_actual(pk, s, N))
+
+                # s + 1 no tiene solución, por lo que se recorren todas las filas
+                for objetivo in (s, s + 1):
+                    t_filas  += medirTiempo(lambda o: extraerSolucionFilas(modulo, reducida_filas, pk, o), [objetivo])
+                    t_actual += medirTiempo(lambda o: modulo.extraerSolucion(reducida_actual, pk, o), [objetivo])
+
+            tiempos[modulo] = (t_filas / (2*num_claves) / 1000, t_actual / (2*num_claves) / 1000)
+
+        print(tam, "\t\t", round(tiempos[MH_Lagarias][0], 3), "\t\t\t", round(tiempos[MH_Lagarias][1], 3), "\t\t\t",
+              round(tiempos[MH_Coster][0], 3), "\t\t\t", round(tiempos[MH_Coster][1], 3))
+
+    print()
+
+#------------------------------------------------------------------------------
+# Matriz entera de Coster
+#------------------------------------------------------------------------------
+
+# compara el tiempo medio, en segundos, del ataque de Coster con la matriz racional del notebook y con la entera
+def benchmarkCoster(tamanos, num_claves):
+    print("Tamaño \t Racional (s) \t Entera (s) \t Aceleración \t Mismos resultados")
+
+    for tam in tamanos:
+        t_racional, t_entera = 0, 0
+        iguales = 0
+
+        for i in range(num_claves):
+            merkle_hellman = iterativo.Merkle_Hellman(tam, 0)
+            merkle_hellman.do()
+            pk, s = merkle_hellman.pk, merkle_hellman.s
+            N = random.choice(MH_Coster.valoresN(tam))
+
+            inicio = time.perf_counter()
+            reducida_racional = lll(MH_Coster.generarMatrizRacional(pk, s, N))
+            solucion_racional = extraerSolucionFilas(MH_Coster, reducida_racional, pk, s)
+            t_racional += time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            reducida_entera = lll(MH_Coster.generarMatriz(pk, s, N))
+            solucion_entera = MH_Coster.extraerSolucion(reducida_entera, pk, s)
+            t_entera += time.perf_counter() - inicio
+
+            # la base entera debe ser exactamente el doble de la racional
+            doble = [[2*x for x in fila] for fila in reducida_racional]
+            iguales += doble == reducida_entera and solucion_racional == solucion_entera
+
+        print(tam, "\t\t", round(t_racional / num_claves, 3), "\t\t", round(t_entera / num_claves, 3), "\t\t",
+              round(t_racional / t_entera, 2), "\t\t", iguales, "/", num_claves)
+
+    print()
+
+#------------------------------------------------------------------------------
+# Main
+#------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+
+    print("\nMedición de tiempos de Merkle-Hellman")
+    print()
+
+    # ---------- descomentar para medir el descifrado según el número de iteraciones ----------
+    # tam     = 100
+    # max_it  = 12
+    # num_men = 1000
+    # benchmarkDescifrado(tam, max_it, num_men)
+
+    # ---------- descomentar para medir la generación de claves según el tamaño ----------
+    # tamanos    = [8, 16, 32, 64, 100, 128, 256, 512]
+    # num_claves = 200
+    # benchmarkClaves(tamanos, num_claves)
+
+    # ---------- descomentar para medir la reducción LLL y los ataques según el tamaño ----------
+    # tamanos    = [10, 20, 30, 40, 50, 60, 70, 80, 90, 100]
+    # it         = 0
+    # num_claves = 3
+    # max_flotante = 50
+    # benchmarkLLL(tamanos, it, num_claves, max_flotante)
+
+    # ---------- descomentar para medir los niveles de precisión del LLL ----------
+    # tamanos    = [20, 40, 60, 80, 100]
+    # it         = 1
+    # num_claves = 3
+    # benchmarkNiveles(tamanos, it, num_claves)
+
+    # ---------- descomentar para medir la búsqueda de la solución en la base reducida ----------
+    # tamanos    = [20, 40, 60, 80, 100]
+    # num_claves = 3
+    # benchmarkExtraccion(tamanos, num_claves)
+
+    # ---------- descomentar para comparar la matriz racional y la entera de Coster ----------
+    # tamanos    = [10, 20, 30, 40, 50, 60, 70, 80, 90, 100]
+    # num_claves = 3
+    # benchmarkCoster(tamanos, num_claves)
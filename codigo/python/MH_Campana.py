@@ -0,0 +1,233 @@
+# Campañas de ataques al criptosistema de Merkle-Hellman
+
+# Juan Manuel Mateos Pérez
+
+## Explicación :
+# En este programa realizamos lo mismo que la función variasIteraciones de los ataques de Lagarias y Coster, pero
+# repartiendo los ensayos entre varios procesos. Cada ensayo genera un criptosistema iterativo con un tamaño y un número
+# de iteraciones aleatorios, cifra un mensaje y aplica el ataque elegido. Para que los resultados sean reproducibles,
+# cada ensayo crea su propio generador aleatorio (crearGenerador de MH_Aleatorio.py) con una semilla calculada a partir
+# de la semilla de la campaña y del número de ensayo, y lo pasa a la generación de la clave, del mensaje y al ataque, de
+# forma que el resultado no depende del proceso que lo ejecute ni del orden en que terminen, y los generadores de los
+# distintos ensayos son independientes.
+# Los resultados se guardan en una tabla separada por tabuladores, con una fila por ensayo, que se escribe a medida que
+# terminan los ensayos. Si la campaña se interrumpe, al volver a ejecutarla con el mismo archivo solo se realizan los
+# ensayos que faltan.
+
+## Ejecución :
+# Para ejecutar el programa, solo debemos descomentar el código del main que queramos utilizar:
+# (1) Si descomentamos la primera parte, se ejecuta una campaña de p ensayos con el ataque indicado (variable ataque,
+# que puede ser "lagarias" o "coster") y se muestra el desglose de resultados. Podemos modificar también la semilla de
+# la campaña (variable semilla, que debe ser un entero), el archivo donde se guarda la tabla (variable archivo) y el
+# número de procesos (variable procesos, None para usar todos los núcleos).
+# (2) Si descomentamos la segunda parte, se repite aislado el ensayo indicado (variable ensayo) de una campaña, por
+# ejemplo uno que haya sido especialmente lento, obteniendo exactamente el mismo criptosistema, mensaje y resultado.
+
+import multiprocessing
+import os
+import time
+
+from MH_Aleatorio import crearGenerador
+from MH_Coster import ataqueCoster
+from MH_Lagarias import ataqueLagarias, clasificarResultado, densidad
+from MH_Modulos import iterativo
+
+# ataques disponibles; todos reciben el generador aleatorio, aunque el de Lagarias no lo usa
+ATAQUES = {"lagarias": lambda pk, s, rng=None: ataqueLagarias(pk, s), "coster": ataqueCoster}
+
+# columnas de la tabla de resultados
+COLUMNAS = ["ataque", "semilla", "ensayo", "tamano", "iteraciones", "densidad", "resultado", "errores", "tiempo"]
+
+# resultados posibles de un ensayo
+RESULTADOS = ["obtenido", "error valor", "error longitud", "vacio"]
+
+#------------------------------------------------------------------------------
+# Ensayos
+#------------------------------------------------------------------------------
+
+# tamaño del mensaje de un ensayo, calculado sin ejecutarlo
+def tamanoEnsayo(semilla, ensayo, tam_min, tam_max):
+    return crearGenerador(semilla, ensayo).randint(tam_min, tam_max)
+
+# ejecuta un ensayo y devuelve su fila de la tabla de resultados
+def ejecutarEnsayo(tarea):
+    ataque, semilla, ensayo, tam_min, tam_max, it_max = tarea
+    rng = crearGenerador(semilla, ensayo)
+
+    tam = rng.randint(tam_min, tam_max)
+    it  = rng.randint(0, it_max)
+
+    merkle_hellman = iterativo.Merkle_Hellman(tam, it, rng=rng)
+    merkle_hellman.do()
+
+    inicio = time.perf_counter()
+    solucion = ATAQUES[ataque](merkle_hellman.pk, merkle_hellman.s, rng=rng)
+    tiempo = time.perf_counter() - inicio
+
+    resultado, errores = clasificarResultado(merkle_hellman.mensaje, solucion)
+
+    return {"ataque": ataque, "semilla": semilla, "ensayo": ensayo, "tamano": tam, "iteraciones": it,
+            "densidad": densidad(merkle_hellman.pk), "resultado": resultado, "errores": errores, "tiempo": tiempo}
+
+# repite aislado un ensayo de una campaña, con los mismos parámetros con los que se ejecutó
+def repetirEnsayo(ataque, semilla, ensayo, tam_min=3, tam_max=100, it_max=3):
+    if ataque not in ATAQUES:
+        raise ValueError("ataque desconocido : " + str(ataque))
+
+    return ejecutarEnsayo((ataque, semilla, ensayo, tam_min, tam_max, it_max))
+
+#------------------------------------------------------------------------------
+# Tabla de resultados
+#------------------------------------------------------------------------------
+
+# convierte una línea de la tabla en una fila, o None si está incompleta
+def leerFila(linea):
+    valores = linea.rstrip("\n").split("\t")
+    if not linea.endswith("\n") or len(valores) != len(COLUMNAS):
+        return None
+
+    fila = dict(zip(COLUMNAS, valores))
+    for columna in ("semilla", "ensayo", "tamano", "iteraciones", "errores"):
+        fila[columna] = int(fila[columna])
+    for columna in ("densidad", "tiempo"):
+        fila[columna] = float(fila[columna])
+
+    return fila
+
+# lee las filas guardadas en la tabla, ignorando la última si quedó a medio escribir
+def leerTabla(archivo):
+    filas = []
+    if not os.path.exists(archivo):
+        return filas
+
+    with open(archivo) as f:
+        for linea in f:
+            if linea.startswith(COLUMNAS[0] + "\t"):
+                continue
+            fila = leerFila(linea)
+            if fila is not None:
+                filas.append(fila)
+
+    return filas
+
+# añade una fila a la tabla y la lleva a disco, para no perderla si se interrumpe la campaña
+def escribirFila(f, fila):
+    f.write("\t".join(str(fila[c]) for c in COLUMNAS) + "\n")
+    f.flush()
+    os.fsync(f.fileno())
+
+# abre la tabla para añadir filas, escribiendo la cabecera si es nueva y cortando una posible línea incompleta
+def abrirTabla(archivo):
+    if os.path.exists(archivo):
+        with open(archivo, "rb+") as f:
+            datos = f.read()
+            f.truncate(datos.rfind(b"\n") + 1)
+
+    nueva = not os.path.exists(archivo) or os.path.getsize(archivo) == 0
+    f = open(archivo, "a")
+    if nueva:
+        f.write("\t".join(COLUMNAS) + "\n")
+        f.flush()
+
+    return f
+
+# cuenta los resultados de cada tipo en una lista de filas
+def resumir(filas):
+    resumen = {resultado: 0 for resultado in RESULTADOS}
+    for fila in filas:
+        resumen[fila["resultado"]] += 1
+
+    return resumen
+
+#------------------------------------------------------------------------------
+# Campaña
+#------------------------------------------------------------------------------
+
+# ejecuta los p ensayos de una campaña que falten en la tabla y devuelve todas sus filas
+def ejecutarCampana(ataque, p, semilla, archivo, procesos=None, tam_min=3, tam_max=100, it_max=3, mostrar=True):
+    if ataque not in ATAQUES:
+        raise ValueError("ataque desconocido : " + str(ataque))
+    # la tabla guarda la semilla como entero, para poder continuar la campaña
+    if not isinstance(semilla, int) or isinstance(semilla, bool):
+        raise ValueError("la semilla de la campaña debe ser un entero")
+
+    filas  = [f for f in leerTabla(archivo) if f["ataque"] == ataque and f["semilla"] == semilla and f["ensayo"] < p]
+    hechos = {f["ensayo"] for f in filas}
+    tareas = [(ataque, semilla, i, tam_min, tam_max, it_max) for i in range(p) if i not in hechos]
+
+    # los ensayos más grandes van primero para que no se quede uno largo solo al final
+    tareas.sort(key=lambda tarea: -tamanoEnsayo(semilla, tarea[2], tam_min, tam_max))
+
+    if mostrar:
+        print("Ensayos hechos :", len(hechos), "\t Ensayos pendientes :", len(tareas))
+        print()
+        print("Ensayo \t Tamaño vector \t Número Iteraciones \t Densidad \t\tResultado")
+
+    with abrirTabla(archivo) as f, multiprocessing.Pool(procesos) as pool:
+        for fila in pool.imap_unordered(ejecutarEnsayo, tareas):
+            escribirFila(f, fila)
+            filas.append(fila)
+
+            if mostrar:
+                print(fila["ensayo"]+1, "\t\t", fila["tamano"], "\t\t", fila["iteraciones"], "\t\t\t",
+                      fila["densidad"], "\t", fila["resultado"])
+
+    filas.sort(key=lambda fila: fila["ensayo"])
+
+    return filas
+
+#------------------------------------------------------------------------------
+# Datos de salida
+#------------------------------------------------------------------------------
+
+# ejecuta una campaña y muestra el desglose de resultados
+def variasIteraciones(ataque, p, semilla, archivo, procesos=None):
+    filas   = ejecutarCampana(ataque, p, semilla, archivo, procesos)
+    resumen = resumir(filas)
+
+    print()
+    print("Errores totales  tras", p, "iteraciones :", sum(f["errores"] for f in filas if f["resultado"] == "error valor"))
+    print("Obtenidos        tras", p, "iteraciones :", resumen["obtenido"])
+    print("Errores valor    tras", p, "iteraciones :", resumen["error valor"])
+    print("Vacios  totales  tras", p, "iteraciones :", resumen["vacio"])
+    print("Errores longitud tras", p, "iteraciones :", resumen["error longitud"])
+    print("Tiempo de ataque total (s)  :", round(sum(f["tiempo"] for f in filas), 3))
+
+# repite aislado un ensayo y lo compara con su fila de la tabla, si está guardada
+def repetirIteracion(ataque, semilla, ensayo, archivo):
+    fila = repetirEnsayo(ataque, semilla, ensayo)
+    guardadas = [f for f in leerTabla(archivo) if f["ataque"] == ataque and f["semilla"] == semilla and
+                 f["ensayo"] == ensayo]
+
+    print("Tamaño      :", fila["tamano"])
+    print("Iteraciones :", fila["iteraciones"])
+    print("Densidad    :", round(fila["densidad"], 4))
+    print("Resultado   :", fila["resultado"])
+    print("Tiempo (s)  :", round(fila["tiempo"], 3))
+    if len(guardadas) != 0:
+        print("Tiempo en la campaña (s) :", round(guardadas[0]["tiempo"], 3))
+        print("Mismo resultado          :", all(fila[c] == guardadas[0][c] for c in COLUMNAS if c != "tiempo"))
+
+#------------------------------------------------------------------------------
+# Main
+#------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+
+    print("\nCampaña de ataques a Merkle-Hellman")
+    print()
+
+    # ---------- descomentar para realizar una campaña de p ensayos ----------
+    # ataque   = "lagarias"
+    # p        = 100
+    # semilla  = 1
+    # archivo  = "campana_lagarias.tsv"
+    # procesos = None
+    # variasIteraciones(ataque, p, semilla, archivo, procesos)
+
+    # ---------- descomentar para repetir aislado un ensayo de una campaña ----------
+    # ataque  = "lagarias"
+    # semilla = 1
+    # ensayo  = 42
+    # archivo = "campana_lagarias.tsv"
+    # repetirIteracion(ataque, semilla, ensayo, archivo)
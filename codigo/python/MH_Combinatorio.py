@@ -0,0 +1,317 @@
+# Ataques combinatorios al criptosistema de Merkle-Hellman
+
+# Juan Manuel Mateos Pérez
+
+## Explicación :
+# En este programa atacamos el criptosistema de Merkle-Hellman resolviendo directamente el problema de la mochila
+# (suma de subconjuntos), sin reducción de retículos. A diferencia de los ataques de Lagarias y Coster, estos métodos
+# son exactos: si existe un mensaje que cifra a s con la clave pública, lo encuentran, sea cual sea la densidad. A
+# cambio, su coste crece exponencialmente con el tamaño, por lo que solo son útiles para tamaños pequeños y medianos o
+# para claves de densidad alta, en las que la reducción LLL no encuentra la solución.
+# Todos siguen la misma interfaz que ataqueLagarias y ataqueCoster: reciben (pk, s) y devuelven el mensaje obtenido
+# como lista de 0 y 1, o una lista vacía si no lo encuentran :
+#   - ataqueHorowitzSahni       : encuentro a mitad de camino (meet-in-the-middle). Se calculan las sumas de todos los
+#                                 subconjuntos de la primera mitad de la clave y se buscan las de la segunda mitad que
+#                                 completan s, en una tabla hash (variante "hash") o recorriendo las dos listas ordenadas
+#                                 (variante "ordenada", que ocupa menos memoria). Si una mitad supera el máximo de sumas
+#                                 que se pueden guardar (max_elementos), los elementos que no caben se recorren en orden
+#                                 de Gray, sumando o restando un solo elemento en cada paso, a cambio de repetir la
+#                                 búsqueda por cada uno de sus subconjuntos.
+#   - ataqueSchroeppelShamir    : divide la clave en cuatro cuartos y recorre en orden las sumas de cada mitad con dos
+#                                 montículos, de forma que solo guarda las sumas de los cuartos (raíz cuarta de la memoria
+#                                 de Horowitz-Sahni) con un tiempo parecido.
+#   - ataqueProgramacionDinamica : programación dinámica sobre las sumas alcanzables, descartando las que superan s o no
+#                                 pueden llegar a s con los elementos restantes. Solo es útil si las sumas se repiten
+#                                 mucho, es decir, con densidades muy altas.
+
+## Ejecución :
+# Para ejecutar el programa, solo debemos descomentar el código del main que queramos utilizar:
+# (1) Si descomentamos la primera parte, se comparan los ataques combinatorios con los de Lagarias y Coster para varios
+# tamaños de mensaje (variable tamanos), mostrando el tiempo medio y las claves rotas. Podemos modificar la cantidad de
+# claves por tamaño (variable num_claves) y el número de iteraciones de la clave privada (variable it).
+# (2) Si descomentamos la segunda parte, se hace lo mismo con mochilas aleatorias de densidad alta (variable
+# densidades) y tamaño fijo (variable tam), donde la reducción LLL no suele encontrar la solución.
+
+import heapq
+import time
+
+from MH_Coster import ataqueCoster
+from MH_Estrategias import esSolucion
+from MH_Lagarias import ataqueLagarias
+from MH_Modulos import iterativo
+
+# número máximo de sumas de subconjuntos que se guardan a la vez en Horowitz-Sahni
+MAX_ELEMENTOS = 2**18
+
+# número máximo de sumas alcanzables en la programación dinámica
+MAX_ESTADOS = 2**20
+
+#------------------------------------------------------------------------------
+# Funciones auxiliares
+#------------------------------------------------------------------------------
+
+# recorre las sumas de todos los subconjuntos en orden de Gray, devolviendo (suma, máscara)
+def sumasGray(valores):
+    suma    = 0
+    mascara = 0
+    yield suma, mascara
+
+    for k in range(1, 1 << len(valores)):
+        j   = (k & -k).bit_length() - 1
+        bit = 1 << j
+        if mascara & bit:
+            suma -= valores[j]
+        else:
+            suma += valores[j]
+        mascara ^= bit
+        yield suma, mascara
+
+# ordena las sumas de una tabla indexada por máscara, devolviendo (valores ordenados, máscaras en el mismo orden)
+def ordenarSumas(tabla, descendente=False):
+    mascaras = sorted(range(len(tabla)), key=tabla.__getitem__, reverse=descendente)
+
+    return [tabla[i] for i in mascaras], mascaras
+
+#------------------------------------------------------------------------------
+# Horowitz-Sahni
+#------------------------------------------------------------------------------
+
+# busca un par que sume objetivo recorriendo la lista de sumas de B (la mitad pequeña) y buscando objetivo - b en la
+# tabla hash de sumas de A, que se construye una sola vez
+def buscarHash(indice, tabla_b, objetivo):
+    for mascara_b, suma_b in enumerate(tabla_b):
+        mascara_a = indice.get(objetivo - suma_b)
+        if mascara_a is not None:
+            return mascara_a, mascara_b
+
+    return None
+
+# busca en dos listas ordenadas de sumas un par que sume objetivo, recorriendo A de menor a mayor y B de mayor a menor
+def buscarOrdenada(ordenada_a, ordenada_b, objetivo):
+    valores_a, mascaras_a = ordenada_a
+    valores_b, mascaras_b = ordenada_b
+    i = 0
+    j = len(valores_b) - 1
+
+    while i < len(valores_a) and j >= 0:
+        suma = valores_a[i] + valores_b[j]
+        if suma == objetivo:
+            return mascaras_a[i], mascaras_b[j]
+        if suma < objetivo:
+            i += 1
+        else:
+            j -= 1
+
+    return None
+
+# ataque de Horowitz-Sahni con la variante "hash" u "ordenada", guardando como mucho max_elementos sumas por mitad
+def ataqueHorowitzSahni(pk, s, variante="hash", max_elementos=MAX_ELEMENTOS):
+    n = len(pk)
+
+    # la mitad A se guarda entera; de la mitad B se guarda una parte B1 y el resto se recorre en orden de Gray
+    k  = min(n // 2, max(1, max_elementos.bit_length() - 1))
+    k1 = min(n - k, k)
+    tabla_a  = iterativo.sumasBloque(pk[:k])
+    tabla_b  = iterativo.sumasBloque(pk[k:k+k1])
+    externos = pk[k+k1:]
+
+    if variante == "hash":
+        indice = dict(zip(tabla_a, range(len(tabla_a))))
+        buscar = lambda objetivo: buscarHash(indice, tabla_b, objetivo)
+    elif variante == "ordenada":
+        ordenada_a = ordenarSumas(tabla_a)
+        ordenada_b = ordenarSumas(tabla_b)
+        del tabla_a, tabla_b
+        buscar = lambda objetivo: buscarOrdenada(ordenada_a, ordenada_b, objetivo)
+    else:
+        raise ValueError("variante desconocida : " + str(variante))
+
+    for desplazamiento, mascara_externa in sumasGray(externos):
+        objetivo = s - desplazamiento
+        if objetivo < 0:
+            continue
+
+        encontrado = buscar(objetivo)
+        if encontrado is not None:
+            mascara_a, mascara_b = encontrado
+            mascara = mascara_a | (mascara_b << k) | (mascara_externa << (k + k1))
+            return iterativo.desempaquetarMensaje(mascara, n)
+
+    return []
+
+#------------------------------------------------------------------------------
+# Schroeppel-Shamir
+#------------------------------------------------------------------------------
+
+# recorre las sumas t1[i] + t2[j] en orden (ascendente o descendente) con un montículo, devolviendo (actual, avanzar)
+# cada elemento del montículo es (clave, i, posición en t2 ordenada), con la clave negada si el orden es descendente
+def recorrerSumas(t1, t2, descendente):
+    signo = -1 if descendente else 1
+    valores, mascaras = ordenarSumas(t2, descendente)
+    monticulo = [(signo * (t1[i] + valores[0]), i, 0) for i in range(len(t1))]
+    heapq.heapify(monticulo)
+
+    # devuelve la suma actual y sus máscaras (de t1 y t2), o None si ya no quedan
+    def actual():
+        if not monticulo:
+            return None
+        clave, i, j = monticulo[0]
+        return signo * clave, i, mascaras[j]
+
+    # pasa a la siguiente suma
+    def avanzar():
+        _, i, j = monticulo[0]
+        if j + 1 < len(valores):
+            heapq.heapreplace(monticulo, (signo * (t1[i] + valores[j+1]), i, j + 1))
+        else:
+            heapq.heappop(monticulo)
+
+    return actual, avanzar
+
+# ataque de Schroeppel-Shamir, guardando solo las sumas de los cuatro cuartos de la clave
+def ataqueSchroeppelShamir(pk, s):
+    n  = len(pk)
+    q1 = n // 4
+    q2 = n // 2
+    q3 = q2 + (n - q2) // 2
+
+    # la mitad izquierda se recorre de menor a mayor y la derecha de mayor a menor
+    actual_izq, avanzar_izq = recorrerSumas(iterativo.sumasBloque(pk[:q1]), iterativo.sumasBloque(pk[q1:q2]), False)
+    actual_der, avanzar_der = recorrerSumas(iterativo.sumasBloque(pk[q2:q3]), iterativo.sumasBloque(pk[q3:]), True)
+
+    izq = actual_izq()
+    der = actual_der()
+    while izq is not None and der is not None:
+        suma = izq[0] + der[0]
+        if suma == s:
+            mascara = izq[1] | (izq[2] << q1) | (der[1] << q2) | (der[2] << q3)
+            return iterativo.desempaquetarMensaje(mascara, n)
+
+        if suma < s:
+            avanzar_izq()
+            izq = actual_izq()
+        else:
+            avanzar_der()
+            der = actual_der()
+
+    return []
+
+#------------------------------------------------------------------------------
+# Programación dinámica
+#------------------------------------------------------------------------------
+
+# ataque por programación dinámica sobre las sumas alcanzables; devuelve [] si se superan max_estados sumas
+def ataqueProgramacionDinamica(pk, s, max_estados=MAX_ESTADOS):
+    # recorriendo los elementos de mayor a menor se descartan antes las sumas que ya no pueden llegar a s
+    orden     = sorted(range(len(pk)), key=pk.__getitem__, reverse=True)
+    restantes = sum(pk)
+    estados   = {0: 0}
+
+    for i in orden:
+        a = pk[i]
+        bit = 1 << i
+        restantes -= a
+        nuevos = {}
+
+        for suma, mascara in estados.items():
+            if suma + restantes >= s and suma not in nuevos:
+                nuevos[suma] = mascara
+            suma += a
+            if suma <= s and suma + restantes >= s and suma not in nuevos:
+                nuevos[suma] = mascara | bit
+
+        estados = nuevos
+        if len(estados) > max_estados or len(estados) == 0:
+            return []
+
+    if s in estados:
+        return iterativo.desempaquetarMensaje(estados[s], len(pk))
+    return []
+
+#------------------------------------------------------------------------------
+# Datos de salida
+#------------------------------------------------------------------------------
+
+# ataques que se comparan, con el tamaño máximo para el que se prueba cada uno
+MOTORES = (
+    ("Horowitz-Sahni hash",     lambda pk, s: ataqueHorowitzSahni(pk, s, "hash"),     40),
+    ("Horowitz-Sahni ordenada", lambda pk, s: ataqueHorowitzSahni(pk, s, "ordenada"), 36),
+    ("Schroeppel-Shamir",       ataqueSchroeppelShamir,                               36),
+    ("Programación dinámica",   ataqueProgramacionDinamica,                           24),
+    ("Lagarias",                ataqueLagarias,                                       100),
+    ("Coster",                  ataqueCoster,                                         100),
+)
+
+# genera una mochila aleatoria de n elementos con la densidad indicada y cifra un mensaje aleatorio, con el generador
+# rng (por defecto, el módulo random)
+def generarMochila(n, dens, rng=None):
+    rng = iterativo.generador(rng)
+    bits = max(1, round(n / dens))
+    pk = [rng.randint(1, 2**bits) for i in range(n)]
+    mensaje = [rng.randint(0, 1) for i in range(n)]
+
+    return pk, sum([p for p, x in zip(pk, mensaje) if x]), mensaje
+
+# aplica todos los motores a una lista de (pk, s) y muestra el tiempo medio y cuántas claves rompe cada uno
+def compararEnClaves(etiqueta, claves):
+    n = len(claves[0][0])
+
+    for nombre, ataque, tam_max in MOTORES:
+        if n > tam_max:
+            continue
+
+        tiempo = 0
+        rotas  = 0
+        for pk, s in claves:
+            inicio = time.perf_counter()
+            solucion = ataque(pk, s)
+            tiempo += time.perf_counter() - inicio
+            rotas  += esSolucion(pk, s, solucion)
+
+        print(etiqueta, "\t\t", nombre, "\t" * (1 if len(nombre) >= 16 else 2), round(tiempo / len(claves), 4),
+              "\t\t", rotas, "/", len(claves))
+
+# compara los motores con claves de Merkle-Hellman de varios tamaños
+def compararMotores(tamanos, num_claves, it):
+    print("Tamaño \t\t Ataque \t\t\t Tiempo (s) \t Rotas")
+
+    for tam in tamanos:
+        claves = []
+        for i in range(num_claves):
+            merkle_hellman = iterativo.Merkle_Hellman(tam, it)
+            merkle_hellman.cifrar()
+            claves.append((merkle_hellman.pk, merkle_hellman.s))
+        compararEnClaves(tam, claves)
+
+    print()
+
+# compara los motores con mochilas aleatorias de densidad alta
+def compararDensidades(tam, densidades, num_claves):
+    print("Densidad \t Ataque \t\t\t Tiempo (s) \t Rotas")
+
+    for dens in densidades:
+        claves = [generarMochila(tam, dens)[:2] for i in range(num_claves)]
+        compararEnClaves(round(dens, 2), claves)
+
+    print()
+
+#------------------------------------------------------------------------------
+# Main
+#------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+
+    print("\nAtaques combinatorios a Merkle-Hellman")
+    print()
+
+    # ---------- descomentar para comparar los motores con claves de Merkle-Hellman ----------
+    # tamanos    = [12, 20, 28, 36, 40]
+    # num_claves = 3
+    # it         = 1
+    # compararMotores(tamanos, num_claves, it)
+
+    # ---------- descomentar para comparar los motores con mochilas de densidad alta ----------
+    # tam        = 24
+    # densidades = [0.9, 1.2, 2, 4]
+    # num_claves = 5
+    # compararDensidades(tam, densidades, num_claves)
@@ -0,0 +1,232 @@
+# Representación compacta de las claves y mensajes de Merkle-Hellman
+
+# Juan Manuel Mateos Pérez
+
+## Explicación :
+# En este programa guardamos las claves y los mensajes del criptosistema de Merkle-Hellman iterativo ocupando la menor
+# memoria posible, para poder mantener a la vez una gran cantidad de claves :
+#   - Las clases usan __slots__, por lo que sus objetos no tienen diccionario de atributos.
+#   - Las sucesiones de enteros (la clave pública y la sucesión supercreciente) se guardan en un único bloque de bytes,
+#     con todos los elementos del mismo ancho en big-endian, igual que en MH_Serializacion.py, en lugar de una lista de
+#     objetos int de Python.
+#   - De la clave privada iterada solo se guarda la sucesión de la primera capa y los pares (m, w) de cada capa, que
+#     es lo único que necesita el descifrado. Las sucesiones de las demás capas se pueden recalcular cuando se piden.
+#   - Los mensajes de 0 y 1 se empaquetan en un entero, en el que el bit i es el elemento i del mensaje.
+# El cifrado y el descifrado trabajan directamente sobre estos bloques: el cifrado solo lee los elementos de la clave
+# pública de los bits a 1 del mensaje, y el descifrado recorre la sucesión en el bloque de bytes y devuelve el mensaje
+# empaquetado.
+
+## Ejecución :
+# Para ejecutar el programa, solo debemos descomentar el código del main que queramos utilizar:
+# (1) Si descomentamos la primera parte, se crean num_claves criptosistemas con la representación original y con la
+# compacta y se muestra la memoria que ocupa cada uno, comprobando además que cifran y descifran igual. Podemos
+# modificar el tamaño del mensaje (variable tam), el número de iteraciones (variable it) y la cantidad de claves
+# (variable num_claves).
+
+import random
+import tracemalloc
+
+from MH_Modulos import iterativo
+
+#------------------------------------------------------------------------------
+# Funciones auxiliares
+#------------------------------------------------------------------------------
+
+# empaquetado de los mensajes, igual que en Merkle_Hellman (el elemento i es el bit i)
+empaquetarMensaje    = iterativo.empaquetarMensaje
+desempaquetarMensaje = iterativo.desempaquetarMensaje
+
+# empaqueta una lista de enteros no negativos en un bloque de bytes con ancho fijo
+def empaquetarEnteros(valores):
+    ancho = max(1, (max(valores, default=0).bit_length() + 7) // 8)
+
+    return ancho, b"".join(v.to_bytes(ancho, "big") for v in valores)
+
+# desempaqueta un bloque de bytes con ancho fijo en una lista de enteros
+def desempaquetarEnteros(datos, ancho):
+    return [int.from_bytes(datos[i:i+ancho], "big") for i in range(0, len(datos), ancho)]
+
+#------------------------------------------------------------------------------
+# Clase Clave_Publica_Compacta
+#------------------------------------------------------------------------------
+
+class Clave_Publica_Compacta:
+    __slots__ = ("tamano", "ancho", "datos")
+
+    # constructor
+    def __init__(self, pk):
+        self.tamano = len(pk)
+        self.ancho, self.datos = empaquetarEnteros(pk)
+
+    # número de elementos
+    def __len__(self):
+        return self.tamano
+
+    # devuelve el elemento i
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.tamano
+        if i < 0 or i >= self.tamano:
+            raise IndexError("índice fuera de la clave")
+
+        return int.from_bytes(self.datos[i*self.ancho:(i+1)*self.ancho], "big")
+
+    # devuelve la clave pública como lista
+    def lista(self):
+        return desempaquetarEnteros(self.datos, self.ancho)
+
+    # cifra un mensaje empaquetado, sumando solo los elementos de sus bits a 1
+    def cifrar(self, mensaje):
+        datos, ancho = self.datos, self.ancho
+        s = 0
+
+        while mensaje:
+            bit = mensaje & -mensaje
+            pos = (bit.bit_length() - 1) * ancho
+            s  += int.from_bytes(datos[pos:pos+ancho], "big")
+            mensaje ^= bit
+
+        return s
+
+#------------------------------------------------------------------------------
+# Clase Clave_Privada_Compacta
+#------------------------------------------------------------------------------
+
+class Clave_Privada_Compacta:
+    __slots__ = ("tamano", "ancho", "datos", "capas", "cadena")
+
+    # constructor; sk es una clave privada iterada [[m, w, sucesion], ...]
+    def __init__(self, sk):
+        self.tamano = len(sk[0][2])
+        self.ancho, self.datos = empaquetarEnteros(sk[0][2])
+        self.capas = tuple((capa[0], capa[1]) for capa in sk)
+
+        # pares (módulo, multiplicador) en el orden en que se deshacen, como en Contexto_Descifrado
+        if len(sk) == 1:
+            self.cadena = ((sk[0][0], pow(sk[0][1], -1, sk[0][0])),)
+        else:
+            self.cadena = tuple(reversed(self.capas))
+
+    # recalcula la clave privada iterada completa [[m, w, sucesion], ...]
+    def clavePrivada(self):
+        sucesion = desempaquetarEnteros(self.datos, self.ancho)
+        sk = []
+
+        for p in range(len(self.capas)):
+            m, w = self.capas[p]
+            sk.append([m, w, sucesion])
+
+            # la sucesión de la capa siguiente es la de esta multiplicada por el inverso de w
+            if p + 1 < len(self.capas):
+                u = pow(w, -1, m)
+                sucesion = [(a * u) % m for a in sucesion]
+
+        return sk
+
+    # descifra un mensaje cifrado y devuelve el mensaje empaquetado
+    def descifrar(self, s):
+        datos, ancho = self.datos, self.ancho
+        res = 0
+
+        # deshacemos las iteraciones de la clave privada
+        sp = s
+        for m, mult in self.cadena:
+            sp = (sp * mult) % m
+
+        # recorremos la sucesión de mayor a menor directamente sobre los bytes
+        for i in range(self.tamano - 1, -1, -1):
+            a = int.from_bytes(datos[i*ancho:(i+1)*ancho], "big")
+            if sp >= a:
+                sp -= a
+                res |= 1 << i
+
+        return res
+
+#------------------------------------------------------------------------------
+# Clase Merkle_Hellman_Compacto
+#------------------------------------------------------------------------------
+
+class Merkle_Hellman_Compacto:
+    __slots__ = ("tamano", "pk", "sk", "mensaje", "s", "res", "errores")
+
+    # constructor; la clave se genera o se completa con iterativo.Merkle_Hellman y después se compacta
+    # el mensaje puede darse como lista de 0 y 1 o ya empaquetado, y rng es el generador aleatorio de la clave
+    def __init__(self, tamano, num_it, mensaje=None, sk=None, rng=None):
+        if isinstance(mensaje, int):
+            mensaje = desempaquetarMensaje(mensaje, tamano)
+        original = iterativo.Merkle_Hellman(tamano, num_it, mensaje, sk, rng)
+
+        self.tamano  = tamano
+        self.pk      = Clave_Publica_Compacta(original.pk)
+        self.sk      = Clave_Privada_Compacta(original.sk)
+        self.mensaje = empaquetarMensaje(original.mensaje)
+        self.s       = -1
+        self.res     = -1
+        self.errores = -1
+
+    # cifra el mensaje
+    def cifrar(self):
+        self.s = self.pk.cifrar(self.mensaje)
+
+    # descifra el mensaje cifrado
+    def descifrar(self):
+        self.res = self.sk.descifrar(self.s)
+
+    # calcula el número de fallos del resultado, contando los bits distintos
+    def comprobar(self):
+        self.errores = bin(self.mensaje ^ self.res).count("1")
+
+    # aplica todo el criptosistema
+    def do(self):
+        self.cifrar()
+        self.descifrar()
+        self.comprobar()
+
+#------------------------------------------------------------------------------
+# Datos de salida
+#------------------------------------------------------------------------------
+
+# mide la memoria que ocupan num_claves criptosistemas con la representación original y con la compacta
+# las dos representaciones se generan con generadores de la misma semilla, por lo que contienen las mismas claves y
+# mensajes
+def medirMemoria(tam, it, num_claves, semilla=0):
+    rng = random.Random(semilla)
+    tracemalloc.start()
+    originales = [iterativo.Merkle_Hellman(tam, it, rng=rng) for i in range(num_claves)]
+    for merkle_hellman in originales:
+        merkle_hellman.do()
+    memoria_original = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    rng = random.Random(semilla)
+    tracemalloc.start()
+    compactos = [Merkle_Hellman_Compacto(tam, it, rng=rng) for i in range(num_claves)]
+    for merkle_hellman in compactos:
+        merkle_hellman.do()
+    memoria_compacta = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    iguales = all(o.s == c.s and empaquetarMensaje(o.res) == c.res for o, c in zip(originales, compactos))
+
+    print("Tamaño mensaje           :", tam)
+    print("Número iteraciones       :", it)
+    print("Memoria original  (clave):", memoria_original // num_claves, "bytes")
+    print("Memoria compacta  (clave):", memoria_compacta // num_claves, "bytes")
+    print("Reducción                :", round(memoria_original / memoria_compacta, 2), "veces")
+    print("Mismos resultados        :", iguales)
+    print()
+
+#------------------------------------------------------------------------------
+# Main
+#------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+
+    print("\nRepresentación compacta de Merkle-Hellman")
+    print()
+
+    # ---------- descomentar para comparar la memoria de las dos representaciones ----------
+    # tam        = 256
+    # it         = 3
+    # num_claves = 1000
+    # medirMemoria(tam, it, num_claves)
@@ -0,0 +1,294 @@
+# Ataque de Coster al criptosistema de Merkle-Hellman
+
+# Juan Manuel Mateos Pérez
+
+## Explicación :
+# En este programa simulamos el ataque mediante el método de Coster a una comunicación realizada usando el
+# criptosistema de Merkle-Hellman, igual que en jupyter/Coster.ipynb, pero en Python y sin usar SageMath. La reducción
+# LLL de la matriz la realizamos con MH_LLL.py. El ataque utiliza únicamente los valores conocidos del criptosistema,
+# que son la clave pública y el mensaje cifrado. El programa obtiene como resultado un mensaje descifrado, el cual
+# comprobaremos si coincide con el original.
+# En lugar de la matriz del notebook, cuya última fila tiene valores 1/2, usamos la misma matriz multiplicada por 2, que
+# solo tiene enteros. El retículo reducido es exactamente el doble del original, por lo que basta con sumar 1 (en vez
+# de 1/2) a cada elemento y comparar con 2*s para obtener la misma solución, sin operar con Fraction ni en la
+# reducción ni en la búsqueda de la solución.
+
+## Ejecución :
+# Para ejecutar el programa, solo debemos descomentar el código del main que queramos utilizar:
+# (1) Si descomentamos la primera parte, podremos ejecutar el programa 1 vez y veremos todos los datos necesarios. Además,
+# podemos modificar el tamaño del mensaje (variable tam) y el número de iteraciones de la clave privada (variable it).
+# (2) Si por otro lado descomentamos la segunda parte, el programa se ejecuta p veces y mostrará un desglose de fallos,
+# vacios y errores de longitud cometidos. En este caso podemos modificar la variable p, que indica la cantidad de cripto-
+# sistemas que se van a ejecutar.
+# (3) Finalmente, si descomentamos la tercera parte, el programa ejecuta una función que genera varios criptosistemas con
+# distintas densidades para así analizar el rendimiento del algoritmo. Aquí, se puede modificar el tamaño del mensaje
+# (variable tam), el número de ejecuciones totales (variable it) y el nombre del archivo donde debe mostrar los datos
+# (variable archivo).
+
+import math
+import random
+from fractions import Fraction
+from itertools import islice
+
+from MH_LLL import lll
+from MH_Modulos import basico, iterativo
+from MH_Lagarias import comprobarErrores, densidad
+
+# intercambio de los 1/2 por -1/2 y viceversa, sobre el doble de cada elemento más 1 (1/2 -> 2, -1/2 -> 0)
+CAMBIO = {2: 0, 0: 2}
+
+#------------------------------------------------------------------------------
+# Ataque de Coster
+#------------------------------------------------------------------------------
+
+# valores posibles del factor N de la matriz de Coster
+def valoresN(n):
+    return range(int((1/2)*math.sqrt(n)), int(math.sqrt(n)) + 1)
+
+# genera la matriz de Coster del notebook, con valores 1/2; si no se indica N, se elige al azar
+# se mantiene como referencia de generarMatriz
+def generarMatrizRacional(pk, s, N=None, rng=None):
+    n = len(pk)
+    if N is None:
+        N = iterativo.generador(rng).randint(int((1/2)*math.sqrt(n)), int(math.sqrt(n)))
+    filas = []
+
+    # generamos los n primeros vectores
+    for i in range(0, n):
+        aux = [0] * (n+1)
+        aux[i] = 1
+        aux[n] = pk[i]*N
+        filas.append(aux)
+
+    # generamos el vector n+1
+    b = []
+    for i in range(n+1):
+        b.append(Fraction(1, 2))
+    b[n] = s*N
+
+    filas.append(b)
+
+    return filas
+
+# genera la matriz necesaria para aplicar Coster, multiplicada por 2 para que todos sus valores sean enteros
+# si no se indica N, se elige al azar igual que en generarMatrizRacional
+def generarMatriz(pk, s, N=None, rng=None):
+    n = len(pk)
+    if N is None:
+        N = iterativo.generador(rng).randint(int((1/2)*math.sqrt(n)), int(math.sqrt(n)))
+    filas = []
+
+    # generamos los n primeros vectores
+    for i in range(0, n):
+        aux = [0] * (n+1)
+        aux[i] = 2
+        aux[n] = 2*pk[i]*N
+        filas.append(aux)
+
+    # generamos el vector n+1
+    b = [1] * (n+1)
+    b[n] = 2*s*N
+
+    filas.append(b)
+
+    return filas
+
+# encuentra una solución en la matriz racional recibida, recorriendo cada fila elemento a elemento como en el notebook
+# se mantiene como referencia de buscarSolucion
+def buscarSolucionFilas(matriz, pk, s):
+    n = len(matriz)
+    sol_encontrada = False
+    solucion = []
+
+    for j in range(n):
+        if sol_encontrada == False:
+            suma = 0
+            fila = matriz[j]
+
+            for i in range(len(fila)-1):
+                aux = fila[i] + Fraction(1, 2)
+                if aux < 0:
+                    aux = 0
+                suma += pk[i]*aux
+                solucion.append(aux)
+            if suma == s:
+                sol_encontrada = True
+            else:
+                solucion = []
+
+    solucion = [int(x) if Fraction(x).denominator == 1 else x for x in solucion]
+    return solucion
+
+# intercambia los 1/2 por -1/2 y viceversa en una matriz
+def cambiarMatriz(matriz):
+    matriz_res = [list(fila) for fila in matriz]
+
+    for i in range(len(matriz)):
+        for j in range(len(matriz[i])-1):
+            if matriz[i][j] == Fraction(1, 2):
+                matriz_res[i][j] = Fraction(-1, 2)
+            elif matriz[i][j] == Fraction(-1, 2):
+                matriz_res[i][j] = Fraction(1, 2)
+
+    return matriz_res
+
+# encuentra una solución en la matriz entera recibida, con el mismo resultado que buscarSolucionFilas en la racional
+# cada fila es el doble de la racional, así que se le suma 1 (el doble de 1/2) y se compara con 2*s, de forma que cada
+# fila se comprueba con una sola comprensión de enteros; con cambiar=True se comprueban las filas con los 1/2 y -1/2
+# intercambiados (en el doble, 2 y 0), calculando cada fila al vuelo en lugar de copiar la matriz entera
+def buscarSolucion(matriz, pk, s, cambiar=False):
+    n = len(pk)
+
+    for fila in matriz:
+        dobles = [x + 1 for x in islice(fila, n)]
+        if cambiar:
+            dobles = [CAMBIO.get(d, d) for d in dobles]
+
+        if sum([p*d for p, d in zip(pk, dobles) if d > 0]) == 2*s:
+            return [(d // 2 if d % 2 == 0 else Fraction(d, 2)) if d > 0 else 0 for d in dobles]
+
+    return []
+
+# busca una solución en la matriz y, si no la hay, en la matriz con los 1/2 y -1/2 intercambiados
+def extraerSolucion(matriz, pk, s):
+    solucion = buscarSolucion(matriz, pk, s)
+    if len(solucion) == 0:
+        solucion = buscarSolucion(matriz, pk, s, cambiar=True)
+
+    return solucion
+
+# aplica el ataque de Coster; si no se indica N, se elige al azar con el generador rng (por defecto, el módulo random)
+def ataqueCoster(pk, s, N=None, rng=None):
+    solucion = []
+
+    # generamos la matriz
+    matriz_ini = generarMatriz(pk, s, N, rng)
+    # aplicamos LLL
+    matriz_res = lll(matriz_ini)
+    # buscamos una solución, también con los 1/2 por -1/2 y viceversa
+    solucion = extraerSolucion(matriz_res, pk, s)
+
+    return solucion
+
+#------------------------------------------------------------------------------
+# Datos de salida
+#------------------------------------------------------------------------------
+
+# ejecuta y muestra los datos tras aplicar una iteración
+def unaIteracion(tam, it):
+    merkle_hellman = iterativo.Merkle_Hellman(tam, it)
+    merkle_hellman.do()
+
+    pk = merkle_hellman.pk
+    s  = merkle_hellman.s
+
+    coster = ataqueCoster(pk, s)
+
+    print()
+    print("Clave pública      :", merkle_hellman.pk)
+    print("Mensaje original   :", merkle_hellman.mensaje)
+    print("Mensaje cifrado    :", merkle_hellman.s)
+    print("Mensaje descifrado :", coster)
+    print("Tamaño mensaje     :", tam)
+    print("Número iteraciones :", it)
+    print("Errores totales    :", comprobarErrores(merkle_hellman.mensaje, coster))
+
+# ejecuta y muestra los datos tras aplicar p iteraciones
+def variasIteraciones(p):
+    errores  = 0
+    err_long = 0
+    vacios   = 0
+
+    print()
+    print("Iteración \t Tamaño vector \t Número Iteraciones \t Densidad \t\tResultado")
+
+    for i in range(p):
+        print(i+1, end = "")
+
+        tam = random.randint(3, 100)
+        print("\t\t", tam, end="")
+
+        it = random.randint(0, 3)
+        print("\t\t", it, end="")
+
+        merkle_hellman = iterativo.Merkle_Hellman(tam, it)
+        merkle_hellman.do()
+
+        print("\t\t\t", densidad(merkle_hellman.pk), end="")
+
+        coster = ataqueCoster(merkle_hellman.pk, merkle_hellman.s)
+        if len(coster) == 0:
+            vacios += 1
+            print("\tvacio")
+        elif len(coster) != len(merkle_hellman.mensaje):
+            err_long += 1
+            print("\terror longitud")
+        else:
+            valor = comprobarErrores(merkle_hellman.mensaje, coster)
+            errores += valor
+            if valor != 0:
+                print("\terror valor")
+            else:
+                print("\tobtenido")
+
+    print()
+    print("Errores totales  tras", p, "iteraciones :", errores)
+    print("Vacios  totales  tras", p, "iteraciones :", vacios)
+    print("Errores longitud tras", p, "iteraciones :", err_long)
+
+# ejecuta criptosistemas con distintas densidades para analizar el rendimiento
+def medirErrores(tam, num_it, archivo):
+    inicio = tam * 5
+    fin = tam // 2
+    paso = (inicio - fin) / (num_it-1)
+
+    for i in range(num_it):
+        n = fin + i*paso
+        lim_inf = int(2 ** (2*n + 1) + 1)
+        lim_sup = int(2 ** (2*n + 2) - 1)
+        m  = random.randint(lim_inf, lim_sup)
+
+        obtenido = False
+        for j in range(10):
+            if obtenido == False:
+                merkle_hellman = basico.Merkle_Hellman(tam, m=m)
+                merkle_hellman.do()
+                dens = densidad(merkle_hellman.pk)
+                coster = ataqueCoster(merkle_hellman.pk, merkle_hellman.s)
+                if coster == merkle_hellman.mensaje:
+                    obtenido = True
+
+        resultado = str(tam)
+        resultado += "\t" + str(dens)
+        if obtenido == True:
+            resultado += "\t 0"
+        else:
+            resultado += "\t 1"
+
+        with open(archivo, 'a') as f:
+            f.write(resultado + "\n")
+
+#------------------------------------------------------------------------------
+# Main
+#------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+
+    print("\nAtaque de Coster")
+    print()
+
+    # ---------- descomentar para realizar 1 ejecución aleatoria ----------
+    # tam = random.randint(3, 100)
+    # it  = random.randint(0, 3)
+    # unaIteracion(tam, it)
+
+    # ---------- descomentar para realizar p ejecuciones aleatorias ----------
+    # p = 5
+    # variasIteraciones(p)
+
+    # ---------- descomentar para analizar it ejecuciones aleatorias ----------
+    # tam = 10
+    # it = 50
+    # archivo = "resultados.txt"
+    # medirErrores(tam, it, archivo)
+    # print("Finalizado")
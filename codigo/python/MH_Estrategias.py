@@ -0,0 +1,249 @@
+# Planificador de estrategias de ataque al criptosistema de Merkle-Hellman
+
+# Juan Manuel Mateos Pérez
+
+## Explicación :
+# En este programa combinamos los ataques de Lagarias y Coster en una lista de estrategias independientes, cada una
+# con una sola reducción LLL :
+#   - lagarias       : matriz inicial de Lagarias.
+#   - lagarias_caso4 : matriz del caso 4 de Lagarias, con sum(pk) - s.
+#   - coster_r       : matriz de Coster con un valor de N, sorteados sin repetir entre los posibles, siendo r el cociente
+#                      N/sqrt(n) redondeado a una décima. Así las estadísticas de una estrategia corresponden siempre a
+#                      valores de N de la misma proporción respecto al tamaño, y no a la posición en que se sortearon.
+# El planificador guarda para cada estrategia y cada intervalo de densidad cuántas veces se ha probado y cuántas ha
+# tenido éxito, y antes de cada ataque ordena las estrategias por su tasa de éxito en la densidad de la clave. Las
+# estrategias se prueban en ese orden y se para en la primera que da una solución comprobada (un vector de 0 y 1 cuya
+# suma con la clave pública es el mensaje cifrado).
+# También se pueden lanzar a la vez en varios procesos, con un grupo de procesos que el planificador reutiliza entre
+# ataques: en cuanto una estrategia encuentra la solución, si quedan otras en marcha o pendientes se cancelan
+# terminando el grupo de procesos, que se vuelve a crear en el siguiente ataque. Así ningún ataque espera a reducciones
+# de un ataque anterior; el grupo solo se conserva cuando todas las estrategias han terminado.
+# Las estadísticas se pueden guardar en un archivo JSON para reutilizarlas entre ejecuciones.
+
+## Ejecución :
+# Para ejecutar el programa, solo debemos descomentar el código del main que queramos utilizar:
+# (1) Si descomentamos la primera parte, se comparan el orden fijo de los notebooks (Lagarias completo y después un
+# Coster) con el planificador, tanto en un solo proceso como en varios, mostrando el tiempo medio hasta romper cada
+# clave y cuántas se rompen. Podemos modificar la lista de tamaños (variable tamanos), la cantidad de claves por tamaño
+# (variable num_claves), el número de iteraciones de la clave privada (variable it) y el archivo de estadísticas
+# (variable archivo).
+
+import json
+import math
+import multiprocessing
+import os
+import time
+
+from MH_Coster import ataqueCoster, valoresN
+from MH_Lagarias import ataqueLagarias, ataqueLagariasPaso, densidad
+from MH_Modulos import iterativo
+
+# ancho de los intervalos de densidad con los que se agrupan las estadísticas
+ANCHO_DENSIDAD = 0.1
+
+# número máximo de valores de N de Coster que se prueban
+MAX_N = 4
+
+#------------------------------------------------------------------------------
+# Estrategias
+#------------------------------------------------------------------------------
+
+# comprueba que el vector es un mensaje de 0 y 1 que cifra a s con la clave pública
+def esSolucion(pk, s, solucion):
+    if len(solucion) != len(pk) or any(x != 0 and x != 1 for x in solucion):
+        return False
+
+    return sum([p for p, x in zip(pk, solucion) if x == 1]) == s
+
+# genera la lista de estrategias para una clave pública, como pares (nombre, parámetro)
+# los valores de N se sortean con el generador rng (por defecto, el módulo random)
+def generarEstrategias(pk, max_n=MAX_N, rng=None):
+    estrategias = [("lagarias", 0), ("lagarias_caso4", 1)]
+
+    valores = list(valoresN(len(pk)))
+    valores = iterativo.generador(rng).sample(valores, min(max_n, len(valores)))
+    for N in valores:
+        estrategias.append((nombreCoster(N, len(pk)), N))
+
+    return estrategias
+
+# nombre de la estrategia de Coster con el valor N para un tamaño n, que solo depende de N/sqrt(n)
+def nombreCoster(N, n):
+    return "coster_" + str(round(N / math.sqrt(n), 1))
+
+# aplica una estrategia y devuelve (nombre, solución comprobada o [], tiempo)
+def ejecutarEstrategia(estrategia, pk, s):
+    nombre, parametro = estrategia
+    inicio = time.perf_counter()
+
+    if nombre.startswith("lagarias"):
+        solucion = ataqueLagariasPaso(pk, s, parametro)
+    else:
+        solucion = ataqueCoster(pk, s, parametro)
+
+    if not esSolucion(pk, s, solucion):
+        solucion = []
+
+    return nombre, solucion, time.perf_counter() - inicio
+
+# versión de ejecutarEstrategia para los procesos, que reciben todos los argumentos juntos
+def ejecutarTarea(tarea):
+    return ejecutarEstrategia(*tarea)
+
+#------------------------------------------------------------------------------
+# Clase Planificador
+#------------------------------------------------------------------------------
+
+class Planificador:
+    # constructor; procesos es el número de procesos del grupo de atacarParalelo (None para usar todos los núcleos)
+    def __init__(self, archivo=None, max_n=MAX_N, procesos=None):
+        self.archivo      = archivo
+        self.max_n        = max_n
+        self.procesos     = procesos
+        self.estadisticas = {}
+        self.pool         = None
+
+        if archivo is not None and os.path.exists(archivo):
+            self.cargar()
+
+    # intervalo de densidad de una clave pública
+    def intervalo(self, pk):
+        return str(round(int(densidad(pk) / ANCHO_DENSIDAD) * ANCHO_DENSIDAD, 2))
+
+    # tasa de éxito estimada de una estrategia en un intervalo, que empieza en 1/2 si no hay datos
+    def tasa(self, nombre, intervalo):
+        exitos, intentos = self.estadisticas.get(intervalo, {}).get(nombre, (0, 0))
+
+        return (exitos + 1) / (intentos + 2)
+
+    # ordena las estrategias por su tasa de éxito; a igualdad de tasa se mantiene el orden de los notebooks
+    def ordenar(self, pk, estrategias):
+        intervalo = self.intervalo(pk)
+
+        return sorted(estrategias, key=lambda e: -self.tasa(e[0], intervalo))
+
+    # anota el resultado de una estrategia
+    def registrar(self, pk, nombre, exito):
+        grupo = self.estadisticas.setdefault(self.intervalo(pk), {})
+        exitos, intentos = grupo.get(nombre, (0, 0))
+        grupo[nombre] = (exitos + int(exito), intentos + 1)
+
+    # aplica las estrategias en orden hasta encontrar una solución, devolviendo (solución, nombre de la estrategia)
+    def atacar(self, pk, s, rng=None):
+        for estrategia in self.ordenar(pk, generarEstrategias(pk, self.max_n, rng)):
+            nombre, solucion, tiempo = ejecutarEstrategia(estrategia, pk, s)
+            self.registrar(pk, nombre, len(solucion) > 0)
+
+            if len(solucion) > 0:
+                return solucion, nombre
+
+        return [], None
+
+    # devuelve el grupo de procesos, creándolo la primera vez
+    def grupo(self):
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(self.procesos)
+
+        return self.pool
+
+    # termina el grupo de procesos, cancelando las estrategias que sigan en marcha o pendientes
+    def cerrar(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+    # aplica las estrategias a la vez en varios procesos; cuando una encuentra la solución, las demás que sigan en
+    # marcha o pendientes se cancelan terminando el grupo de procesos
+    def atacarParalelo(self, pk, s, rng=None):
+        estrategias = self.ordenar(pk, generarEstrategias(pk, self.max_n, rng))
+        tareas = [(estrategia, pk, s) for estrategia in estrategias]
+
+        terminadas = 0
+        for nombre, solucion, tiempo in self.grupo().imap_unordered(ejecutarTarea, tareas):
+            self.registrar(pk, nombre, len(solucion) > 0)
+            terminadas += 1
+
+            if len(solucion) > 0:
+                if terminadas < len(tareas):
+                    self.cerrar()
+                return solucion, nombre
+
+        return [], None
+
+    # guarda las estadísticas en el archivo
+    def guardar(self):
+        with open(self.archivo + ".tmp", "w") as f:
+            json.dump(self.estadisticas, f, indent=1)
+        os.replace(self.archivo + ".tmp", self.archivo)
+
+    # carga las estadísticas del archivo
+    def cargar(self):
+        with open(self.archivo) as f:
+            datos = json.load(f)
+
+        self.estadisticas = {i: {e: tuple(v) for e, v in grupo.items()} for i, grupo in datos.items()}
+
+#------------------------------------------------------------------------------
+# Datos de salida
+#------------------------------------------------------------------------------
+
+# ataque con el orden fijo de los notebooks: Lagarias completo y, si falla, un Coster
+def ataqueFijo(pk, s, rng=None):
+    solucion = ataqueLagarias(pk, s)
+    if not esSolucion(pk, s, solucion):
+        solucion = ataqueCoster(pk, s, rng=rng)
+
+    if not esSolucion(pk, s, solucion):
+        return []
+    return solucion
+
+# compara el tiempo medio hasta romper una clave con el orden fijo y con el planificador
+def compararPlanificador(tamanos, num_claves, it, archivo, procesos=None):
+    planificador = Planificador(archivo, procesos=procesos)
+
+    print("Tamaño \t Fijo (s) \t Planificador (s) \t Paralelo (s) \t Rotas fijo \t Rotas planificador \t Rotas paralelo")
+
+    for tam in tamanos:
+        tiempos = [0, 0, 0]
+        rotas   = [0, 0, 0]
+
+        for i in range(num_claves):
+            merkle_hellman = iterativo.Merkle_Hellman(tam, it)
+            merkle_hellman.do()
+            pk, s = merkle_hellman.pk, merkle_hellman.s
+
+            ataques = [lambda: ataqueFijo(pk, s),
+                       lambda: planificador.atacar(pk, s)[0],
+                       lambda: planificador.atacarParalelo(pk, s)[0]]
+
+            for j in range(len(ataques)):
+                inicio = time.perf_counter()
+                solucion = ataques[j]()
+                tiempos[j] += time.perf_counter() - inicio
+                rotas[j] += solucion == merkle_hellman.mensaje
+
+        print(tam, "\t\t", round(tiempos[0] / num_claves, 3), "\t\t", round(tiempos[1] / num_claves, 3), "\t\t\t",
+              round(tiempos[2] / num_claves, 3), "\t\t", rotas[0], "/", num_claves, "\t\t", rotas[1], "/", num_claves,
+              "\t\t\t", rotas[2], "/", num_claves)
+
+    planificador.cerrar()
+    if archivo is not None:
+        planificador.guardar()
+    print()
+
+#------------------------------------------------------------------------------
+# Main
+#------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+
+    print("\nPlanificador de estrategias de ataque a Merkle-Hellman")
+    print()
+
+    # ---------- descomentar para comparar el orden fijo con el planificador ----------
+    # tamanos    = [20, 40, 60, 80]
+    # num_claves = 5
+    # it         = 1
+    # archivo    = "estrategias.json"
+    # compararPlanificador(tamanos, num_claves, it, archivo)
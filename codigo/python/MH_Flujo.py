@@ -0,0 +1,196 @@
+# Cifrado de flujos de bytes con el criptosistema de Merkle-Hellman
+
+# Juan Manuel Mateos Pérez
+
+## Explicación :
+# En este programa usamos el criptosistema de Merkle-Hellman para cifrar datos reales (un archivo o cualquier flujo de
+# bytes) en lugar de un mensaje aleatorio. Los bytes de entrada se leen por trozos y se dividen en bloques de tamano
+# bits, que se cifran con la clave pública. Cada mensaje cifrado se escribe con el mismo número de bytes, precedidos de
+# una pequeña cabecera, de forma que el descifrado puede leerlos de nuevo por trozos y descifrarlos bloque a bloque.
+# Tras los datos se añade un bit a 1 seguido de ceros hasta completar el último bloque, lo que permite recuperar la
+# longitud exacta sin conocerla de antemano.
+# Ambos sentidos son generadores que solo mantienen en memoria un trozo de la entrada, por lo que sirven para archivos
+# de cualquier tamaño.
+
+## Ejecución :
+# Para ejecutar el programa, solo debemos descomentar el código del main que queramos utilizar:
+# (1) Si descomentamos la primera parte, se cifra el archivo indicado en la variable origen y se guarda en cifrado,
+# para después descifrarlo en destino. Podemos modificar el tamaño de los bloques (variable tam) y el número de
+# iteraciones de la clave privada (variable it).
+
+# Formato del flujo cifrado :
+#     "MHF"         (3 bytes)  identificador del formato
+#     versión       (1 byte)
+#     tamano        (4 bytes)  bits por bloque
+#     ancho         (2 bytes)  bytes de cada mensaje cifrado
+#     cifrados      (ancho bytes cada uno, en big-endian)
+
+from MH_Modulos import iterativo
+
+# identificador y versión del formato del flujo cifrado
+MAGICO  = b"MHF"
+VERSION = 1
+
+# número de bloques que se leen y cifran de cada vez
+BLOQUES_POR_TROZO = 1024
+
+# traduce los caracteres '0'/'1' a los bits 0/1 y viceversa
+ASCII_BITS = bytes.maketrans(b"01", b"\x00\x01")
+BITS_ASCII = bytes.maketrans(b"\x00\x01", b"01")
+
+#------------------------------------------------------------------------------
+# Funciones auxiliares
+#------------------------------------------------------------------------------
+
+# calcula los bytes necesarios para escribir cualquier mensaje cifrado con la clave pública
+def anchoCifrado(pk):
+    return max(1, (sum(pk).bit_length() + 7) // 8)
+
+# convierte una cadena de bytes en una cadena de bits 0/1 (un byte por bit)
+def bytesABits(datos):
+    if len(datos) == 0:
+        return b""
+
+    cadena = bin(int.from_bytes(datos, "big"))[2:].zfill(8 * len(datos))
+
+    return cadena.encode("ascii").translate(ASCII_BITS)
+
+# convierte una cadena de bits 0/1 (un byte por bit) en una cadena de bytes
+def bitsABytes(bits):
+    if len(bits) == 0:
+        return b""
+
+    valor = int(bits.translate(BITS_ASCII), 2)
+
+    return valor.to_bytes(len(bits) // 8, "big")
+
+# lee exactamente num_bytes de la entrada, salvo que se acabe antes
+def leer(entrada, num_bytes):
+    datos = entrada.read(num_bytes)
+
+    # algunos flujos devuelven menos bytes de los pedidos sin haber terminado
+    while 0 < len(datos) < num_bytes:
+        resto = entrada.read(num_bytes - len(datos))
+        if not resto:
+            break
+        datos += resto
+
+    return datos
+
+#------------------------------------------------------------------------------
+# Cifrado
+#------------------------------------------------------------------------------
+
+# genera la cabecera del flujo cifrado
+def generarCabecera(tamano, ancho):
+    return MAGICO + bytes([VERSION]) + tamano.to_bytes(4, "big") + ancho.to_bytes(2, "big")
+
+# cifra un trozo de bits (de longitud múltiplo de tamano) y devuelve los cifrados ya escritos
+def cifrarTrozo(merkle_hellman, bits, ancho):
+    n = merkle_hellman.tamano
+    mensajes = [list(bits[i:i+n]) for i in range(0, len(bits), n)]
+    cifrados = merkle_hellman.cifrar_lote(mensajes)
+
+    return b"".join(s.to_bytes(ancho, "big") for s in cifrados)
+
+# cifra un flujo de bytes, devolviendo el flujo cifrado por trozos
+def cifrarFlujo(merkle_hellman, entrada):
+    n     = merkle_hellman.tamano
+    ancho = anchoCifrado(merkle_hellman.pk)
+
+    yield generarCabecera(n, ancho)
+
+    # n bytes son exactamente 8 bloques, así que cada trozo completo no necesita relleno
+    bytes_trozo = n * BLOQUES_POR_TROZO // 8
+    while True:
+        datos = leer(entrada, bytes_trozo)
+        if len(datos) < bytes_trozo:
+            break
+        yield cifrarTrozo(merkle_hellman, bytesABits(datos), ancho)
+
+    # último trozo : añadimos un 1 y completamos el bloque con ceros
+    bits = bytesABits(datos) + b"\x01"
+    bits += b"\x00" * (-len(bits) % n)
+    yield cifrarTrozo(merkle_hellman, bits, ancho)
+
+# cifra el archivo origen y guarda el resultado en el archivo destino
+def cifrarArchivo(merkle_hellman, origen, destino):
+    with open(origen, "rb") as entrada, open(destino, "wb") as salida:
+        for trozo in cifrarFlujo(merkle_hellman, entrada):
+            salida.write(trozo)
+
+#------------------------------------------------------------------------------
+# Descifrado
+#------------------------------------------------------------------------------
+
+# lee y comprueba la cabecera del flujo cifrado
+def leerCabecera(entrada, tamano):
+    cabecera = leer(entrada, len(MAGICO) + 7)
+
+    if len(cabecera) < len(MAGICO) + 7 or cabecera[:len(MAGICO)] != MAGICO:
+        raise ValueError("el flujo no es un flujo cifrado de Merkle-Hellman")
+    if cabecera[len(MAGICO)] != VERSION:
+        raise ValueError("versión del flujo cifrado no soportada : " + str(cabecera[len(MAGICO)]))
+    if int.from_bytes(cabecera[len(MAGICO)+1:len(MAGICO)+5], "big") != tamano:
+        raise ValueError("el tamaño de bloque del flujo no coincide con el de la clave")
+
+    return int.from_bytes(cabecera[len(MAGICO)+5:], "big")
+
+# descifra un trozo de cifrados y devuelve la cadena de bits resultante
+def descifrarTrozo(merkle_hellman, datos, ancho):
+    if len(datos) % ancho != 0:
+        raise ValueError("el flujo cifrado está truncado")
+
+    cifrados = [int.from_bytes(datos[i:i+ancho], "big") for i in range(0, len(datos), ancho)]
+    mensajes = merkle_hellman.descifrar_lote(cifrados)
+
+    return b"".join(bytes(mensaje) for mensaje in mensajes)
+
+# descifra un flujo cifrado, devolviendo los bytes originales por trozos
+def descifrarFlujo(merkle_hellman, entrada):
+    n     = merkle_hellman.tamano
+    ancho = leerCabecera(entrada, n)
+
+    # retenemos siempre un trozo para poder quitar el relleno del último
+    bits = None
+    while True:
+        datos = leer(entrada, ancho * BLOQUES_POR_TROZO)
+        if len(datos) == 0:
+            break
+        if bits is not None:
+            yield bitsABytes(bits)
+        bits = descifrarTrozo(merkle_hellman, datos, ancho)
+
+    # quitamos los ceros finales y el 1 que marca el final de los datos
+    if bits is None:
+        raise ValueError("el flujo cifrado está truncado")
+    bits = bits.rstrip(b"\x00")
+    if len(bits) == 0 or len(bits) % 8 != 1:
+        raise ValueError("el relleno del flujo cifrado no es válido")
+
+    yield bitsABytes(bits[:-1])
+
+# descifra el archivo origen y guarda el resultado en el archivo destino
+def descifrarArchivo(merkle_hellman, origen, destino):
+    with open(origen, "rb") as entrada, open(destino, "wb") as salida:
+        for trozo in descifrarFlujo(merkle_hellman, entrada):
+            salida.write(trozo)
+
+#------------------------------------------------------------------------------
+# Main
+#------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+
+    print("\nCifrado de flujos con Merkle-Hellman")
+    print()
+
+    # ---------- descomentar para cifrar y descifrar un archivo ----------
+    # tam     = 100
+    # it      = 2
+    # origen  = "datos.bin"
+    # cifrado = "datos.mhf"
+    # destino = "datos_descifrados.bin"
+    # merkle_hellman = iterativo.Merkle_Hellman(tam, it)
+    # cifrarArchivo(merkle_hellman, origen, cifrado)
+    # descifrarArchivo(merkle_hellman, cifrado, destino)
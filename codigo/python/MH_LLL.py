@@ -0,0 +1,577 @@
+# Reducción de retículos LLL y BKZ en Python
+
+# Juan Manuel Mateos Pérez
+
+## Explicación :
+# En este programa implementamos la reducción de bases de retículos que necesitan los ataques de Lagarias y Coster,
+# para poder ejecutarlos sin SageMath. Las filas de la matriz son los vectores de la base y se devuelven reducidas,
+# como hace el método LLL() de las matrices de Sage.
+# Disponemos de los siguientes algoritmos :
+#   - lllExacto   : versión entera de Cohen (algoritmo 2.6.7), en la que todos los cálculos son exactos. Solo calcula
+#                   la ortogonalización de cada fila una vez y después la actualiza, por lo que en Python puro es la
+#                   más rápida para las dimensiones de los notebooks. Necesita filas linealmente independientes.
+#   - lllFlotante : versión de Schnorr-Euchner, que mantiene la base en enteros exactos y calcula la ortogonalización
+#                   de Gram-Schmidt en coma flotante. Recalcula la fila de la ortogonalización en cada paso, pero admite
+#                   filas dependientes, que devuelve como filas nulas al principio (igual que Sage).
+#   - lllAdaptativo : si las entradas de la matriz son pequeñas (como en la base ya reducida de una clave con la fila
+#                   de un mensaje añadida, en MH_Reticulo_Clave.py), reduce con Cohen 2.6.3 y la ortogonalización en
+#                   coma flotante doble, que con entradas pequeñas es más rápida que la exacta, y comprueba el
+#                   resultado; si la comprobación falla, o si las entradas son grandes (como en las matrices iniciales
+#                   de los ataques, en las que la coma flotante no cabe y la exacta es más rápida), usa lllExacto.
+#                   Devuelve el nivel de precisión usado. Si las filas son dependientes solo sirve lllFlotante, que se
+#                   usa sean cuales sean los niveles pedidos, devolviendo como nivel "dependiente".
+#   - lll         : la que se usa por defecto, que aplica lllAdaptativo.
+#   - bkz         : reducción por bloques de Schnorr-Euchner, que parte de una base LLL y busca en cada bloque el
+#                   vector más corto por enumeración. Obtiene bases más reducidas a cambio de más tiempo.
+# Además, planoMasCercano busca con el algoritmo del plano más cercano de Babai un vector del retículo cercano a un
+# objetivo, usando una base ya reducida y su ortogonalización, que se pueden calcular una vez y reutilizar.
+# Cada reducción hecha con lll o lllAdaptativo se cuenta en niveles_usados según el nivel de precisión empleado.
+# Las matrices pueden tener entradas enteras o racionales (Fraction). En el segundo caso se multiplican por el mínimo
+# común múltiplo de los denominadores antes de reducir y se dividen al terminar.
+
+## Ejecución :
+# Este programa no se ejecuta directamente, sino que lo usan MH_Lagarias.py y MH_Coster.py. Para reducir una matriz
+# basta con escribir :
+#     from MH_LLL import lll
+#     matriz_res = lll(matriz)
+
+import math
+from collections import Counter
+from fractions import Fraction
+from operator import mul
+
+# parámetros por defecto de la reducción, los mismos que usa Sage
+DELTA = 0.99
+ETA   = 0.51
+
+# número máximo de pasadas del plano más cercano
+MAX_PASADAS = 64
+
+# niveles de precisión de lllAdaptativo, de menor a mayor, y nivel con el que se indica que las filas eran dependientes
+NIVELES = ("doble", "exacta")
+NIVEL_DEPENDIENTE = "dependiente"
+# bits de la mantisa en coma flotante doble y bits máximos de las entradas con los que se usa, ya que la
+# ortogonalización de una base sin reducir pierde casi el doble de bits que tienen sus entradas
+BITS_DOBLE    = 53
+BITS_ENTRADAS = BITS_DOBLE // 2 - 4
+
+# número de reducciones hechas con cada nivel de precisión
+niveles_usados = Counter()
+
+# error que indica que la precisión de la coma flotante no basta para reducir la matriz
+class PrecisionInsuficiente(ArithmeticError):
+    pass
+
+#------------------------------------------------------------------------------
+# Funciones auxiliares
+#------------------------------------------------------------------------------
+
+# producto escalar de dos vectores
+def producto(u, v):
+    return sum(map(mul, u, v))
+
+# convierte la matriz a enteros, devolviendo la matriz escalada y el factor usado
+def escalarEnteros(matriz):
+    den = 1
+    for fila in matriz:
+        for x in fila:
+            if isinstance(x, Fraction):
+                den = den * x.denominator // math.gcd(den, x.denominator)
+
+    if den == 1:
+        return [[int(x) for x in fila] for fila in matriz], 1
+
+    return [[int(x * den) for x in fila] for fila in matriz], den
+
+# número de bits de la mayor entrada, en valor absoluto, de una matriz de enteros
+def bitsMatriz(base):
+    return max((abs(x) for fila in base for x in fila), default=0).bit_length()
+
+# deshace el escalado de escalarEnteros
+def desescalar(base, den):
+    if den == 1:
+        return base
+
+    return [[Fraction(x, den) for x in fila] for fila in base]
+
+# calcula la ortogonalización de Gram-Schmidt de una base en coma flotante
+# devuelve mu (coeficientes) y r (normas al cuadrado de los vectores ortogonalizados)
+def gramSchmidt(base):
+    d  = len(base)
+    bf = [list(map(float, b)) for b in base]
+    mu = [[0.0] * d for i in range(d)]
+    rk = [[0.0] * d for i in range(d)]
+    r  = [0.0] * d
+
+    for k in range(d):
+        for j in range(k):
+            rk[k][j] = producto(bf[k], bf[j]) - producto(mu[j][:j], rk[k][:j])
+            mu[k][j] = rk[k][j] / r[j]
+        r[k] = producto(bf[k], bf[k]) - producto(mu[k][:k], rk[k][:k])
+
+    return mu, r
+
+#------------------------------------------------------------------------------
+# LLL
+#------------------------------------------------------------------------------
+
+# reduce por LLL las filas de la matriz con el algoritmo más rápido que admita la matriz
+def lll(matriz, delta=DELTA):
+    return lllAdaptativo(matriz, delta)[0]
+
+#------------------------------------------------------------------------------
+# LLL en coma flotante
+#------------------------------------------------------------------------------
+
+# reduce por LLL las filas de la matriz (Schnorr-Euchner)
+def lllFlotante(matriz, delta=DELTA, eta=ETA):
+    base, den = escalarEnteros(matriz)
+    base = lllEntero(base, delta, eta)
+
+    return desescalar(base, den)
+
+# reduce por LLL una base de enteros; las filas nulas que aparezcan se devuelven al principio
+def lllEntero(base, delta=DELTA, eta=ETA, inicio=1):
+    base  = [list(b) for b in base]
+    ceros = []
+
+    # quitamos desde el principio las filas nulas
+    for b in [b for b in base if not any(b)]:
+        ceros.append(b)
+    base = [b for b in base if any(b)]
+
+    d  = len(base)
+    bf = [list(map(float, b)) for b in base]
+    mu = [[0.0] * d for i in range(d)]
+    rk = [[0.0] * d for i in range(d)]
+    r  = [0.0] * d
+
+    # calcula la fila k de Gram-Schmidt a partir de las anteriores
+    def filaGS(k):
+        bk  = bf[k]
+        rkk = rk[k]
+        muk = mu[k]
+        for j in range(k):
+            rkk[j] = producto(bk, bf[j]) - producto(mu[j][:j], rkk[:j])
+            muk[j] = rkk[j] / r[j]
+        r[k] = producto(bk, bk) - producto(muk[:k], rkk[:k])
+
+    if d > 0:
+        filaGS(0)
+
+    # las filas anteriores a inicio se suponen ya reducidas
+    k = 1
+    for i in range(1, min(inicio, d)):
+        filaGS(i)
+        k = i + 1
+
+    while k < d:
+        # reducción de tamaño de la fila k, repitiendo mientras haya cambios
+        while True:
+            filaGS(k)
+            muk = mu[k]
+            cambio = False
+            for j in range(k - 1, -1, -1):
+                if abs(muk[j]) > eta:
+                    x = round(muk[j])
+                    base[k] = [a - x*b for a, b in zip(base[k], base[j])]
+                    muj = mu[j]
+                    for l in range(j):
+                        muk[l] -= x * muj[l]
+                    muk[j] -= x
+                    cambio = True
+            if not cambio:
+                break
+            bf[k] = list(map(float, base[k]))
+
+        # si la fila es combinación de las anteriores, queda nula y la apartamos
+        if not any(base[k]):
+            ceros.append(base.pop(k))
+            bf.pop(k)
+            mu.pop(k)
+            rk.pop(k)
+            r.pop(k)
+            d -= 1
+            for fila in mu:
+                fila.pop(k)
+            for fila in rk:
+                fila.pop(k)
+            k = max(k, 1)
+            continue
+
+        # condición de Lovász
+        if delta * r[k-1] > r[k] + muk[k-1]**2 * r[k-1]:
+            base[k], base[k-1] = base[k-1], base[k]
+            bf[k], bf[k-1]     = bf[k-1], bf[k]
+            k = max(k - 1, 1)
+            if k == 1:
+                filaGS(0)
+        else:
+            k += 1
+
+    return ceros + base
+
+#------------------------------------------------------------------------------
+# LLL exacto
+#------------------------------------------------------------------------------
+
+# reduce por LLL las filas de la matriz con aritmética entera exacta
+def lllExacto(matriz, delta=DELTA):
+    base, den = escalarEnteros(matriz)
+    base = lllEnteroExacto(base, delta)
+
+    return desescalar(base, den)
+
+# reduce por LLL una base de enteros linealmente independiente (Cohen, algoritmo 2.6.7)
+def lllEnteroExacto(base, delta=DELTA):
+    base  = [list(b) for b in base]
+    delta = Fraction(delta).limit_denominator(10**6)
+    p, q  = delta.numerator, delta.denominator
+
+    n   = len(base)
+    D   = [1] + [0] * n                        # D[i+1] = d_i de Cohen para la fila i
+    lam = [[0] * n for i in range(n)]
+
+    # reduce la fila k con la fila l
+    def red(k, l):
+        if 2 * abs(lam[k][l]) > D[l+1]:
+            x = (2 * lam[k][l] + D[l+1]) // (2 * D[l+1])
+            base[k] = [a - x*b for a, b in zip(base[k], base[l])]
+            lam[k][l] -= x * D[l+1]
+            for i in range(l):
+                lam[k][i] -= x * lam[l][i]
+
+    # intercambia las filas k y k-1
+    def swap(k, kmax):
+        base[k], base[k-1] = base[k-1], base[k]
+        for j in range(k - 1):
+            lam[k][j], lam[k-1][j] = lam[k-1][j], lam[k][j]
+        l = lam[k][k-1]
+        B = (D[k-1] * D[k+1] + l*l) // D[k]
+        for i in range(k + 1, kmax + 1):
+            t = lam[i][k]
+            lam[i][k]   = (D[k+1] * lam[i][k-1] - l*t) // D[k]
+            lam[i][k-1] = (B*t + l * lam[i][k]) // D[k+1]
+        D[k] = B
+
+    if n == 0:
+        return []
+
+    D[1] = producto(base[0], base[0])
+    k, kmax = 1, 0
+    while k < n:
+        # añadimos la fila k a la ortogonalización entera
+        if k > kmax:
+            kmax = k
+            for j in range(k + 1):
+                u = producto(base[k], base[j])
+                for i in range(j):
+                    u = (D[i+1] * u - lam[k][i] * lam[j][i]) // D[i]
+                if j < k:
+                    lam[k][j] = u
+                else:
+                    if u == 0:
+                        raise ValueError("las filas de la matriz no son linealmente independientes")
+                    D[k+1] = u
+
+        red(k, k - 1)
+        if q * D[k+1] * D[k-1] < p * D[k]**2 - q * lam[k][k-1]**2:
+            swap(k, kmax)
+            k = max(1, k - 1)
+        else:
+            for l in range(k - 2, -1, -1):
+                red(k, l)
+            k += 1
+
+    return base
+
+#------------------------------------------------------------------------------
+# LLL con precisión adaptativa
+#------------------------------------------------------------------------------
+
+# reduce por LLL las filas de la matriz subiendo de nivel de precisión cuando las comprobaciones numéricas fallan
+# devuelve la matriz reducida y el nivel usado; si no se indican los niveles, se empieza por la coma flotante solo si
+# las entradas caben en ella
+# con filas dependientes se usa siempre lllFlotante y el nivel devuelto es NIVEL_DEPENDIENTE
+def lllAdaptativo(matriz, delta=DELTA, niveles=None):
+    base, den = escalarEnteros(matriz)
+    if niveles is None:
+        niveles = NIVELES if bitsMatriz(base) <= BITS_ENTRADAS else ("exacta",)
+    for nivel in niveles:
+        if nivel not in NIVELES:
+            raise ValueError("nivel de precisión desconocido : " + str(nivel))
+
+    for nivel in niveles:
+        try:
+            if nivel == "exacta":
+                reducida = lllEnteroExacto(base, delta)
+            else:
+                reducida = lllEnteroDoble(base, delta)
+        except PrecisionInsuficiente:
+            continue
+        except ValueError:
+            # filas dependientes : solo las admite la versión de Schnorr-Euchner
+            reducida, nivel = lllEntero(base, delta), NIVEL_DEPENDIENTE
+
+        niveles_usados[nivel] += 1
+        return desescalar(reducida, den), nivel
+
+    raise PrecisionInsuficiente("ningún nivel de precisión ha reducido la matriz : " + ", ".join(niveles))
+
+# reduce por LLL una base de enteros linealmente independiente con la ortogonalización en coma flotante doble,
+# comprobando al final el resultado; solo admite entradas de como mucho BITS_ENTRADAS bits
+def lllEnteroDoble(base, delta=DELTA, eta=ETA):
+    if bitsMatriz(base) > BITS_ENTRADAS:
+        raise PrecisionInsuficiente("las entradas de la matriz no caben en coma flotante doble")
+
+    base = [list(b) for b in base]
+    if len(base) == 0:
+        return base
+
+    reducirDoble(base, delta, eta)
+    if not comprobarReduccion(base, delta, eta):
+        raise PrecisionInsuficiente("la base obtenida no está reducida")
+
+    return base
+
+# calcula la fila k de la ortogonalización de Gram-Schmidt con productos escalares exactos redondeados
+# devuelve la norma al cuadrado de la fila sin ortogonalizar
+def filaDoble(base, mu, rk, r, k):
+    bk, muk = base[k], mu[k]
+    for j in range(k):
+        rk[j]  = float(producto(bk, base[j])) - producto(mu[j][:j], rk[:j])
+        muk[j] = rk[j] / r[j]
+
+    norma = float(producto(bk, bk))
+    r[k]  = norma - producto(muk[:k], rk[:k])
+
+    return norma
+
+# reduce por LLL (Cohen, algoritmo 2.6.3) la base con la ortogonalización en coma flotante doble; lanza
+# PrecisionInsuficiente si las comprobaciones numéricas fallan
+def reducirDoble(base, delta, eta):
+    d = len(base)
+    mu = [[0.0] * d for i in range(d)]
+    rk = [0.0] * d
+    r  = [0.0] * d
+    max_intercambios = 100 * d * d
+
+    # calcula la fila k y comprueba que su norma tiene sentido
+    def fila(k):
+        filaDoble(base, mu, rk, r, k)
+        if not 0.0 < r[k] < math.inf:
+            if not any(base[k]):
+                raise ValueError("las filas de la matriz no son linealmente independientes")
+            raise PrecisionInsuficiente("norma no positiva en la fila " + str(k))
+
+    fila(0)
+    k, kmax, intercambios = 1, 0, 0
+    while k < d:
+        if k > kmax:
+            fila(k)
+            kmax = k
+
+        # reducción de tamaño de la fila k
+        muk = mu[k]
+        for j in range(k - 1, -1, -1):
+            if abs(muk[j]) > eta:
+                x = round(muk[j])
+                base[k] = [a - x*b for a, b in zip(base[k], base[j])]
+                muk[:j] = [a - x*b for a, b in zip(muk[:j], mu[j])]
+                muk[j] -= x
+
+        # condición de Lovász; al intercambiar se actualiza la ortogonalización sin recalcularla
+        m = muk[k-1]
+        B = r[k] + m*m*r[k-1]
+        if delta * r[k-1] > B:
+            muk[k-1] = m * r[k-1] / B
+            r[k]     = r[k-1] * r[k] / B
+            r[k-1]   = B
+            if not 0.0 < r[k] < math.inf:
+                raise PrecisionInsuficiente("norma no positiva en la fila " + str(k))
+
+            base[k], base[k-1] = base[k-1], base[k]
+            mu[k][:k-1], mu[k-1][:k-1] = mu[k-1][:k-1], mu[k][:k-1]
+            nu = muk[k-1]
+            for i in range(k + 1, kmax + 1):
+                mui = mu[i]
+                t = mui[k]
+                mui[k]   = mui[k-1] - m*t
+                mui[k-1] = t + nu*mui[k]
+
+            intercambios += 1
+            if intercambios > max_intercambios:
+                raise PrecisionInsuficiente("demasiados intercambios")
+            k = max(k - 1, 1)
+        else:
+            k += 1
+
+# comprueba, recalculando la ortogonalización desde cero, que la base está reducida por LLL salvo una pequeña holgura
+def comprobarReduccion(base, delta, eta):
+    d = len(base)
+    holgura = 0.01
+    mu = [[0.0] * d for i in range(d)]
+    rk = [0.0] * d
+    r  = [0.0] * d
+
+    for k in range(d):
+        filaDoble(base, mu, rk, r, k)
+        if not r[k] > 0:
+            return False
+        if k > 0:
+            if any(abs(x) > eta + holgura for x in mu[k][:k]):
+                return False
+            if (delta - holgura) * r[k-1] > r[k] + mu[k][k-1]**2 * r[k-1]:
+                return False
+
+    return True
+
+#------------------------------------------------------------------------------
+# BKZ
+#------------------------------------------------------------------------------
+
+# busca por enumeración el vector más corto del bloque [ini, fin] proyectado
+# devuelve sus coeficientes respecto de las filas del bloque, o None si no mejora la primera
+def enumerar(mu, r, ini, fin):
+    n = fin - ini + 1
+    x = [0] * n
+    mejor = [r[ini] * 0.999, None]
+
+    def buscar(i, parcial):
+        c   = -sum(x[t] * mu[ini+t][ini+i] for t in range(i + 1, n))
+        rii = r[ini+i]
+        radio = math.sqrt(max(mejor[0] - parcial, 0.0) / rii)
+
+        # si todos los coeficientes superiores son nulos, basta con los positivos (simetría)
+        inf = math.ceil(c - radio)
+        if not any(x[i+1:]):
+            inf = max(inf, 0)
+        candidatos = sorted(range(inf, math.floor(c + radio) + 1), key=lambda v: abs(v - c))
+
+        for v in candidatos:
+            l = parcial + (v - c)**2 * rii
+            if l >= mejor[0]:
+                break
+            x[i] = v
+            if i == 0:
+                if any(x):
+                    mejor[0] = l
+                    mejor[1] = x[:]
+            else:
+                buscar(i - 1, l)
+        x[i] = 0
+
+    buscar(n - 1, 0.0)
+
+    return mejor[1]
+
+# inserta en la posición ini la combinación de las filas ini..fin dada por los coeficientes, manteniendo una base
+def insertar(base, coef, ini):
+    coef = list(coef)
+
+    # combinamos las filas dos a dos con matrices unimodulares hasta dejar el vector en la fila ini
+    for i in range(len(coef) - 1, 0, -1):
+        a, b = coef[i-1], coef[i]
+        if b == 0:
+            continue
+        if a == 0:
+            base[ini+i-1], base[ini+i] = base[ini+i], base[ini+i-1]
+            coef[i-1], coef[i] = b, 0
+            continue
+
+        g = math.gcd(a, b)
+        a, b = a // g, b // g
+        # buscamos p y q con p*a + q*b = 1
+        p = 1
+        if abs(b) > 1:
+            p = pow(a, -1, abs(b))
+        q = (1 - p*a) // b
+        u = [a*y + b*z for y, z in zip(base[ini+i-1], base[ini+i])]
+        w = [-q*y + p*z for y, z in zip(base[ini+i-1], base[ini+i])]
+        base[ini+i-1], base[ini+i] = u, w
+        coef[i-1], coef[i] = g, 0
+
+    if coef[0] < 0:
+        base[ini] = [-y for y in base[ini]]
+
+# reduce por BKZ con bloques de tamaño beta las filas de la matriz
+def bkz(matriz, beta=10, delta=DELTA, max_vueltas=20):
+    base, den = escalarEnteros(matriz)
+    try:
+        base = lllEnteroExacto(base, delta)
+    except ValueError:
+        base = lllEntero(base, delta)
+
+    # las filas nulas no participan en los bloques
+    ceros = [b for b in base if not any(b)]
+    base  = [b for b in base if any(b)]
+    d     = len(base)
+
+    vueltas = 0
+    sin_mejora, j = 0, -1
+    while sin_mejora < d - 1 and vueltas < max_vueltas:
+        j = (j + 1) % (d - 1)
+        if j == 0:
+            vueltas += 1
+        fin = min(j + beta - 1, d - 1)
+
+        mu, r = gramSchmidt(base)
+        coef  = enumerar(mu, r, j, fin)
+
+        if coef is None:
+            sin_mejora += 1
+        else:
+            sin_mejora = 0
+            insertar(base, coef, j)
+            base = lllEnteroExacto(base, delta)
+
+    return desescalar(ceros + base, den)
+
+#------------------------------------------------------------------------------
+# Plano más cercano
+#------------------------------------------------------------------------------
+
+# calcula en coma flotante los vectores ortogonalizados de Gram-Schmidt de una base y sus normas al cuadrado
+def ortogonalizar(base):
+    mu, r = gramSchmidt(base)
+    ortogonal = []
+
+    for k, b in enumerate(base):
+        v = list(map(float, b))
+        for j in range(k):
+            if mu[k][j] != 0:
+                v = [x - mu[k][j] * y for x, y in zip(v, ortogonal[j])]
+        ortogonal.append(v)
+
+    return ortogonal, r
+
+# busca un vector del retículo de la base (entera y reducida) cercano al objetivo por el plano más cercano de Babai
+# los coeficientes se redondean en coma flotante, por lo que con objetivos muy grandes solo los primeros bits son
+# correctos; se repite con la diferencia exacta hasta que ningún coeficiente cambia, ganando unos 50 bits en cada pasada
+# si el retículo no tiene dimensión completa y se indica el vector normal al hiperplano que genera, la diferencia se
+# proyecta de forma exacta sobre el hiperplano antes de pasarla a coma flotante
+def planoMasCercano(base, ortogonal, r, objetivo, normal=None, max_pasadas=MAX_PASADAS):
+    vector = [0] * len(objetivo)
+    if normal is not None:
+        norma = producto(normal, normal)
+
+    for pasada in range(max_pasadas):
+        dif = [t - v for t, v in zip(objetivo, vector)]
+        if normal is None:
+            df = list(map(float, dif))
+        else:
+            num = producto(dif, normal)
+            df  = [(d * norma - num * c) / norma for d, c in zip(dif, normal)]
+
+        cambio = False
+        for j in range(len(base) - 1, -1, -1):
+            c = round(producto(df, ortogonal[j]) / r[j])
+            if c != 0:
+                cambio = True
+                df     = [x - c * y for x, y in zip(df, base[j])]
+                vector = [x + c * y for x, y in zip(vector, base[j])]
+
+        if not cambio:
+            break
+
+    return vector
@@ -0,0 +1,288 @@
+# Ataque de Lagarias al criptosistema de Merkle-Hellman
+
+# Juan Manuel Mateos Pérez
+
+## Explicación :
+# En este programa simulamos el ataque mediante el método de Lagarias a una comunicación realizada usando el
+# criptosistema de Merkle-Hellman, igual que en jupyter/Lagarias.ipynb, pero en Python y sin usar SageMath. La
+# reducción LLL de la matriz la realizamos con MH_LLL.py. El ataque utiliza únicamente los valores conocidos del
+# criptosistema, que son la clave pública y el mensaje cifrado. El programa obtiene como resultado un mensaje
+# descifrado, el cual comprobaremos si coincide con el original.
+
+## Ejecución :
+# Para ejecutar el programa, solo debemos descomentar el código del main que queramos utilizar:
+# (1) Si descomentamos la primera parte, podremos ejecutar el programa 1 vez y veremos todos los datos necesarios. Además,
+# podemos modificar el tamaño del mensaje (variable tam) y el número de iteraciones de la clave privada (variable it).
+# (2) Si por otro lado descomentamos la segunda parte, el programa se ejecuta p veces y mostrará un desglose de fallos,
+# vacios y errores de longitud cometidos. En este caso podemos modificar la variable p, que indica la cantidad de cripto-
+# sistemas que se van a ejecutar.
+
+import math
+import random
+from itertools import islice
+
+from MH_LLL import lll
+from MH_Modulos import iterativo
+
+# intercambio de los 0 por 1 y viceversa; el resto de valores se mantiene
+CAMBIO = {0: 1, 1: 0}
+
+#------------------------------------------------------------------------------
+# Ataque de Lagarias
+#------------------------------------------------------------------------------
+
+# genera la matriz necesaria para aplicar Lagarias
+# paso == 0 indica generar la matriz inicial, paso != 0 indica generar la matriz del caso 4
+def generarMatriz(pk, s, paso):
+    n = len(pk)
+    filas = []
+
+    # generamos los n primeros vectores
+    for i in range(0, n):
+        aux = [0] * (n+1)
+        aux[i] = 1
+        aux[n] = pk[i]*(-1)
+        filas.append(aux)
+
+    # generamos el vector n+1
+    b = [0] * (n+1)
+    if paso == 0:
+        b[n] = s
+    else:
+        b[n] = sum(pk) - s
+    filas.append(b)
+
+    return filas
+
+# encuentra una solución en la matriz recibida, recorriendo cada fila elemento a elemento como en el notebook
+# se mantiene como referencia de buscarSolucion
+def buscarSolucionFilas(matriz, pk, s):
+    n = len(matriz)
+    sol_encontrada = False
+    solucion = []
+
+    # compruebo si alguna fila es solución sin aplicar nada
+    for j in range(n):
+        if sol_encontrada == False:
+            suma = 0
+            fila = matriz[j]
+
+            for i in range(len(fila)-1):
+                aux = fila[i]
+                if fila[i] < 0:
+                    aux = 0
+                suma += pk[i]*aux
+            if suma == s:
+                sol_encontrada = True
+                solucion = fila[:-1]
+
+    # compruebo si alguna fila es solución tras dividir por un lambda fijo
+    if sol_encontrada == False:
+        for j in range(n):
+            if sol_encontrada == False:
+                suma = 0
+                fila = matriz[j]
+                den  = 1
+                den_encontrado = False
+
+                for i in range(len(fila)-1):
+                    if fila[i] > 0 and den_encontrado == False:
+                        den = fila[i]
+                        den_encontrado = True
+                    aux = fila[i] // den
+                    if aux < 0:
+                        aux = 0
+                    suma += pk[i]*aux
+                    solucion.append(aux)
+                if suma == s:
+                    sol_encontrada = True
+                else:
+                    solucion = []
+
+    solucion = list(solucion)
+    return solucion
+
+# intercambia los 0 por 1 y viceversa en una matriz
+def cambiarMatriz(matriz):
+    matriz_res = [list(fila) for fila in matriz]
+
+    for i in range(len(matriz)):
+        for j in range(len(matriz[i])-1):
+            if matriz[i][j] == 0:
+                matriz_res[i][j] = 1
+            elif matriz[i][j] == 1:
+                matriz_res[i][j] = 0
+
+    return matriz_res
+
+# encuentra una solución en la matriz recibida, con el mismo resultado que buscarSolucionFilas
+# cada fila se comprueba con una sola comprensión que solo multiplica los elementos positivos, ya que el resto se
+# toman como 0; con cambiar=True se comprueban las filas con los 0 y 1 intercambiados sin construirlas: un 0 pasa a
+# contar como 1 y un 1 deja de contar, por lo que no hace falta copiar la matriz ni las filas
+def buscarSolucion(matriz, pk, s, cambiar=False):
+    n = len(pk)
+
+    # compruebo si alguna fila es solución sin aplicar nada
+    for fila in matriz:
+        if cambiar:
+            suma = sum([p if x == 0 else p*x for p, x in zip(pk, fila) if x == 0 or x > 1])
+        else:
+            suma = sum([p*x for p, x in zip(pk, fila) if x > 0])
+        if suma == s:
+            return [CAMBIO.get(x, x) for x in fila[:n]] if cambiar else list(fila[:n])
+
+    # compruebo si alguna fila es solución tras dividir por su primer elemento positivo
+    # si es 1, la fila es la misma que antes y ya sabemos que no es solución
+    for fila in matriz:
+        if cambiar:
+            den = next((1 if x == 0 else x for x in islice(fila, n) if x == 0 or x > 1), 1)
+        else:
+            den = next((x for x in islice(fila, n) if x > 0), 1)
+
+        if den != 1:
+            if cambiar:
+                fila = [CAMBIO.get(x, x) for x in fila[:n]]
+            aux = [x // den if x > 0 else 0 for x in islice(fila, n)]
+            if sum([p*x for p, x in zip(pk, aux) if x > 0]) == s:
+                return aux
+
+    return []
+
+# busca una solución en la matriz y, si no la hay, en la matriz con los 0 y 1 intercambiados
+def extraerSolucion(matriz, pk, s):
+    solucion = buscarSolucion(matriz, pk, s)
+    if len(solucion) == 0:
+        solucion = buscarSolucion(matriz, pk, s, cambiar=True)
+
+    return solucion
+
+# aplica una de las dos matrices del ataque de Lagarias (paso 0 la inicial, paso 1 la del caso 4)
+def ataqueLagariasPaso(pk, s, paso):
+    # generamos la matriz
+    matriz_ini = generarMatriz(pk, s, paso)
+    # aplicamos LLL
+    matriz_res = lll(matriz_ini)
+    # buscamos una solución, también con los 0 por 1 y viceversa
+    return extraerSolucion(matriz_res, pk, s)
+
+# aplica el ataque de Lagarias
+def ataqueLagarias(pk, s):
+    solucion = ataqueLagariasPaso(pk, s, 0)
+
+    # caso 4 del algoritmo
+    if len(solucion) == 0:
+        solucion = ataqueLagariasPaso(pk, s, 1)
+
+    return solucion
+
+# calcula el número de errores cometidos
+def comprobarErrores(men_orig, men_obt):
+    n = len(men_orig)
+    vector_dif = []
+
+    if len(men_obt) == 0:
+        return len(men_orig)
+
+    for i in range(0, n):
+        vector_dif.append(abs(men_orig[i] - men_obt[i]))
+
+    return sum(vector_dif)
+
+# clasifica el mensaje obtenido por un ataque, devolviendo el resultado y el número de errores
+def clasificarResultado(men_orig, men_obt):
+    if len(men_obt) == 0:
+        return "vacio", len(men_orig)
+    if len(men_obt) != len(men_orig):
+        return "error longitud", len(men_orig)
+
+    valor = comprobarErrores(men_orig, men_obt)
+    if valor != 0:
+        return "error valor", valor
+    return "obtenido", 0
+
+# calcula la densidad de una clave pública
+def densidad(pk):
+    return len(pk) / math.log2(max(pk))
+
+#------------------------------------------------------------------------------
+# Datos de salida
+#------------------------------------------------------------------------------
+
+# ejecuta y muestra los datos tras aplicar una iteración
+def unaIteracion(tam, it):
+    merkle_hellman = iterativo.Merkle_Hellman(tam, it)
+    merkle_hellman.do()
+
+    pk = merkle_hellman.pk
+    s  = merkle_hellman.s
+
+    lagarias = ataqueLagarias(pk, s)
+
+    print()
+    print("Clave pública      :", merkle_hellman.pk)
+    print("Mensaje original   :", merkle_hellman.mensaje)
+    print("Mensaje cifrado    :", merkle_hellman.s)
+    print("Mensaje descifrado :", lagarias)
+    print("Tamaño mensaje     :", tam)
+    print("Número iteraciones :", it)
+    print("Errores totales    :", comprobarErrores(merkle_hellman.mensaje, lagarias))
+
+# ejecuta y muestra los datos tras aplicar p iteraciones
+def variasIteraciones(p):
+    errores  = 0
+    err_long = 0
+    vacios   = 0
+
+    print()
+    print("Iteración \t Tamaño vector \t Número Iteraciones \t Densidad \t\tResultado")
+
+    for i in range(p):
+        print(i+1, end = "")
+
+        tam = random.randint(3, 100)
+        print("\t\t", tam, end="")
+
+        it = random.randint(0, 3)
+        print("\t\t", it, end="")
+
+        merkle_hellman = iterativo.Merkle_Hellman(tam, it)
+        merkle_hellman.do()
+
+        print("\t\t\t", densidad(merkle_hellman.pk), end="")
+
+        lagarias = ataqueLagarias(merkle_hellman.pk, merkle_hellman.s)
+        if len(lagarias) == 0:
+            vacios += 1
+            print("\tvacio")
+        elif len(lagarias) != len(merkle_hellman.mensaje):
+            err_long += 1
+            print("\terror longitud")
+        else:
+            valor = comprobarErrores(merkle_hellman.mensaje, lagarias)
+            errores += valor
+            if valor != 0:
+                print("\terror valor")
+            else:
+                print("\tobtenido")
+
+    print("\nErrores totales  tras", p, "iteraciones :", errores)
+    print("Vacios  totales  tras", p, "iteraciones :", vacios)
+    print("Errores longitud tras", p, "iteraciones :", err_long)
+
+#------------------------------------------------------------------------------
+# Main
+#------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+
+    print("\nAtaque de Lagarias")
+    print()
+
+    # ---------- descomentar para realizar 1 ejecución aleatoria ----------
+    # tam = random.randint(3, 100)
+    # it  = random.randint(0, 3)
+    # unaIteracion(tam, it)
+
+    # ---------- descomentar para realizar p ejecuciones aleatorias ----------
+    # p = 10
+    # variasIteraciones(p)
@@ -0,0 +1,36 @@
+# Carga de los módulos del criptosistema de Merkle-Hellman
+
+# Juan Manuel Mateos Pérez
+
+## Explicación :
+# Los archivos del criptosistema (Merkle-Hellman_basico.py y Merkle-Hellman_iterativo.py) tienen un guion en su nombre, 
+# por lo que no pueden importarse con la orden import de Python. Este programa los carga a partir de su ruta para que
+# el resto de programas del directorio puedan usar sus clases.
+
+## Ejecución :
+# Este programa no se ejecuta directamente. Basta con escribir en otro programa del mismo directorio :
+#     from MH_Modulos import basico, iterativo
+# y usar basico.Merkle_Hellman o iterativo.Merkle_Hellman.
+
+import importlib.util
+import os
+import sys
+
+# carga un módulo de este directorio a partir del nombre de su archivo
+def cargarModulo(archivo):
+    ruta   = os.path.join(os.path.dirname(os.path.abspath(__file__)), archivo)
+    nombre = os.path.splitext(archivo)[0].replace("-", "_")
+
+    # si ya se ha cargado, reutilizamos el mismo módulo
+    if nombre in sys.modules:
+        return sys.modules[nombre]
+
+    spec   = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[nombre] = modulo
+    spec.loader.exec_module(modulo)
+
+    return modulo
+
+basico    = cargarModulo("Merkle-Hellman_basico.py")
+iterativo = cargarModulo("Merkle-Hellman_iterativo.py")
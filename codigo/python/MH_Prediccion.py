@@ -0,0 +1,196 @@
+# Predicción del resultado y del coste de los ataques al criptosistema de Merkle-Hellman
+
+# Juan Manuel Mateos Pérez
+
+## Explicación :
+# En este programa analizamos una clave pública antes de atacarla, usando únicamente la propia clave, para decidir si
+# merece la pena aplicar la reducción LLL. A partir de la clave calculamos :
+#   - la densidad n / log2(max(pk)), de la que depende el éxito de los ataques de Lagarias y Coster.
+#   - el perfil de longitudes en bits de sus elementos (mínima, media y máxima).
+#   - algunas pistas de estructura modular: el máximo común divisor de todos los elementos y la proporción de pares.
+# Con los datos ya guardados por MH_Campana.py (tabla de ensayos) y MH_Barrido.py (base de datos de densidades),
+# estimamos la probabilidad de éxito de cada ataque según la densidad de la clave, y ajustamos el tiempo del ataque
+# como t = a * n^b por mínimos cuadrados sobre los logaritmos. Si no hay datos suficientes se usan los límites teóricos
+# de densidad de cada ataque (0.6463 para Lagarias y 0.9408 para Coster) y los tiempos medidos con MH_Benchmark.py.
+# Con esto se decide qué hacer con cada clave :
+#   - lll    : algún ataque tiene una probabilidad de éxito suficiente; se aplica el más probable.
+#   - bkz    : ninguno llega, pero la densidad es menor que 1 y puede merecer la pena una reducción más fuerte.
+#   - saltar : la densidad es mayor que 1, por lo que suele haber varias soluciones y el ataque no tiene sentido.
+
+## Ejecución :
+# Para ejecutar el programa, solo debemos descomentar el código del main que queramos utilizar:
+# (1) Si descomentamos la primera parte, se generan claves aleatorias y se muestra para cada una su análisis, la
+# decisión y el tiempo previsto, junto al resultado y al tiempo real del ataque elegido. Podemos modificar la cantidad
+# de claves (variable p) y los archivos de datos de MH_Campana.py y MH_Barrido.py (variables tabla y bd, que pueden
+# no existir).
+
+import math
+import os
+import random
+import sqlite3
+import time
+
+from MH_Campana import leerTabla
+from MH_Coster import ataqueCoster
+from MH_LLL import bkz
+from MH_Lagarias import ataqueLagarias, densidad, extraerSolucion, generarMatriz
+from MH_Modulos import iterativo
+
+# densidades límite teóricas por debajo de las cuales los ataques funcionan casi siempre
+LIMITES = {"lagarias": 0.6463, "coster": 0.9408}
+
+# tiempo por defecto del ataque, t = a * n^b segundos, ajustado a las medidas de MH_Benchmark.py
+COSTE_DEFECTO = {"lagarias": (2.4e-6, 2.9), "coster": (2.8e-6, 2.9)}
+
+# ancho del intervalo de densidad alrededor de la clave en el que se buscan datos y datos mínimos para usarlos
+ANCHO_DENSIDAD = 0.05
+MIN_DATOS      = 5
+
+# probabilidad mínima de éxito para aplicar el ataque con LLL
+UMBRAL = 0.5
+
+#------------------------------------------------------------------------------
+# Análisis de la clave
+#------------------------------------------------------------------------------
+
+# calcula estadísticas de la clave pública que no requieren reducir ningún retículo
+def analizarClave(pk):
+    bits = [a.bit_length() for a in pk]
+
+    return {
+        "tamano"   : len(pk),
+        "densidad" : densidad(pk),
+        "bits_min" : min(bits),
+        "bits_med" : sum(bits) / len(bits),
+        "bits_max" : max(bits),
+        "mcd"      : math.gcd(*pk),
+        "pares"    : sum(1 for a in pk if a % 2 == 0) / len(pk),
+    }
+
+#------------------------------------------------------------------------------
+# Clase Predictor
+#------------------------------------------------------------------------------
+
+class Predictor:
+    # constructor; tabla es el archivo de MH_Campana.py y bd el de MH_Barrido.py, ambos opcionales
+    def __init__(self, tabla=None, bd=None):
+        # datos como listas de (tamaño, densidad, éxito, tiempo) por ataque
+        self.datos = {"lagarias": [], "coster": []}
+
+        if tabla is not None and os.path.exists(tabla):
+            for fila in leerTabla(tabla):
+                self.datos[fila["ataque"]].append((fila["tamano"], fila["densidad"], fila["resultado"] == "obtenido",
+                                                   fila["tiempo"]))
+
+        if bd is not None and os.path.exists(bd):
+            conexion = sqlite3.connect(bd)
+            for tam, dens, obtenido, tiempo in conexion.execute("SELECT tam, densidad, obtenido, tiempo FROM intentos"):
+                self.datos["coster"].append((tam, dens, obtenido == 1, tiempo))
+            conexion.close()
+
+        self.costes = {ataque: self.__ajustarCoste(ataque) for ataque in self.datos}
+
+    # ajusta t = a * n^b por mínimos cuadrados sobre log(t) = log(a) + b*log(n)
+    def __ajustarCoste(self, ataque):
+        puntos = [(math.log(tam), math.log(tiempo)) for tam, dens, exito, tiempo in self.datos[ataque] if tiempo > 0]
+        if len(puntos) < MIN_DATOS or len({x for x, y in puntos}) < 2:
+            return COSTE_DEFECTO[ataque]
+
+        media_x = sum(x for x, y in puntos) / len(puntos)
+        media_y = sum(y for x, y in puntos) / len(puntos)
+        b = sum((x - media_x) * (y - media_y) for x, y in puntos) / sum((x - media_x)**2 for x, y in puntos)
+
+        return math.exp(media_y - b * media_x), b
+
+    # probabilidad estimada de éxito de un ataque para una densidad
+    def probabilidad(self, ataque, dens):
+        cercanos = [exito for tam, d, exito, tiempo in self.datos[ataque] if abs(d - dens) <= ANCHO_DENSIDAD]
+
+        if len(cercanos) < MIN_DATOS:
+            return 0.9 if dens < LIMITES[ataque] else 0.1
+        return (sum(cercanos) + 1) / (len(cercanos) + 2)
+
+    # tiempo previsto del ataque, en segundos
+    def tiempo(self, ataque, tamano):
+        a, b = self.costes[ataque]
+
+        return a * tamano**b
+
+    # analiza la clave y decide qué hacer con ella, devolviendo un diccionario con el análisis y la decisión
+    def predecir(self, pk):
+        prediccion = analizarClave(pk)
+        dens = prediccion["densidad"]
+
+        for ataque in self.datos:
+            prediccion["prob_" + ataque]   = self.probabilidad(ataque, dens)
+            prediccion["tiempo_" + ataque] = self.tiempo(ataque, len(pk))
+
+        mejor = max(self.datos, key=lambda ataque: prediccion["prob_" + ataque])
+        if prediccion["prob_" + mejor] >= UMBRAL:
+            prediccion["decision"] = "lll"
+            prediccion["ataque"]   = mejor
+        elif dens < 1:
+            prediccion["decision"] = "bkz"
+            prediccion["ataque"]   = "lagarias"
+        else:
+            prediccion["decision"] = "saltar"
+            prediccion["ataque"]   = None
+
+        return prediccion
+
+    # ataca la clave según la decisión del predictor, devolviendo la solución y la predicción
+    def atacar(self, pk, s, beta=10):
+        prediccion = self.predecir(pk)
+
+        if prediccion["decision"] == "saltar":
+            solucion = []
+        elif prediccion["decision"] == "bkz":
+            solucion = extraerSolucion(bkz(generarMatriz(pk, s, 0), beta), pk, s)
+        elif prediccion["ataque"] == "lagarias":
+            solucion = ataqueLagarias(pk, s)
+        else:
+            solucion = ataqueCoster(pk, s)
+
+        return solucion, prediccion
+
+#------------------------------------------------------------------------------
+# Datos de salida
+#------------------------------------------------------------------------------
+
+# genera p claves aleatorias y compara la predicción con el resultado real
+def probarPredictor(p, tabla, bd):
+    predictor = Predictor(tabla, bd)
+
+    print("Tamaño \t Densidad \t Bits máx \t Decisión \t Ataque \t Prob. \t Previsto (s) \t Real (s) \t Resultado")
+
+    for i in range(p):
+        merkle_hellman = iterativo.Merkle_Hellman(random.randint(3, 100), random.randint(0, 3))
+        merkle_hellman.do()
+
+        inicio = time.perf_counter()
+        solucion, prediccion = predictor.atacar(merkle_hellman.pk, merkle_hellman.s)
+        real = time.perf_counter() - inicio
+
+        ataque   = prediccion["ataque"]
+        prob     = round(prediccion["prob_" + ataque], 2) if ataque is not None else "-"
+        previsto = round(prediccion["tiempo_" + ataque], 3) if ataque is not None else "-"
+        print(prediccion["tamano"], "\t\t", round(prediccion["densidad"], 3), "\t\t", prediccion["bits_max"], "\t\t",
+              prediccion["decision"], "\t\t", ataque, "\t", prob, "\t", previsto, "\t\t", round(real, 3), "\t\t",
+              "obtenido" if solucion == merkle_hellman.mensaje else "fallo")
+
+    print()
+
+#------------------------------------------------------------------------------
+# Main
+#------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+
+    print("\nPredicción de los ataques a Merkle-Hellman")
+    print()
+
+    # ---------- descomentar para probar el predictor con claves aleatorias ----------
+    # p     = 10
+    # tabla = "campana_lagarias.tsv"
+    # bd    = "barrido.db"
+    # probarPredictor(p, tabla, bd)
@@ -0,0 +1,282 @@
+# Registro de claves privadas de Merkle-Hellman con caché de descifrado
+
+# Juan Manuel Mateos Pérez
+
+## Explicación :
+# En este programa mantenemos un registro de claves privadas (básicas o iteradas) de varios usuarios, identificadas
+# cada una por un identificador. Las claves se guardan en disco con el formato de MH_Serializacion.py, y en memoria se
+# mantiene solo una caché con el contexto de descifrado (Contexto_Descifrado, con la cadena de módulos e inversos y la
+# sucesión ya preparadas) de las claves usadas más recientemente (LRU).
+# Al descifrar con una clave que está en la caché (acierto) se usa directamente su contexto; si no está (fallo), se
+# carga del disco, se prepara su contexto y se añade a la caché, expulsando los menos usados recientemente cuando se
+# supera el número máximo de claves o de bytes indicado. Así, las claves más usadas descifran siempre a la velocidad
+# del contexto ya preparado y las demás solo ocupan espacio en disco.
+# El registro se puede usar a la vez desde varios hilos: la caché está protegida por un cerrojo y, si varios hilos
+# piden a la vez una clave que no está, solo uno la carga y los demás esperan a que termine. Cada clave tiene además
+# un número de generación que aumenta al registrarla o eliminarla; si cambia mientras se carga, el contexto cargado
+# puede ser de la clave antigua y no se añade a la caché.
+# Se cuentan los aciertos, los fallos y las expulsiones de la caché.
+
+## Ejecución :
+# Para ejecutar el programa, solo debemos descomentar el código del main que queramos utilizar:
+# (1) Si descomentamos la primera parte, se registran num_claves claves y se descifran mensajes desde varios hilos,
+# usando unas pocas claves mucho más que el resto, y se compara el tiempo con el de cargar la clave para cada mensaje.
+# Podemos modificar el número de claves (variable num_claves), el tamaño del mensaje (variable tam), el número de
+# iteraciones (variable it), el tamaño de la caché (variable max_claves), el número de mensajes (variable num_men), el
+# número de hilos (variable hilos) y la carpeta donde se guardan las claves (variable carpeta).
+
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from MH_Modulos import iterativo
+from MH_Serializacion import cargarClavePrivada, serializarClavePrivada
+
+# extensión de los archivos de clave y de los archivos a medio escribir
+EXTENSION = ".mhs"
+TEMPORAL  = ".tmp"
+
+#------------------------------------------------------------------------------
+# Funciones auxiliares
+#------------------------------------------------------------------------------
+
+# prepara el contexto de descifrado de una clave privada básica o iterada
+def prepararContexto(sk, rapido=False):
+    if isinstance(sk[0], int):
+        sk = [sk]
+
+    return iterativo.Contexto_Descifrado(sk, rapido)
+
+# calcula aproximadamente los bytes que ocupa un contexto de descifrado
+def tamanoContexto(contexto):
+    total = sum(sys.getsizeof(a) for a in contexto.sucesion)
+    total += sum(sys.getsizeof(m) + sys.getsizeof(mult) for m, mult in contexto.cadena)
+
+    if contexto.tablas is not None:
+        total += sum(sys.getsizeof(v) for ini, fin, tabla, bits in contexto.tablas for v in tabla)
+
+    return total
+
+#------------------------------------------------------------------------------
+# Clase Registro_Claves
+#------------------------------------------------------------------------------
+
+class Registro_Claves:
+    # constructor; la caché guarda como mucho max_claves contextos y, si se indica, max_bytes bytes
+    def __init__(self, carpeta, max_claves=128, max_bytes=None, rapido=False):
+        self.carpeta    = carpeta
+        self.max_claves = max_claves
+        self.max_bytes  = max_bytes
+        self.rapido     = rapido
+        self.cache      = OrderedDict()
+        self.bytes      = 0
+        self.cargando   = {}
+        self.generaciones = {}
+        self.cerrojo    = threading.Lock()
+        self.aciertos   = 0
+        self.fallos     = 0
+        self.expulsiones = 0
+
+        os.makedirs(carpeta, exist_ok=True)
+
+    # archivo de una clave, comprobando que el identificador no sale de la carpeta
+    def __archivo(self, clave):
+        if not isinstance(clave, str) or not re.fullmatch(r"[A-Za-z0-9_-]+", clave):
+            raise ValueError("identificador de clave no válido : " + str(clave))
+
+        return os.path.join(self.carpeta, clave + EXTENSION)
+
+    # guarda una clave privada y devuelve su identificador
+    def registrar(self, sk, clave=None):
+        if clave is None:
+            clave = uuid.uuid4().hex
+        archivo = self.__archivo(clave)
+
+        # se escribe en un archivo temporal y se renombra, para que nunca se lea a medio escribir
+        with open(archivo + TEMPORAL, "wb") as f:
+            f.write(serializarClavePrivada(sk))
+        os.replace(archivo + TEMPORAL, archivo)
+
+        # si la clave ya estaba en la caché, su contexto ya no es válido
+        with self.cerrojo:
+            self.__quitar(clave)
+            self.__nuevaGeneracion(clave)
+
+        return clave
+
+    # elimina una clave del registro y de la caché
+    def eliminar(self, clave):
+        archivo = self.__archivo(clave)
+
+        # primero se borra el archivo, para que una carga que empiece después de cambiar la generación no lo lea
+        if os.path.exists(archivo):
+            os.remove(archivo)
+        with self.cerrojo:
+            self.__quitar(clave)
+            self.__nuevaGeneracion(clave)
+
+    # indica si una clave está registrada
+    def existe(self, clave):
+        return os.path.exists(self.__archivo(clave))
+
+    # aumenta la generación de una clave, para que no se guarde un contexto que se estaba cargando; se llama con el
+    # cerrojo tomado
+    def __nuevaGeneracion(self, clave):
+        self.generaciones[clave] = self.generaciones.get(clave, 0) + 1
+
+    # quita una clave de la caché; se llama con el cerrojo tomado
+    def __quitar(self, clave):
+        entrada = self.cache.pop(clave, None)
+        if entrada is not None:
+            self.bytes -= entrada[1]
+
+    # añade un contexto a la caché y expulsa los menos usados si se supera el límite; se llama con el cerrojo tomado
+    def __anadir(self, clave, contexto, tamano):
+        self.cache[clave] = (contexto, tamano)
+        self.bytes += tamano
+
+        while len(self.cache) > 1 and (len(self.cache) > self.max_claves or
+                                       (self.max_bytes is not None and self.bytes > self.max_bytes)):
+            _, (_, tamano_expulsado) = self.cache.popitem(last=False)
+            self.bytes -= tamano_expulsado
+            self.expulsiones += 1
+
+    # devuelve el contexto de descifrado de una clave, cargándolo del disco si no está en la caché
+    def contexto(self, clave):
+        archivo = self.__archivo(clave)
+
+        while True:
+            with self.cerrojo:
+                entrada = self.cache.get(clave)
+                if entrada is not None:
+                    self.cache.move_to_end(clave)
+                    self.aciertos += 1
+                    return entrada[0]
+
+                # si otro hilo ya la está cargando, esperamos a que termine y volvemos a mirar la caché
+                evento = self.cargando.get(clave)
+                if evento is None:
+                    evento = threading.Event()
+                    self.cargando[clave] = evento
+                    self.fallos += 1
+                    generacion = self.generaciones.get(clave, 0)
+                    break
+
+            evento.wait()
+
+        # la carga y la preparación del contexto se hacen sin el cerrojo, para no bloquear al resto de claves
+        try:
+            contexto = prepararContexto(cargarClavePrivada(archivo), self.rapido)
+            tamano = tamanoContexto(contexto)
+
+            # si la clave se ha registrado de nuevo o eliminado durante la carga, el contexto no se guarda
+            with self.cerrojo:
+                if self.generaciones.get(clave, 0) == generacion:
+                    self.__anadir(clave, contexto, tamano)
+        finally:
+            with self.cerrojo:
+                del self.cargando[clave]
+            evento.set()
+
+        return contexto
+
+    # descifra un mensaje con una clave
+    def descifrar(self, clave, s, empaquetado=False):
+        contexto = self.contexto(clave)
+
+        if empaquetado:
+            return contexto.descifrarEmpaquetado(s)
+        return contexto.descifrar(s)
+
+    # descifra una lista de mensajes con una clave
+    def descifrar_lote(self, clave, cifrados, empaquetado=False):
+        contexto = self.contexto(clave)
+
+        if empaquetado:
+            return [contexto.descifrarEmpaquetado(s) for s in cifrados]
+        return [contexto.descifrar(s) for s in cifrados]
+
+    # devuelve las estadísticas de la caché
+    def estadisticas(self):
+        with self.cerrojo:
+            return {"aciertos": self.aciertos, "fallos": self.fallos, "expulsiones": self.expulsiones,
+                    "claves": len(self.cache), "bytes": self.bytes}
+
+#------------------------------------------------------------------------------
+# Datos de salida
+#------------------------------------------------------------------------------
+
+# registra num_claves claves y descifra num_men mensajes desde varios hilos, comparando con cargar cada vez la clave
+def medirRegistro(num_claves, tam, it, max_claves, num_men, hilos, carpeta):
+    registro = Registro_Claves(carpeta, max_claves)
+
+    # registramos las claves y ciframos los mensajes; unas pocas claves reciben la mayoría (pesos 1/k)
+    claves = []
+    for i in range(num_claves):
+        merkle_hellman = iterativo.Merkle_Hellman(tam, it)
+        claves.append((registro.registrar(merkle_hellman.sk), merkle_hellman))
+    elegidas = random.choices(claves, weights=[1 / (k+1) for k in range(num_claves)], k=num_men)
+
+    trabajos = []
+    for clave, merkle_hellman in elegidas:
+        mensaje = random.getrandbits(tam)
+        merkle_hellman.mensaje = mensaje
+        merkle_hellman.cifrar()
+        trabajos.append((clave, merkle_hellman.s, mensaje))
+
+    # descifrado cargando la clave del disco para cada mensaje
+    inicio = time.perf_counter()
+    for clave, s, mensaje in trabajos[:max(1, num_men // 10)]:
+        prepararContexto(cargarClavePrivada(os.path.join(carpeta, clave + EXTENSION))).descifrarEmpaquetado(s)
+    tiempo_sin = (time.perf_counter() - inicio) / max(1, num_men // 10)
+
+    # descifrado con el registro, repartiendo los mensajes entre los hilos
+    errores = [0] * hilos
+
+    def descifrarParte(h):
+        for clave, s, mensaje in trabajos[h::hilos]:
+            errores[h] += registro.descifrar(clave, s, empaquetado=True) != mensaje
+
+    inicio = time.perf_counter()
+    lista_hilos = [threading.Thread(target=descifrarParte, args=(h,)) for h in range(hilos)]
+    for hilo in lista_hilos:
+        hilo.start()
+    for hilo in lista_hilos:
+        hilo.join()
+    tiempo_con = (time.perf_counter() - inicio) / num_men
+
+    estadisticas = registro.estadisticas()
+    print("Claves registradas          :", num_claves)
+    print("Tamaño de la caché          :", max_claves)
+    print("Mensajes descifrados        :", num_men, "con", hilos, "hilos")
+    print("Aciertos / fallos           :", estadisticas["aciertos"], "/", estadisticas["fallos"])
+    print("Expulsiones                 :", estadisticas["expulsiones"])
+    print("Bytes en la caché           :", estadisticas["bytes"])
+    print("Tiempo cargando (µs/men)    :", round(tiempo_sin * 10**6, 1))
+    print("Tiempo con registro (µs/men):", round(tiempo_con * 10**6, 1))
+    print("Mensajes incorrectos        :", sum(errores))
+    print()
+
+#------------------------------------------------------------------------------
+# Main
+#------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+
+    print("\nRegistro de claves de Merkle-Hellman")
+    print()
+
+    # ---------- descomentar para medir el registro con varios hilos ----------
+    # num_claves = 200
+    # tam        = 256
+    # it         = 2
+    # max_claves = 32
+    # num_men    = 5000
+    # hilos      = 4
+    # carpeta    = "registro"
+    # medirRegistro(num_claves, tam, it, max_claves, num_men, hilos, carpeta)
@@ -0,0 +1,236 @@
+# Reserva de claves precalculadas de Merkle-Hellman
+
+# Juan Manuel Mateos Pérez
+
+## Explicación :
+# En este programa generamos claves privadas de Merkle-Hellman por adelantado para no tener que esperar a generarlas
+# cada vez que se crea un criptosistema. Para cada configuración (tamaño del mensaje, número de iteraciones) se mantiene
+# un número de claves disponibles, que se generan en segundo plano con varios procesos y se guardan en disco usando el
+# formato de MH_Serializacion.py. Al pedir una clave se toma una del disco (y se encarga otra para reponerla); si no
+# queda ninguna, se genera en el momento.
+# Si el tamaño total de la carpeta supera el máximo indicado, se eliminan las claves más antiguas.
+# Varios programas pueden compartir la misma carpeta, ya que cada clave se reserva renombrando su archivo antes de
+# leerlo, de forma que nunca se entrega dos veces.
+
+## Ejecución :
+# Para ejecutar el programa, solo debemos descomentar el código del main que queramos utilizar:
+# (1) Si descomentamos la primera parte, se rellena la reserva para las configuraciones indicadas (variable
+# configuraciones), con tantas claves por configuración como indique la variable num_claves, y después se crean
+# varios criptosistemas con claves de la reserva. Podemos modificar también la carpeta donde se guardan las claves
+# (variable carpeta).
+
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+
+from MH_Modulos import iterativo
+from MH_Serializacion import serializarClavePrivada, deserializarClavePrivada
+
+# extensión de los archivos de clave y de los archivos a medio escribir
+EXTENSION = ".mhs"
+TEMPORAL  = ".tmp"
+
+#------------------------------------------------------------------------------
+# Generación en los procesos
+#------------------------------------------------------------------------------
+
+# genera una clave privada iterada y la devuelve serializada
+def generarClave(tamano, num_it):
+    merkle_hellman = iterativo.Merkle_Hellman(tamano, num_it)
+
+    return serializarClavePrivada(merkle_hellman.sk)
+
+#------------------------------------------------------------------------------
+# Clase Reserva_Claves
+#------------------------------------------------------------------------------
+
+class Reserva_Claves:
+    # constructor
+    def __init__(self, carpeta, configuraciones, num_claves=100, bytes_max=64 * 2**20, procesos=None):
+        self.carpeta         = carpeta
+        self.configuraciones = [tuple(c) for c in configuraciones]
+        self.num_claves      = num_claves
+        self.bytes_max       = bytes_max
+        self.procesos        = procesos
+        self.pool            = None
+        self.pendientes      = {c: 0 for c in self.configuraciones}
+        self.cerrojo         = threading.Lock()
+
+        for tamano, num_it in self.configuraciones:
+            os.makedirs(self.__carpetaConfiguracion(tamano, num_it), exist_ok=True)
+
+    # carpeta donde se guardan las claves de una configuración
+    def __carpetaConfiguracion(self, tamano, num_it):
+        return os.path.join(self.carpeta, str(tamano) + "_" + str(num_it))
+
+    # lista los archivos de clave disponibles de una configuración
+    def __archivos(self, tamano, num_it):
+        carpeta = self.__carpetaConfiguracion(tamano, num_it)
+        if not os.path.isdir(carpeta):
+            return []
+
+        return [os.path.join(carpeta, a) for a in os.listdir(carpeta) if a.endswith(EXTENSION)]
+
+    # número de claves disponibles en disco para una configuración
+    def disponibles(self, tamano, num_it):
+        return len(self.__archivos(tamano, num_it))
+
+    # arranca los procesos y encarga las claves que faltan, sin esperar a que se generen
+    def iniciar(self):
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(self.procesos)
+
+        for tamano, num_it in self.configuraciones:
+            self.__reponer(tamano, num_it)
+
+    # detiene los procesos; con esperar=True se terminan antes las claves encargadas
+    def detener(self, esperar=False):
+        if self.pool is None:
+            return
+
+        if esperar:
+            self.pool.close()
+            self.pool.join()
+        else:
+            self.pool.terminate()
+        self.pool = None
+
+    # encarga a los procesos las claves que faltan para llegar a num_claves
+    def __reponer(self, tamano, num_it):
+        if self.pool is None or (tamano, num_it) not in self.pendientes:
+            return
+
+        with self.cerrojo:
+            faltan = self.num_claves - self.disponibles(tamano, num_it) - self.pendientes[(tamano, num_it)]
+            if faltan <= 0:
+                return
+            self.pendientes[(tamano, num_it)] += faltan
+
+        for i in range(faltan):
+            self.pool.apply_async(generarClave, (tamano, num_it),
+                                  callback=lambda datos: self.__guardar(tamano, num_it, datos),
+                                  error_callback=lambda error: self.__fallo(tamano, num_it))
+
+    # guarda en disco una clave generada por un proceso
+    def __guardar(self, tamano, num_it, datos):
+        nombre = os.path.join(self.__carpetaConfiguracion(tamano, num_it), uuid.uuid4().hex)
+
+        # escribimos primero en un temporal para que nadie lea una clave a medias
+        with open(nombre + TEMPORAL, "wb") as f:
+            f.write(datos)
+        os.replace(nombre + TEMPORAL, nombre + EXTENSION)
+
+        with self.cerrojo:
+            self.pendientes[(tamano, num_it)] -= 1
+        self.__aplicarLimite()
+
+    # descuenta una clave que no se ha podido generar
+    def __fallo(self, tamano, num_it):
+        with self.cerrojo:
+            self.pendientes[(tamano, num_it)] -= 1
+
+    # elimina las claves más antiguas mientras la carpeta supere el tamaño máximo
+    def __aplicarLimite(self):
+        archivos = []
+        total    = 0
+
+        for raiz, carpetas, nombres in os.walk(self.carpeta):
+            for nombre in nombres:
+                if nombre.endswith(EXTENSION):
+                    ruta = os.path.join(raiz, nombre)
+                    try:
+                        info = os.stat(ruta)
+                    except FileNotFoundError:
+                        continue
+                    archivos.append((info.st_mtime, info.st_size, ruta))
+                    total += info.st_size
+
+        archivos.sort()
+        for fecha, tam, ruta in archivos:
+            if total <= self.bytes_max:
+                break
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+            total -= tam
+
+    # toma una clave del disco, o None si no queda ninguna
+    def __tomar(self, tamano, num_it):
+        for ruta in sorted(self.__archivos(tamano, num_it)):
+            # renombrar el archivo lo reserva para nosotros aunque otro programa use la misma carpeta
+            reservada = ruta + "." + uuid.uuid4().hex
+            try:
+                os.rename(ruta, reservada)
+            except FileNotFoundError:
+                continue
+
+            with open(reservada, "rb") as f:
+                datos = f.read()
+            os.remove(reservada)
+
+            return deserializarClavePrivada(datos)
+
+        return None
+
+    # devuelve una clave privada iterada [[m, w, sucesion], ...] de la configuración pedida
+    def obtener(self, tamano, num_it):
+        sk = self.__tomar(tamano, num_it)
+
+        # si no quedan claves, la generamos en el momento
+        if sk is None:
+            sk = deserializarClavePrivada(generarClave(tamano, num_it))
+
+        self.__reponer(tamano, num_it)
+
+        return sk
+
+    # crea un criptosistema con una clave de la reserva
+    def crear(self, tamano, num_it, mensaje=None):
+        return iterativo.Merkle_Hellman(tamano, num_it, mensaje, self.obtener(tamano, num_it))
+
+#------------------------------------------------------------------------------
+# Datos de salida
+#------------------------------------------------------------------------------
+
+# rellena la reserva y crea n criptosistemas con sus claves
+def usarReserva(carpeta, configuraciones, num_claves, n):
+    reserva = Reserva_Claves(carpeta, configuraciones, num_claves)
+    reserva.iniciar()
+
+    # esperamos a que se llene la reserva
+    while any(reserva.disponibles(t, it) < num_claves for t, it in configuraciones):
+        time.sleep(0.1)
+
+    print("Configuración \t Tiempo creación (ms) \t Errores")
+    for tamano, num_it in configuraciones:
+        inicio = time.perf_counter()
+        errores = 0
+        for i in range(n):
+            merkle_hellman = reserva.crear(tamano, num_it)
+            merkle_hellman.do()
+            errores += merkle_hellman.errores
+        fin = time.perf_counter()
+
+        print((tamano, num_it), "\t", round((fin - inicio) / n * 1000, 3), "\t\t\t", errores)
+
+    reserva.detener()
+    print()
+
+#------------------------------------------------------------------------------
+# Main
+#------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+
+    print("\nReserva de claves de Merkle-Hellman")
+    print()
+
+    # ---------- descomentar para rellenar la reserva y usarla ----------
+    # carpeta         = "claves"
+    # configuraciones = [(100, 0), (100, 2), (256, 3)]
+    # num_claves      = 50
+    # n               = 20
+    # usarReserva(carpeta, configuraciones, num_claves, n)
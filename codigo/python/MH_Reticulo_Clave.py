@@ -0,0 +1,202 @@
+# Reutilización del retículo de una clave pública en los ataques de Lagarias y Coster
+
+# Juan Manuel Mateos Pérez
+
+## Explicación :
+# En este programa aplicamos los ataques de Lagarias y Coster a muchos mensajes cifrados con la misma clave pública sin
+# repetir para cada uno la reducción LLL completa. En las matrices de los dos ataques solo la última fila depende del
+# mensaje cifrado s; las n primeras (e_i con -pk_i en Lagarias, 2*e_i con 2*pk_i*N en Coster) dependen solo de la clave
+# pública y generan un retículo de dimensión n dentro del hiperplano perpendicular a un vector normal conocido.
+# Por eso, para cada clave pública (y cada N en Coster) se reduce una sola vez ese retículo y se guarda, junto con su
+# ortogonalización de Gram-Schmidt, en una caché de los retículos usados más recientemente (LRU). Para cada mensaje
+# cifrado se sigue entonces este orden :
+#   - Plano más cercano : se busca con el algoritmo de Babai (planoMasCercano de MH_LLL.py) el vector v del retículo más
+#                         cercano a -b, siendo b la última fila de la matriz. Si el mensaje es x, b + v = (x, 0) en
+#                         Lagarias y (1 - 2x, 0) en Coster, así que basta con comprobar ese vector. Solo cuesta unas
+#                         pocas pasadas sobre la base, sin reducir nada.
+#   - Incrustación      : si el vector anterior no es solución, se añade b + v (que es b desplazado por un vector del
+#                         retículo, por lo que genera el mismo retículo que b pero con entradas pequeñas) como última
+#                         fila de la base ya reducida y se aplica LLL, que parte de una base casi reducida.
+# Igual que en ataqueLagarias, si no se obtiene solución con s se repite con sum(pk) - s.
+# El coste de reducir la clave se paga una vez y el de cada mensaje es mucho menor que el de una reducción completa.
+
+## Ejecución :
+# Para ejecutar el programa, solo debemos descomentar el código del main que queramos utilizar:
+# (1) Si descomentamos la primera parte, se compara para varios tamaños (variable tamanos) el tiempo de atacar num_men
+# mensajes cifrados con la misma clave (variable num_men) con los ataques de Lagarias y Coster de siempre (que se miden
+# solo sobre unos pocos mensajes, indicados con la variable num_indep, y se multiplican) y reutilizando el retículo.
+# También se muestran los mensajes obtenidos y cuántos se han resuelto con el plano más cercano.
+
+import math
+import random
+import time
+from collections import OrderedDict
+
+import MH_Coster as coster
+import MH_Lagarias as lagarias
+from MH_LLL import lll, ortogonalizar, planoMasCercano
+from MH_Modulos import basico
+
+# número máximo de retículos guardados en la caché
+MAX_RETICULOS = 32
+
+#------------------------------------------------------------------------------
+# Clase Reticulo_Clave
+#------------------------------------------------------------------------------
+
+class Reticulo_Clave:
+    # constructor; filas son las n primeras filas de la matriz del ataque, de la forma a_i * e_i con c_i en la última
+    # columna, que se reducen por LLL
+    def __init__(self, filas):
+        n = len(filas)
+
+        self.base = lll(filas)
+        self.ortogonal, self.r = ortogonalizar(self.base)
+        # los vectores (x, sum(c_i * x_i / a_i)) son perpendiculares a (c_1/a_1, ..., c_n/a_n, -1)
+        self.normal = [filas[i][n] // filas[i][i] for i in range(n)] + [-1]
+        self.cercanos    = 0
+        self.incrustados = 0
+
+    # devuelve b + v, siendo v el vector del retículo más cercano a -b
+    def reducirFila(self, b):
+        v = planoMasCercano(self.base, self.ortogonal, self.r, [-x for x in b], self.normal)
+
+        return [x + y for x, y in zip(b, v)]
+
+    # busca una solución con la última fila b, primero por el plano más cercano y después por incrustación
+    def resolver(self, b, pk, s, extraer):
+        fila = self.reducirFila(b)
+
+        solucion = extraer([fila], pk, s)
+        if len(solucion) != 0:
+            self.cercanos += 1
+            return solucion
+
+        solucion = extraer(lll(self.base + [fila]), pk, s)
+        if len(solucion) != 0:
+            self.incrustados += 1
+
+        return solucion
+
+#------------------------------------------------------------------------------
+# Caché de retículos
+#------------------------------------------------------------------------------
+
+reticulos = OrderedDict()
+
+# devuelve el retículo guardado con la clave indicada o lo crea con las filas que devuelve generar
+def obtenerReticulo(clave, generar):
+    reticulo = reticulos.get(clave)
+    if reticulo is not None:
+        reticulos.move_to_end(clave)
+        return reticulo
+
+    reticulo = Reticulo_Clave(generar())
+    reticulos[clave] = reticulo
+    if len(reticulos) > MAX_RETICULOS:
+        reticulos.popitem(last=False)
+
+    return reticulo
+
+# devuelve el retículo reducido de Lagarias de una clave pública
+def reticuloLagarias(pk):
+    return obtenerReticulo(("lagarias", tuple(pk)), lambda: lagarias.generarMatriz(pk, 0, 0)[:-1])
+
+# devuelve el retículo reducido de Coster de una clave pública con el N indicado
+def reticuloCoster(pk, N):
+    return obtenerReticulo(("coster", tuple(pk), N), lambda: coster.generarMatriz(pk, 0, N)[:-1])
+
+# elige N al azar igual que en MH_Coster.py, con el generador rng (por defecto, el módulo random)
+def elegirN(n, rng=None):
+    return basico.generador(rng).randint(int((1/2)*math.sqrt(n)), int(math.sqrt(n)))
+
+#------------------------------------------------------------------------------
+# Ataques
+#------------------------------------------------------------------------------
+
+# aplica el ataque de Lagarias reutilizando el retículo de la clave pública
+def ataqueLagariasReutilizado(pk, s):
+    n = len(pk)
+    reticulo = reticuloLagarias(pk)
+
+    solucion = reticulo.resolver([0] * n + [s], pk, s, lagarias.extraerSolucion)
+
+    # caso 4 del algoritmo
+    if len(solucion) == 0:
+        solucion = reticulo.resolver([0] * n + [sum(pk) - s], pk, s, lagarias.extraerSolucion)
+
+    return solucion
+
+# aplica el ataque de Coster reutilizando el retículo de la clave pública; si no se indica N, se elige al azar con el
+# generador rng
+def ataqueCosterReutilizado(pk, s, N=None, rng=None):
+    n = len(pk)
+    if N is None:
+        N = elegirN(n, rng)
+
+    return reticuloCoster(pk, N).resolver([1] * n + [2*s*N], pk, s, coster.extraerSolucion)
+
+# aplica el ataque de Lagarias a una lista de mensajes cifrados con la misma clave pública
+def ataqueLagariasLote(pk, cifrados):
+    return [ataqueLagariasReutilizado(pk, s) for s in cifrados]
+
+# aplica el ataque de Coster a una lista de mensajes cifrados con la misma clave pública, con el mismo N para todos
+# para que el retículo se reduzca una sola vez
+def ataqueCosterLote(pk, cifrados, N=None, rng=None):
+    if N is None:
+        N = elegirN(len(pk), rng)
+
+    return [ataqueCosterReutilizado(pk, s, N) for s in cifrados]
+
+#------------------------------------------------------------------------------
+# Datos de salida
+#------------------------------------------------------------------------------
+
+# compara el tiempo de atacar num_men mensajes de la misma clave con los ataques de siempre y reutilizando el retículo
+def compararLote(tamanos, num_men, num_indep=3):
+    print("Ataque \t\t Tamaño \t Independiente (s) \t Reutilizado (s) \t Aceleración \t Obtenidos \t Plano cercano")
+
+    for tam in tamanos:
+        merkle_hellman = basico.Merkle_Hellman(tam)
+        pk = merkle_hellman.pk
+        mensajes = [[random.randint(0, 1) for j in range(tam)] for i in range(num_men)]
+        cifrados = merkle_hellman.cifrar_lote(mensajes)
+        N = elegirN(tam)
+
+        # (nombre, ataque de un mensaje, ataque del lote, retículo usado)
+        ataques = [("Lagarias", lambda s: lagarias.ataqueLagarias(pk, s), lambda: ataqueLagariasLote(pk, cifrados),
+                    lambda: reticuloLagarias(pk)),
+                   ("Coster",   lambda s: coster.ataqueCoster(pk, s, N),  lambda: ataqueCosterLote(pk, cifrados, N),
+                    lambda: reticuloCoster(pk, N))]
+
+        for nombre, ataque, ataque_lote, reticulo in ataques:
+            inicio = time.perf_counter()
+            for s in cifrados[:num_indep]:
+                ataque(s)
+            tiempo_indep = (time.perf_counter() - inicio) / min(num_indep, num_men) * num_men
+
+            reticulos.clear()
+            inicio = time.perf_counter()
+            soluciones = ataque_lote()
+            tiempo_lote = time.perf_counter() - inicio
+            obtenidos = sum(sol == men for sol, men in zip(soluciones, mensajes))
+
+            print(nombre, "\t", tam, "\t\t", round(tiempo_indep, 3), "\t\t\t", round(tiempo_lote, 3), "\t\t\t",
+                  round(tiempo_indep / tiempo_lote, 1), "\t\t", obtenidos, "/", num_men, "\t", reticulo().cercanos)
+
+    print()
+
+#------------------------------------------------------------------------------
+# Main
+#------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+
+    print("\nReutilización del retículo de la clave pública")
+    print()
+
+    # ---------- descomentar para comparar con los ataques de siempre ----------
+    # tamanos   = [20, 40, 60, 80]
+    # num_men   = 50
+    # num_indep = 3
+    # compararLote(tamanos, num_men, num_indep)
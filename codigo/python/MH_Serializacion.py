@@ -0,0 +1,278 @@
+# Serialización binaria de claves y mensajes cifrados de Merkle-Hellman
+
+# Juan Manuel Mateos Pérez
+
+## Explicación :
+# En este programa guardamos y cargamos en formato binario la clave pública, la clave privada (básica o con todas
+# sus iteraciones) y listas de mensajes cifrados. Cada lista de enteros se escribe con su longitud y con un ancho fijo
+# en bytes, de forma que todos sus elementos ocupan lo mismo y el elemento i se puede leer directamente sin recorrer
+# los anteriores. Gracias a ello, las claves públicas y los mensajes cifrados grandes se pueden cargar proyectando el
+# archivo en memoria (mmap) en lugar de leerlo y convertirlo entero.
+
+## Ejecución :
+# Para ejecutar el programa, solo debemos descomentar el código del main que queramos utilizar:
+# (1) Si descomentamos la primera parte, se genera un criptosistema, se guardan sus claves y un lote de mensajes
+# cifrados, y se comprueba que al cargarlos se obtienen los mismos valores. Podemos modificar el tamaño del mensaje
+# (variable tam), el número de iteraciones de la clave privada (variable it) y la carpeta donde se guardan (variable
+# carpeta).
+
+# Formato de los archivos :
+#     "MHS"         (3 bytes)      identificador del formato
+#     versión       (1 byte)
+#     tipo          (1 byte)       1 = clave pública, 2 = clave privada, 3 = mensajes cifrados
+#     contenido
+#
+# Cada lista de enteros se escribe como :
+#     num           (4 bytes)      número de elementos
+#     ancho         (2 bytes)      bytes de cada elemento
+#     elementos     (num x ancho bytes, en big-endian)
+#
+# El contenido de la clave pública y de los mensajes cifrados es una lista de enteros. El de la clave privada es :
+#     iterada       (1 byte)       0 si es una clave [m, w, sucesion], 1 si es una lista de claves iteradas
+#     num_capas     (4 bytes)
+#     capas         por cada una, la lista [m, w] seguida de la lista de la sucesión
+
+import mmap
+import os
+
+from MH_Modulos import iterativo
+
+# identificador y versión del formato
+MAGICO  = b"MHS"
+VERSION = 1
+
+# tipos de archivo
+TIPO_PUBLICA  = 1
+TIPO_PRIVADA  = 2
+TIPO_CIFRADOS = 3
+
+# tamaño de la cabecera del archivo y de la de cada lista
+CABECERA       = len(MAGICO) + 2
+CABECERA_LISTA = 6
+
+#------------------------------------------------------------------------------
+# Clase Lista_Enteros
+#------------------------------------------------------------------------------
+
+# lista de enteros de solo lectura que se decodifica bajo demanda a partir de un buffer
+class Lista_Enteros:
+    # constructor
+    def __init__(self, buffer, inicio, num, ancho):
+        self.buffer = buffer
+        self.inicio = inicio
+        self.num    = num
+        self.ancho  = ancho
+
+    # número de elementos
+    def __len__(self):
+        return self.num
+
+    # devuelve el elemento i, o una lista si se pide un rango
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.num))]
+
+        if i < 0:
+            i += self.num
+        if i < 0 or i >= self.num:
+            raise IndexError("índice fuera de la lista")
+
+        pos = self.inicio + i * self.ancho
+        return int.from_bytes(self.buffer[pos:pos+self.ancho], "big")
+
+    # recorre los elementos en orden
+    def __iter__(self):
+        ancho = self.ancho
+        for pos in range(self.inicio, self.inicio + self.num * ancho, ancho):
+            yield int.from_bytes(self.buffer[pos:pos+ancho], "big")
+
+    # decodifica todos los elementos en una lista de Python
+    def lista(self):
+        return list(self)
+
+#------------------------------------------------------------------------------
+# Codificación
+#------------------------------------------------------------------------------
+
+# codifica una lista de enteros no negativos con ancho fijo
+def codificarLista(valores):
+    if any(v < 0 for v in valores):
+        raise ValueError("solo se pueden serializar enteros no negativos")
+
+    ancho = max(1, (max(valores, default=0).bit_length() + 7) // 8)
+    if ancho >= 2**16:
+        raise ValueError("los enteros son demasiado grandes para el formato")
+
+    partes = [len(valores).to_bytes(4, "big"), ancho.to_bytes(2, "big")]
+    partes.extend(v.to_bytes(ancho, "big") for v in valores)
+
+    return b"".join(partes)
+
+# decodifica la lista que empieza en la posición pos, devolviendo la lista y la posición siguiente
+def decodificarLista(buffer, pos, perezosa=False):
+    if pos + CABECERA_LISTA > len(buffer):
+        raise ValueError("los datos están truncados")
+
+    num   = int.from_bytes(buffer[pos:pos+4], "big")
+    ancho = int.from_bytes(buffer[pos+4:pos+6], "big")
+    pos  += CABECERA_LISTA
+    fin   = pos + num * ancho
+    if fin > len(buffer):
+        raise ValueError("los datos están truncados")
+
+    lista = Lista_Enteros(buffer, pos, num, ancho)
+    if not perezosa:
+        lista = lista.lista()
+
+    return lista, fin
+
+# genera la cabecera de un archivo del tipo indicado
+def generarCabecera(tipo):
+    return MAGICO + bytes([VERSION, tipo])
+
+# comprueba la cabecera y devuelve la posición donde empieza el contenido
+def leerCabecera(buffer, tipo):
+    if len(buffer) < CABECERA or bytes(buffer[:len(MAGICO)]) != MAGICO:
+        raise ValueError("los datos no están en el formato de Merkle-Hellman")
+    if buffer[len(MAGICO)] != VERSION:
+        raise ValueError("versión del formato no soportada : " + str(buffer[len(MAGICO)]))
+    if buffer[len(MAGICO)+1] != tipo:
+        raise ValueError("los datos no son del tipo esperado")
+
+    return CABECERA
+
+#------------------------------------------------------------------------------
+# Claves y mensajes cifrados
+#------------------------------------------------------------------------------
+
+# serializa una clave pública
+def serializarClavePublica(pk):
+    return generarCabecera(TIPO_PUBLICA) + codificarLista(pk)
+
+# serializa una clave privada, tanto básica [m, w, sucesion] como iterada [[m, w, sucesion], ...]
+def serializarClavePrivada(sk):
+    iterada = not isinstance(sk[0], int)
+    capas   = sk if iterada else [sk]
+
+    partes = [generarCabecera(TIPO_PRIVADA), bytes([int(iterada)]), len(capas).to_bytes(4, "big")]
+    for capa in capas:
+        partes.append(codificarLista([capa[0], capa[1]]))
+        partes.append(codificarLista(capa[2]))
+
+    return b"".join(partes)
+
+# serializa una lista de mensajes cifrados
+def serializarCifrados(cifrados):
+    return generarCabecera(TIPO_CIFRADOS) + codificarLista(cifrados)
+
+# deserializa una clave pública
+def deserializarClavePublica(buffer, perezosa=False):
+    pos = leerCabecera(buffer, TIPO_PUBLICA)
+
+    return decodificarLista(buffer, pos, perezosa)[0]
+
+# deserializa una clave privada con la misma forma con la que se serializó
+def deserializarClavePrivada(buffer):
+    pos = leerCabecera(buffer, TIPO_PRIVADA)
+    if pos + 5 > len(buffer):
+        raise ValueError("los datos están truncados")
+
+    iterada   = buffer[pos] == 1
+    num_capas = int.from_bytes(buffer[pos+1:pos+5], "big")
+    pos += 5
+
+    capas = []
+    for i in range(num_capas):
+        mw, pos       = decodificarLista(buffer, pos)
+        sucesion, pos = decodificarLista(buffer, pos)
+        capas.append([mw[0], mw[1], sucesion])
+
+    if iterada:
+        return capas
+    return capas[0]
+
+# deserializa una lista de mensajes cifrados
+def deserializarCifrados(buffer, perezosa=False):
+    pos = leerCabecera(buffer, TIPO_CIFRADOS)
+
+    return decodificarLista(buffer, pos, perezosa)[0]
+
+#------------------------------------------------------------------------------
+# Archivos
+#------------------------------------------------------------------------------
+
+# escribe los datos serializados en un archivo
+def guardar(ruta, datos):
+    with open(ruta, "wb") as f:
+        f.write(datos)
+
+# lee un archivo completo, o lo proyecta en memoria si se pide
+def abrir(ruta, mapear):
+    with open(ruta, "rb") as f:
+        if mapear and os.fstat(f.fileno()).st_size > 0:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return f.read()
+
+# guarda una clave pública en un archivo
+def guardarClavePublica(ruta, pk):
+    guardar(ruta, serializarClavePublica(pk))
+
+# guarda una clave privada en un archivo
+def guardarClavePrivada(ruta, sk):
+    guardar(ruta, serializarClavePrivada(sk))
+
+# guarda una lista de mensajes cifrados en un archivo
+def guardarCifrados(ruta, cifrados):
+    guardar(ruta, serializarCifrados(cifrados))
+
+# carga una clave pública; con mapear=True se devuelve una Lista_Enteros sobre el archivo proyectado
+def cargarClavePublica(ruta, mapear=False):
+    return deserializarClavePublica(abrir(ruta, mapear), mapear)
+
+# carga una clave privada
+def cargarClavePrivada(ruta):
+    return deserializarClavePrivada(abrir(ruta, False))
+
+# carga una lista de mensajes cifrados; con mapear=True se devuelve una Lista_Enteros sobre el archivo proyectado
+def cargarCifrados(ruta, mapear=False):
+    return deserializarCifrados(abrir(ruta, mapear), mapear)
+
+#------------------------------------------------------------------------------
+# Datos de salida
+#------------------------------------------------------------------------------
+
+# guarda las claves y los cifrados de un criptosistema y comprueba que se cargan igual
+def unaIteracion(tam, it, num_men, carpeta):
+    merkle_hellman = iterativo.Merkle_Hellman(tam, it)
+    mensajes = [[(i >> j) & 1 for j in range(tam)] for i in range(num_men)]
+    cifrados = merkle_hellman.cifrar_lote(mensajes)
+
+    guardarClavePublica(os.path.join(carpeta, "clave.pub"), merkle_hellman.pk)
+    guardarClavePrivada(os.path.join(carpeta, "clave.priv"), merkle_hellman.sk)
+    guardarCifrados(os.path.join(carpeta, "cifrados.bin"), cifrados)
+
+    pk = cargarClavePublica(os.path.join(carpeta, "clave.pub"), mapear=True)
+    sk = cargarClavePrivada(os.path.join(carpeta, "clave.priv"))
+    cf = cargarCifrados(os.path.join(carpeta, "cifrados.bin"), mapear=True)
+
+    print("Clave pública igual  :", list(pk) == merkle_hellman.pk)
+    print("Clave privada igual  :", sk == merkle_hellman.sk)
+    print("Cifrados iguales     :", list(cf) == cifrados)
+    print("Tamaño clave pública :", os.path.getsize(os.path.join(carpeta, "clave.pub")), "bytes")
+    print()
+
+#------------------------------------------------------------------------------
+# Main
+#------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+
+    print("\nSerialización de Merkle-Hellman")
+    print()
+
+    # ---------- descomentar para guardar y cargar un criptosistema ----------
+    # tam     = 100
+    # it      = 2
+    # num_men = 1000
+    # carpeta = "."
+    # unaIteracion(tam, it, num_men, carpeta)
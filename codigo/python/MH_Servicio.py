@@ -0,0 +1,390 @@
+# Servicio local de cifrado y descifrado con Merkle-Hellman
+
+# Juan Manuel Mateos Pérez
+
+## Explicación :
+# En este programa ofrecemos el criptosistema de Merkle-Hellman iterativo como un servicio local con asyncio, al que
+# se accede por un socket Unix (si la dirección es una ruta) o por TCP (si es un par (host, puerto)).
+# Cada petición y cada respuesta es una línea JSON con un identificador, por lo que un cliente puede enviar muchas
+# peticiones seguidas por la misma conexión y recibir las respuestas en el orden en que se terminan :
+#   - clave     : {"id", "op": "clave", "tamano", "num_it"} genera una clave y devuelve su identificador y la pública.
+#   - cifrar    : {"id", "op": "cifrar", "clave", "mensaje"} cifra un mensaje empaquetado en un entero.
+#   - descifrar : {"id", "op": "descifrar", "clave", "s"} descifra un mensaje y lo devuelve empaquetado.
+# Las peticiones de cifrado o descifrado que llegan a la vez para la misma clave se agrupan en un lote, que se cierra
+# al cabo de una pequeña espera o al llegar al tamaño máximo, y se resuelve con una sola llamada a cifrar_lote o
+# descifrar_lote. Tanto los lotes como la generación de claves se ejecutan en un grupo de procesos, de forma que las
+# operaciones con enteros grandes no bloquean el bucle de eventos. Cada proceso guarda el criptosistema de las claves
+# que ya ha usado, para no volver a preparar las tablas en cada lote; a los procesos se les envía solo el identificador
+# de la clave, y la clave privada únicamente cuando el proceso que recibe el lote todavía no la tiene.
+# Cada valor se comprueba antes de entrar en un lote (un mensaje debe tener como mucho tantos bits como el tamaño de la
+# clave y un mensaje cifrado debe estar entre 0 y la suma de la clave pública), de forma que una petición incorrecta
+# recibe su error sin que fallen las demás de su lote. El servicio guarda como mucho MAX_CLAVES claves; al superarlo
+# se olvidan las usadas menos recientemente.
+# También se incluye un cliente de carga, que lanza muchas peticiones concurrentes y muestra las operaciones por
+# segundo y la mediana (p50) y el percentil 99 (p99) de la latencia.
+
+## Ejecución :
+# Para ejecutar el programa, solo debemos descomentar el código del main que queramos utilizar:
+# (1) Si descomentamos la primera parte, se arranca el servicio en la dirección indicada (variable direccion) con el
+# número de procesos indicado (variable procesos), hasta que se interrumpa con Ctrl+C.
+# (2) Si descomentamos la segunda parte, se lanza el cliente de carga contra un servicio ya arrancado. Podemos modificar
+# el tamaño del mensaje (variable tam), el número de iterac. de la clave (variable it), el número de peticiones
+# (variable num_peticiones) y cuántas hay en marcha a la vez (variable concurrencia).
+
+import asyncio
+import concurrent.futures
+import json
+import multiprocessing
+import random
+import time
+import uuid
+from collections import OrderedDict
+
+from MH_Bateria import percentil
+from MH_Modulos import iterativo
+
+# espera máxima, en segundos, para completar un lote y número máximo de peticiones por lote
+ESPERA_LOTE = 0.002
+MAX_LOTE    = 256
+
+# número máximo de claves que guarda el servicio y de criptosistemas que guarda cada proceso
+MAX_CLAVES         = 1024
+MAX_CLAVES_PROCESO = 64
+
+#------------------------------------------------------------------------------
+# Operaciones en los procesos
+#------------------------------------------------------------------------------
+
+# criptosistemas ya preparados en este proceso, por identificador de clave
+criptosistemas = {}
+
+# genera una clave privada iterada y devuelve (sk, pk)
+def generarClave(tamano, num_it):
+    merkle_hellman = iterativo.Merkle_Hellman(tamano, num_it, 0)
+
+    return merkle_hellman.sk, merkle_hellman.pk
+
+# cifra o descifra un lote de valores con la clave indicada; si el proceso no tiene la clave y no se envía su clave
+# privada (sk es None), devuelve None para que se vuelva a enviar el lote con ella
+def ejecutarLote(operacion, clave, sk, valores):
+    merkle_hellman = criptosistemas.get(clave)
+    if merkle_hellman is None:
+        if sk is None:
+            return None
+        if len(criptosistemas) >= MAX_CLAVES_PROCESO:
+            criptosistemas.pop(next(iter(criptosistemas)))
+        merkle_hellman = iterativo.Merkle_Hellman(len(sk[0][2]), len(sk) - 1, 0, sk)
+        criptosistemas[clave] = merkle_hellman
+
+    if operacion == "cifrar":
+        return merkle_hellman.cifrar_lote(valores)
+    return merkle_hellman.descifrar_lote(valores, empaquetado=True)
+
+#------------------------------------------------------------------------------
+# Clase Servicio
+#------------------------------------------------------------------------------
+
+class Servicio:
+    # constructor; direccion es una ruta (socket Unix) o un par (host, puerto) (TCP)
+    def __init__(self, direccion, procesos=None, espera_lote=ESPERA_LOTE, max_lote=MAX_LOTE, max_claves=MAX_CLAVES):
+        self.direccion   = direccion
+        self.procesos    = procesos
+        self.espera_lote = espera_lote
+        self.max_lote    = max_lote
+        self.max_claves  = max_claves
+        self.claves      = OrderedDict()
+        self.lotes       = {}
+        self.pool        = None
+        self.servidor    = None
+        self.estadisticas = {"peticiones": 0, "lotes": 0}
+
+    # arranca el grupo de procesos y empieza a aceptar conexiones
+    async def iniciar(self):
+        # los procesos se crean con spawn para que no hereden los sockets de las conexiones ya abiertas
+        self.pool = concurrent.futures.ProcessPoolExecutor(self.procesos, multiprocessing.get_context("spawn"))
+
+        if isinstance(self.direccion, str):
+            self.servidor = await asyncio.start_unix_server(self.__atender, self.direccion)
+        else:
+            self.servidor = await asyncio.start_server(self.__atender, *self.direccion)
+
+    # deja de aceptar conexiones y termina los procesos
+    async def detener(self):
+        if self.servidor is not None:
+            self.servidor.close()
+            await self.servidor.wait_closed()
+        # se espera a que terminen los procesos en un hilo aparte, para no bloquear el bucle de eventos
+        if self.pool is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.pool.shutdown)
+
+    # atiende las peticiones de una conexión, respondiendo a cada una en cuanto se termina
+    async def __atender(self, lector, escritor):
+        cerrojo = asyncio.Lock()
+        tareas  = set()
+
+        async def responder(linea):
+            respuesta = await self.__resolver(linea)
+            async with cerrojo:
+                escritor.write(json.dumps(respuesta).encode() + b"\n")
+                await escritor.drain()
+
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    break
+                tarea = asyncio.ensure_future(responder(linea))
+                tareas.add(tarea)
+                tarea.add_done_callback(tareas.discard)
+
+            if tareas:
+                await asyncio.gather(*tareas, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            escritor.close()
+
+    # resuelve una petición y devuelve su respuesta; los errores se devuelven en la propia respuesta
+    async def __resolver(self, linea):
+        identificador = None
+        try:
+            peticion = json.loads(linea)
+            identificador = peticion.get("id")
+            self.estadisticas["peticiones"] += 1
+            operacion = peticion.get("op")
+
+            if operacion == "clave":
+                clave, pk = await self.__generarClave(int(peticion["tamano"]), int(peticion["num_it"]))
+                return {"id": identificador, "clave": clave, "pk": pk}
+            if operacion == "cifrar":
+                return {"id": identificador, "s": await self.__encolar("cifrar", peticion["clave"], peticion["mensaje"])}
+            if operacion == "descifrar":
+                return {"id": identificador, "mensaje": await self.__encolar("descifrar", peticion["clave"], peticion["s"])}
+
+            raise ValueError("operación desconocida : " + str(operacion))
+        except Exception as error:
+            return {"id": identificador, "error": type(error).__name__ + " : " + str(error)}
+
+    # genera una clave en el grupo de procesos y la guarda con un identificador nuevo, junto con el tamaño del mensaje
+    # y la suma de la clave pública, olvidando la usada menos recientemente si se supera el máximo
+    async def __generarClave(self, tamano, num_it):
+        sk, pk = await asyncio.get_running_loop().run_in_executor(self.pool, generarClave, tamano, num_it)
+        clave = uuid.uuid4().hex
+        self.claves[clave] = (sk, tamano, sum(pk))
+        if len(self.claves) > self.max_claves:
+            self.claves.popitem(last=False)
+
+        return clave, pk
+
+    # comprueba que un valor se puede cifrar o descifrar con la clave indicada
+    def __comprobarValor(self, operacion, clave, valor):
+        if clave not in self.claves:
+            raise KeyError("clave desconocida : " + str(clave))
+        if not isinstance(valor, int) or isinstance(valor, bool):
+            raise ValueError("el valor debe ser un entero")
+
+        sk, tamano, suma = self.claves[clave]
+        self.claves.move_to_end(clave)
+        if operacion == "cifrar" and (valor < 0 or valor >> tamano):
+            raise ValueError("el mensaje debe tener como mucho " + str(tamano) + " bits")
+        if operacion == "descifrar" and not 0 <= valor <= suma:
+            raise ValueError("el mensaje cifrado debe estar entre 0 y la suma de la clave pública")
+
+    # añade un valor al lote abierto de (operación, clave) y espera su resultado
+    async def __encolar(self, operacion, clave, valor):
+        self.__comprobarValor(operacion, clave, valor)
+
+        bucle = asyncio.get_running_loop()
+        futuro = bucle.create_future()
+
+        lote = self.lotes.get((operacion, clave))
+        if lote is None:
+            lote = []
+            self.lotes[(operacion, clave)] = lote
+            bucle.call_later(self.espera_lote, self.__cerrarLote, operacion, clave, lote)
+        lote.append((valor, futuro))
+
+        if len(lote) >= self.max_lote:
+            self.__cerrarLote(operacion, clave, lote)
+
+        return await futuro
+
+    # cierra un lote, si sigue abierto, y lo envía al grupo de procesos
+    def __cerrarLote(self, operacion, clave, lote):
+        if self.lotes.get((operacion, clave)) is not lote:
+            return
+        del self.lotes[(operacion, clave)]
+        self.estadisticas["lotes"] += 1
+
+        self.__enviarLote(operacion, clave, None, lote)
+
+    # envía un lote al grupo de procesos, con la clave privada solo si se indica
+    def __enviarLote(self, operacion, clave, sk, lote):
+        valores = [valor for valor, futuro in lote]
+        trabajo = asyncio.get_running_loop().run_in_executor(self.pool, ejecutarLote, operacion, clave, sk, valores)
+        trabajo.add_done_callback(lambda t: self.__repartir(t, operacion, clave, sk, lote))
+
+    # reparte los resultados de un lote entre las peticiones que lo forman; si el proceso no tenía la clave, vuelve a
+    # enviar el lote con la clave privada
+    def __repartir(self, trabajo, operacion, clave, sk, lote):
+        error = trabajo.exception()
+        if error is None and trabajo.result() is None:
+            if sk is None and clave in self.claves:
+                self.__enviarLote(operacion, clave, self.claves[clave][0], lote)
+                return
+            error = KeyError("clave desconocida : " + str(clave))
+
+        if error is not None:
+            for valor, futuro in lote:
+                if not futuro.done():
+                    futuro.set_exception(error)
+            return
+
+        for (valor, futuro), resultado in zip(lote, trabajo.result()):
+            if not futuro.done():
+                futuro.set_result(resultado)
+
+#------------------------------------------------------------------------------
+# Clase Cliente
+#------------------------------------------------------------------------------
+
+class Cliente:
+    # constructor
+    def __init__(self, direccion):
+        self.direccion  = direccion
+        self.lector     = None
+        self.escritor   = None
+        self.pendientes = {}
+        self.siguiente  = 0
+        self.tarea      = None
+
+    # abre la conexión con el servicio
+    async def conectar(self):
+        if isinstance(self.direccion, str):
+            self.lector, self.escritor = await asyncio.open_unix_connection(self.direccion)
+        else:
+            self.lector, self.escritor = await asyncio.open_connection(*self.direccion)
+        self.tarea = asyncio.ensure_future(self.__recibir())
+
+    # cierra la conexión
+    async def cerrar(self):
+        self.escritor.close()
+        await self.escritor.wait_closed()
+        await self.tarea
+
+    # recibe las respuestas y las entrega a la petición con su mismo identificador
+    async def __recibir(self):
+        try:
+            while True:
+                linea = await self.lector.readline()
+                if not linea:
+                    break
+                respuesta = json.loads(linea)
+                futuro = self.pendientes.pop(respuesta["id"], None)
+                if futuro is not None and not futuro.done():
+                    futuro.set_result(respuesta)
+        finally:
+            for futuro in self.pendientes.values():
+                if not futuro.done():
+                    futuro.set_exception(ConnectionError("conexión cerrada"))
+            self.pendientes.clear()
+
+    # envía una petición y espera su respuesta
+    async def peticion(self, operacion, **datos):
+        identificador = self.siguiente
+        self.siguiente += 1
+
+        futuro = asyncio.get_running_loop().create_future()
+        self.pendientes[identificador] = futuro
+        self.escritor.write(json.dumps(dict(datos, id=identificador, op=operacion)).encode() + b"\n")
+
+        respuesta = await futuro
+        if "error" in respuesta:
+            raise RuntimeError(respuesta["error"])
+        return respuesta
+
+    # genera una clave en el servicio y devuelve (identificador, clave pública)
+    async def clave(self, tamano, num_it):
+        respuesta = await self.peticion("clave", tamano=tamano, num_it=num_it)
+
+        return respuesta["clave"], respuesta["pk"]
+
+    # cifra un mensaje empaquetado
+    async def cifrar(self, clave, mensaje):
+        return (await self.peticion("cifrar", clave=clave, mensaje=mensaje))["s"]
+
+    # descifra un mensaje y lo devuelve empaquetado
+    async def descifrar(self, clave, s):
+        return (await self.peticion("descifrar", clave=clave, s=s))["mensaje"]
+
+#------------------------------------------------------------------------------
+# Datos de salida
+#------------------------------------------------------------------------------
+
+# arranca el servicio hasta que se interrumpa
+async def ejecutarServicio(direccion, procesos=None):
+    servicio = Servicio(direccion, procesos)
+    await servicio.iniciar()
+    print("Servicio escuchando en", direccion)
+
+    try:
+        await servicio.servidor.serve_forever()
+    finally:
+        await servicio.detener()
+
+# lanza num_peticiones idas y vueltas (cifrar y descifrar), con concurrencia de ellas en marcha a la vez
+async def cargarServicio(direccion, tam, it, num_peticiones, concurrencia):
+    cliente = Cliente(direccion)
+    await cliente.conectar()
+    clave, _ = await cliente.clave(tam, it)
+
+    latencias = []
+    errores   = 0
+    restantes = iter(range(num_peticiones))
+
+    async def trabajador():
+        nonlocal errores
+        for i in restantes:
+            mensaje = random.getrandbits(tam)
+            inicio = time.perf_counter()
+            s = await cliente.cifrar(clave, mensaje)
+            res = await cliente.descifrar(clave, s)
+            latencias.append((time.perf_counter() - inicio) * 10**3)
+            errores += res != mensaje
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*[trabajador() for i in range(concurrencia)])
+    total = time.perf_counter() - inicio
+    await cliente.cerrar()
+
+    latencias.sort()
+    print("Tamaño mensaje        :", tam)
+    print("Número iteraciones    :", it)
+    print("Peticiones            :", num_peticiones, "idas y vueltas con", concurrencia, "a la vez")
+    print("Operaciones/s         :", round(2 * num_peticiones / total, 1))
+    print("Latencia p50 (ms)     :", round(percentil(latencias, 0.5), 2))
+    print("Latencia p99 (ms)     :", round(percentil(latencias, 0.99), 2))
+    print("Mensajes incorrectos  :", errores)
+    print()
+
+#------------------------------------------------------------------------------
+# Main
+#------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+
+    print("\nServicio de cifrado de Merkle-Hellman")
+    print()
+
+    # ---------- descomentar para arrancar el servicio ----------
+    # direccion = "/tmp/merkle_hellman.sock"
+    # procesos  = None
+    # asyncio.run(ejecutarServicio(direccion, procesos))
+
+    # ---------- descomentar para lanzar el cliente de carga ----------
+    # direccion      = "/tmp/merkle_hellman.sock"
+    # tam            = 256
+    # it             = 2
+    # num_peticiones = 2000
+    # concurrencia   = 64
+    # asyncio.run(cargarServicio(direccion, tam, it, num_peticiones, concurrencia))
@@ -0,0 +1,252 @@
+# Ataque de Shamir al criptosistema de Merkle-Hellman básico
+
+# Juan Manuel Mateos Pérez
+
+## Explicación :
+# En este programa implementamos el ataque de Shamir al criptosistema de Merkle-Hellman básico. A diferencia de los
+# ataques de Lagarias y Coster, que buscan el mensaje de cada mensaje cifrado por separado, este ataque obtiene a
+# partir de la clave pública una clave privada equivalente (m', w', sucesión supercreciente), con la que después se
+# puede descifrar cualquier mensaje cifrado con esa clave pública a la misma velocidad que el usuario legítimo.
+# Si U = w^(-1) mod m, para cada elemento de la clave pública se cumple pk_i * U = ap_i + k_i * m, es decir,
+# U/m - k_i/pk_i = ap_i / (m * pk_i). Como los primeros elementos de la sucesión supercreciente son pequeños frente a m,
+# las fracciones k_i/pk_i de los primeros elementos están muy cerca de U/m, y los enteros k_1, ..., k_r se obtienen
+# reduciendo con LLL un retículo de dimensión r, en el que (k_1, k_1*pk_i - k_i*pk_1, ...) es un vector corto.
+# Con ellos sabemos que U/m está en un intervalo muy pequeño. Dentro de cada trozo del intervalo en el que no cambia
+# ningún k_i = floor(pk_i * x), las condiciones para que pk_i * x - k_i sea una sucesión supercreciente de suma menor que
+# 1 son lineales en x, por lo que basta con intersecarlas y tomar la fracción U'/m' más sencilla del resultado. La
+# clave equivalente es entonces m', w' = U'^(-1) mod m' y ap'_i = pk_i * U' - k_i * m'.
+
+## Ejecución :
+# Para ejecutar el programa, solo debemos descomentar el código del main que queramos utilizar:
+# (1) Si descomentamos la primera parte, se aplica el ataque a p claves aleatorias, mostrando el tamaño, el tiempo de
+# recuperación de la clave, el tamaño del módulo obtenido frente al original y si descifra correctamente.
+# (2) Si descomentamos la segunda parte, se compara para varios tamaños (variable tamanos) el tiempo de descifrar
+# num_men mensajes (variable num_men) con el ataque de Shamir y con el de Lagarias (que se mide solo sobre unos pocos
+# mensajes, indicados con la variable num_lagarias, y se multiplica).
+
+import math
+import random
+import time
+from fractions import Fraction
+
+from MH_Lagarias import ataqueLagarias
+from MH_LLL import lll
+from MH_Modulos import basico
+
+# número máximo de elementos de la clave pública con los que se construye el retículo
+MAX_R = 12
+
+#------------------------------------------------------------------------------
+# Funciones auxiliares
+#------------------------------------------------------------------------------
+
+# devuelve la fracción con menor denominador estrictamente contenida en el intervalo (lo, hi), con 0 <= lo < hi
+def racionalMasSencillo(lo, hi):
+    entero = math.floor(lo)
+    if entero + 1 < hi:
+        return Fraction(entero + 1)
+    if lo == entero:
+        return entero + 1 / Fraction(math.floor(1 / (hi - entero)) + 1)
+
+    return entero + 1 / racionalMasSencillo(1 / (hi - entero), 1 / (lo - entero))
+
+# genera el retículo con los r primeros elementos de la clave pública, escalando las columnas 2..r por C
+def generarMatriz(pk, r, C):
+    filas = [[1] + [pk[i] * C for i in range(1, r)]]
+
+    for i in range(1, r):
+        aux = [0] * r
+        aux[i] = -pk[0] * C
+        filas.append(aux)
+
+    return filas
+
+# obtiene (k_1, ..., k_r) de una fila del retículo reducido con el signo indicado, o None si no son enteros
+def extraerK(fila, pk, C, signo):
+    k1 = (signo * fila[0]) % pk[0]
+    ks = [k1]
+
+    for i in range(1, len(fila)):
+        num = k1 * pk[i] - signo * fila[i] // C
+        if num % pk[0] != 0:
+            return None
+        ks.append(num // pk[0])
+
+    return ks
+
+#------------------------------------------------------------------------------
+# Clave equivalente
+#------------------------------------------------------------------------------
+
+# interseca con (lo, hi) las condiciones lineales para que pk_i * x - k_i sea supercreciente y de suma menor que 1
+def intervaloValido(pk, ks, lo, hi):
+    suma_pk = 0
+    suma_k  = 0
+    condiciones = []
+
+    # ap_i > ap_1 + ... + ap_(i-1)  <=>  (pk_i - suma_pk) * x > k_i - suma_k
+    for p, k in zip(pk, ks):
+        condiciones.append((p - suma_pk, k - suma_k))
+        suma_pk += p
+        suma_k  += k
+
+    # ap_1 + ... + ap_n < 1  <=>  -suma_pk * x > -suma_k - 1
+    condiciones.append((-suma_pk, -suma_k - 1))
+
+    for c, d in condiciones:
+        if c > 0:
+            lo = max(lo, Fraction(d, c))
+        elif c < 0:
+            hi = min(hi, Fraction(d, c))
+        elif d >= 0:
+            return None
+
+    if lo >= hi:
+        return None
+    return lo, hi
+
+# construye una clave privada equivalente [m', w', ap'] a partir de los k_1, ..., k_r correctos, o None si no existe
+def claveEquivalente(pk, ks):
+    n = len(pk)
+
+    # x = U/m cumple pk_i * x - k_i = ap_i / m, con ap_i < m / 2^(n-1-i) por ser la sucesión supercreciente
+    lo = max(Fraction(k, p) for k, p in zip(ks, pk))
+    hi = min(Fraction(k * 2**(n-1-i) + 1, p * 2**(n-1-i)) for i, (k, p) in enumerate(zip(ks, pk)))
+    if lo >= hi:
+        return None
+
+    # puntos del intervalo en los que cambia algún floor(pk_i * x)
+    puntos = {lo, hi}
+    for p in pk:
+        for j in range(math.floor(p * lo) + 1, math.ceil(p * hi)):
+            puntos.add(Fraction(j, p))
+    puntos = sorted(puntos)
+
+    for a, b in zip(puntos, puntos[1:]):
+        medio = (a + b) / 2
+        todos = [p * medio.numerator // medio.denominator for p in pk]
+
+        intervalo = intervaloValido(pk, todos, a, b)
+        if intervalo is not None:
+            x = racionalMasSencillo(*intervalo)
+            U, m = x.numerator, x.denominator
+            return [m, pow(U, -1, m), [p * U - k * m for p, k in zip(pk, todos)]]
+
+    return None
+
+#------------------------------------------------------------------------------
+# Ataque
+#------------------------------------------------------------------------------
+
+# obtiene una clave privada equivalente [m', w', ap'] a partir de la clave pública, o None si no la encuentra
+def ataqueShamir(pk, max_r=MAX_R):
+    n = len(pk)
+    bits = max(pk).bit_length()
+
+    for r in range(2, min(n, max_r) + 1):
+        # escalamos para que las componentes k_1*pk_i - k_i*pk_1 (del orden de ap_i) pesen como k_1 (del orden de m)
+        C = 2 ** max(0, bits - n - r)
+        reducida = lll(generarMatriz(pk, r, C))
+
+        for fila in reducida:
+            if not any(fila[1:]):
+                continue
+
+            for signo in (1, -1):
+                ks = extraerK(fila, pk, C, signo)
+                if ks is None:
+                    continue
+
+                sk = claveEquivalente(pk, ks)
+                if sk is not None:
+                    return sk
+
+    return None
+
+# descifra una lista de mensajes cifrados con la misma clave pública, recuperando la clave una sola vez
+def ataqueShamirMensajes(pk, cifrados):
+    sk = ataqueShamir(pk)
+    if sk is None:
+        return [[] for s in cifrados]
+
+    contexto = basico.Contexto_Descifrado(sk)
+    return [contexto.descifrar(s) for s in cifrados]
+
+#------------------------------------------------------------------------------
+# Datos de salida
+#------------------------------------------------------------------------------
+
+# aplica el ataque a p claves aleatorias y muestra los resultados
+def variasIteraciones(p, num_men=20):
+    obtenidas = 0
+
+    print("Iteración \t Tamaño \t Tiempo (s) \t Bits m' \t Bits m \t Resultado")
+    for i in range(p):
+        tam = random.randint(3, 100)
+        merkle_hellman = basico.Merkle_Hellman(tam)
+
+        inicio = time.perf_counter()
+        sk = ataqueShamir(merkle_hellman.pk)
+        tiempo = time.perf_counter() - inicio
+
+        # comprobamos la clave equivalente con varios mensajes
+        correcta = sk is not None
+        if correcta:
+            contexto = basico.Contexto_Descifrado(sk)
+            for j in range(num_men):
+                merkle_hellman.mensaje = [random.randint(0, 1) for k in range(tam)]
+                merkle_hellman.cifrar()
+                correcta = correcta and contexto.descifrar(merkle_hellman.s) == merkle_hellman.mensaje
+        obtenidas += correcta
+
+        print(i+1, "\t\t", tam, "\t\t", round(tiempo, 3), "\t\t", sk[0].bit_length() if sk is not None else "-",
+              "\t\t", merkle_hellman.sk[0].bit_length(), "\t\t", "obtenido" if correcta else "fallo")
+
+    print("\nClaves obtenidas :", obtenidas, "/", p)
+    print()
+
+# compara el tiempo de descifrar num_men mensajes con el ataque de Shamir y con el de Lagarias
+def compararShamir(tamanos, num_men, num_lagarias=3):
+    print("Tamaño \t Shamir clave (s) \t Shamir total (s) \t Lagarias total (s) \t Mensajes para compensar")
+
+    for tam in tamanos:
+        merkle_hellman = basico.Merkle_Hellman(tam)
+        cifrados = merkle_hellman.cifrar_lote([[random.randint(0, 1) for j in range(tam)] for i in range(num_men)])
+
+        inicio = time.perf_counter()
+        sk = ataqueShamir(merkle_hellman.pk)
+        tiempo_clave = time.perf_counter() - inicio
+        if sk is not None:
+            contexto = basico.Contexto_Descifrado(sk)
+            for s in cifrados:
+                contexto.descifrar(s)
+        tiempo_shamir = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        for s in cifrados[:num_lagarias]:
+            ataqueLagarias(merkle_hellman.pk, s)
+        por_mensaje = (time.perf_counter() - inicio) / min(num_lagarias, num_men)
+
+        print(tam, "\t\t", round(tiempo_clave, 3), "\t\t\t", round(tiempo_shamir, 3), "\t\t\t",
+              round(por_mensaje * num_men, 3), "\t\t\t", math.ceil(tiempo_clave / por_mensaje))
+
+    print()
+
+#------------------------------------------------------------------------------
+# Main
+#------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+
+    print("\nAtaque de Shamir a Merkle-Hellman básico")
+    print()
+
+    # ---------- descomentar para aplicar el ataque a p claves aleatorias ----------
+    # p = 10
+    # variasIteraciones(p)
+
+    # ---------- descomentar para comparar con el ataque de Lagarias ----------
+    # tamanos      = [20, 40, 60, 80, 100]
+    # num_men      = 1000
+    # num_lagarias = 3
+    # compararShamir(tamanos, num_men, num_lagarias)
@@ -10,6 +10,15 @@
 # Luego, como usuario J, procederemos con la encriptación del mensaje S = a*x para enviarlo al usuario I.
 # Finalmente, como usuario I y diseñador, conociendo las claves privadas, aplicaremos el criptosistema de Merkle-Hellman para obtener el mensaje cifrado
 # recibido, comprobando en última instancia si coincidía con el original.
+# Opcionalmente, con activarInstrumentacion() se mide el tiempo de cada etapa (generación de la clave, cifrado,
+# descifrado, ...), se cuentan los reintentos al generar w y se anotan los bits del módulo de cada capa, enviando cada
+# dato a la función que se indique. Mientras está desactivada (por defecto) no añade ningún coste.
+# Todas las funciones que sortean algo (la sucesión supercreciente, m, w y el mensaje) reciben un parámetro opcional
+# rng con el generador aleatorio (random.Random) que deben usar, para poder repetir exactamente una clave o un mensaje
+# (ver MH_Aleatorio.py). Si no se indica, se usa el módulo random como hasta ahora.
+# El mensaje también puede darse empaquetado en un entero (con empaquetarMensaje, el elemento i es el bit i). En ese
+# caso el cifrado solo suma los elementos de los bits a 1, el descifrado devuelve el resultado empaquetado y los errores
+# se cuentan como los bits a 1 del XOR entre el mensaje y el resultado.
 
 ## Ejecución :
 # Para ejecutar el programa, solo debemos descomentar el código del main que queramos utilizar:
@@ -22,6 +31,145 @@
 
 import math
 import random
+import time
+from bisect import bisect_right
+
+# traduce los bits 0/1 de un mensaje a los caracteres '0'/'1'
+BITS_ASCII = bytes.maketrans(b"\x00\x01", b"01")
+
+# bits (de menor a mayor peso) de cada máscara de 8 bits
+BITS_MASCARA = tuple(tuple((mascara >> j) & 1 for j in range(8)) for mascara in range(256))
+
+# posiciones de los bits a 1 de cada byte
+POSICIONES_BITS = tuple(tuple(j for j in range(8) if (byte >> j) & 1) for byte in range(256))
+
+#------------------------------------------------------------------------------
+# Instrumentación
+#------------------------------------------------------------------------------
+
+# acumula los tiempos de cada etapa, los contadores y los valores anotados mientras está activa
+# cada dato se envía también a las funciones suscritas, llamando a funcion(tipo, nombre, valor)
+class Instrumentacion:
+    # constructor
+    def __init__(self):
+        self.tiempos    = {}
+        self.contadores = {}
+        self.valores    = {}
+        self.funciones  = []
+
+    # añade una función que recibirá cada dato, por ejemplo para enviarlo a un sistema de métricas
+    def suscribir(self, funcion):
+        self.funciones.append(funcion)
+
+    # envía un dato a las funciones suscritas
+    def __notificar(self, tipo, nombre, valor):
+        for funcion in self.funciones:
+            funcion(tipo, nombre, valor)
+
+    # anota el tiempo de una etapa que empezó en el instante inicio (de time.perf_counter)
+    def etapa(self, nombre, inicio):
+        segundos = time.perf_counter() - inicio
+        total, llamadas = self.tiempos.get(nombre, (0, 0))
+        self.tiempos[nombre] = (total + segundos, llamadas + 1)
+        self.__notificar("etapa", nombre, segundos)
+
+    # incrementa un contador
+    def contar(self, nombre, cantidad=1):
+        self.contadores[nombre] = self.contadores.get(nombre, 0) + cantidad
+        self.__notificar("contador", nombre, cantidad)
+
+    # anota un valor, como el número de bits del módulo de una capa
+    def anotar(self, nombre, valor):
+        self.valores.setdefault(nombre, []).append(valor)
+        self.__notificar("valor", nombre, valor)
+
+    # devuelve una copia de todos los datos acumulados
+    def resumen(self):
+        return {"tiempos"   : dict(self.tiempos),
+                "contadores": dict(self.contadores),
+                "valores"   : {nombre: list(valores) for nombre, valores in self.valores.items()}}
+
+    # borra los datos acumulados, manteniendo las funciones suscritas
+    def reiniciar(self):
+        self.tiempos    = {}
+        self.contadores = {}
+        self.valores    = {}
+
+# instrumentación activa; mientras sea None (por defecto) no se mide nada
+instrumentacion = None
+
+#------------------------------------------------------------------------------
+# Funciones auxiliares
+#------------------------------------------------------------------------------
+
+# empaqueta un mensaje de 0 y 1 en un entero (el elemento i es el bit i)
+def empaquetarMensaje(mensaje):
+    return int(bytes(mensaje[::-1]).translate(BITS_ASCII), 2) if len(mensaje) > 0 else 0
+
+# desempaqueta un entero en un mensaje de n elementos 0 y 1
+def desempaquetarMensaje(valor, n):
+    return [(valor >> i) & 1 for i in range(n)]
+
+# calcula las sumas de todos los subconjuntos de un bloque, indexadas por máscara
+def sumasBloque(bloque):
+    tabla = [0] * (1 << len(bloque))
+
+    for j in range(len(bloque)):
+        bit = 1 << j
+        for i in range(bit):
+            tabla[i | bit] = tabla[i] + bloque[j]
+
+    return tabla
+
+# devuelve el generador aleatorio indicado o, si no hay ninguno, el módulo random
+def generador(rng):
+    return random if rng is None else rng
+
+# genera una sucesión supercreciente de n elementos, con ap_i en [(2^(i-1) - 1)*2^n + 1, 2^(i-1)*2^n]
+def generarSucesionSC(n, rng=None):
+    num_bytes = (n + 7) // 8
+    sobrante  = 8 * num_bytes - n
+    potencia  = 1 << n
+    sucesion  = []
+
+    # sacamos de una vez todos los bytes aleatorios que necesita la sucesión
+    aleatorios = generador(rng).randbytes(num_bytes * n)
+
+    # base = (2^(i-1) - 1)*2^n, que se actualiza sin recalcular potencias
+    base = 0
+    for i in range(0, num_bytes * n, num_bytes):
+        r = int.from_bytes(aleatorios[i:i+num_bytes], "big") >> sobrante
+        sucesion.append(base + 1 + r)
+        base = 2*base + potencia
+
+    return sucesion
+
+# genera un valor invertible módulo m
+def generarInvertible(m, rng=None):
+    w   = generador(rng).randint(2, m-2)
+    gcd = math.gcd(m, w)
+
+    # en lugar de volver a sortear, quitamos a w los factores que comparte con m
+    while gcd != 1:
+        w //= gcd
+        gcd = math.gcd(m, w)
+        if instrumentacion is not None:
+            instrumentacion.contar("reintentos_gcd")
+
+    return w
+
+# genera una clave privada [m, w, ap] para mensajes de n bits
+def generarClavePrivada(n, rng=None):
+    ap = generarSucesionSC(n, rng)
+
+    # la suma de ap es menor que 2^(2n), así que cualquier m del intervalo es válido
+    m = generador(rng).randint(2 ** (2*n + 1) + 1, 2 ** (2*n + 2) - 1)
+    w = generarInvertible(m, rng)
+
+    if instrumentacion is not None:
+        instrumentacion.anotar("bits_m_capa_0", m.bit_length())
+
+    return [m, w, ap]
 
 #------------------------------------------------------------------------------
 # Clase Merkle_Hellman
@@ -29,14 +177,18 @@ import random
 
 class Merkle_Hellman:
     # constructor
-    def __init__(self, tamano, num_it, mensaje=None, sk=None):
+    # rng es el generador aleatorio con el que se generan el mensaje y la clave (por defecto, el módulo random)
+    def __init__(self, tamano, num_it, mensaje=None, sk=None, rng=None):
         self.tamano  = tamano
         self.num_it  = num_it
+        self.rng     = rng
         self.s       = -1
         self.res     = -1
         self.errores = -1
         self.it_done = 0
         self.sk      = []
+        self.tablas_cifrado = None
+        self.contexto_descifrado = None
 
         # genero el mensaje en caso de no recibirlo
         if mensaje is None:
@@ -47,11 +199,18 @@ class Merkle_Hellman:
         # genero la clave privada en caso de no recibirla
         if sk is None:
             self.__generarClavePrivada()
-        else:
+        elif isinstance(sk[0], int):
             self.sk.append(sk)
+        else:
+            # recibimos una clave privada ya iterada, con todas sus capas
+            self.sk.extend(sk)
+            self.it_done = len(sk) - 1
 
         # genero la clave pública
-        self.__generarClavePublica()
+        if self.it_done == 0:
+            self.__generarClavePublica()
+        else:
+            self.__generarClavePublicaIterada()
 
         # iteramos la clave privada si es necesario
         if self.num_it > self.it_done:
@@ -62,55 +221,22 @@ class Merkle_Hellman:
         n = self.tamano
         mensaje = []
 
+        rng = generador(self.rng)
         for i in range(n):
-            mensaje.append(random.randint(0,1))
+            mensaje.append(rng.randint(0,1))
 
         self.mensaje = mensaje
 
-    # genera una sucesión supercreciente
-    def __generaSucesionSC(self):
-        n = self.tamano
-        sucesion = []
-
-        for i in range(1, n+1):
-            ap = random.randint(((2**(i-1))-1) * (2**n) + 1, (2**(i-1)) * (2**n))
-            sucesion.append(ap)
-
-        return sucesion
-    
     # genera la clave privada
     def __generarClavePrivada(self):
-        n = self.tamano
-
-        # generamos la sucesión supercreciente
-        ap = self.__generaSucesionSC()
-        sum_ap = sum(ap)
-
-        # generamos el valor m
-        lim_inf = 2 ** (2*n + 1) + 1 
-        lim_sup = 2 ** (2*n + 2) - 1
-        while True:
-            m  = random.randint(lim_inf, lim_sup)
-            if m > sum_ap:                                          
-                break
-        
-        # generamos el valor w (invertible módulo m)
-        while True:
-            wp  = random.randint(2, m-2)
-            gcd = math.gcd(m, wp)
-            w   = wp // gcd
-            if math.gcd(m, w) == 1:
-                break
-                
-        sk = [m, w, ap]
-        self.sk.append(sk)
+        self.sk.append(generarClavePrivada(self.tamano, self.rng))
 
     # realiza diversas iteraciones sobre la clave privada
     def __iterarClavePrivada(self):
         it_reales  = self.it_done
         it_totales = self.num_it
         sk         = self.sk
-        p          = 0
+        p          = self.it_done
 
         while it_totales > it_reales:
             sucesion = []
@@ -124,15 +250,13 @@ class Merkle_Hellman:
 
             # generamos el valor m
             tope = sum(sucesion)
-            m = tope + random.randint(1, tope)
+            m = tope + generador(self.rng).randint(1, tope)
                     
             # generamos el valor w (invertible módulo m)
-            while True:
-                wp  = random.randint(2, m-2)
-                gcd = math.gcd(m, wp)
-                w   = wp // gcd
-                if math.gcd(m, w) == 1:
-                    break
+            w = generarInvertible(m, self.rng)
+
+            if instrumentacion is not None:
+                instrumentacion.anotar("bits_m_capa_" + str(p + 1), m.bit_length())
 
             it_reales += 1
             p += 1
@@ -141,12 +265,19 @@ class Merkle_Hellman:
         self.it_done = it_reales
 
         # generamos la clave pública
+        self.__generarClavePublicaIterada()
+
+    # genera la clave pública a partir de la última capa de la clave privada iterada
+    def __generarClavePublicaIterada(self):
+        sk       = self.sk[len(self.sk) - 1]
         sucesion = []
-        u = pow(sk[p][1], -1, sk[p][0])
-        for i in sk[p][2]:
-            sucesion.append((i * u) % sk[p][0])
+
+        u = pow(sk[1], -1, sk[0])
+        for i in sk[2]:
+            sucesion.append((i * u) % sk[0])
+
         self.pk = sucesion
-    
+
     # genera la clave pública
     def __generarClavePublica(self):
         n  = self.tamano
@@ -158,58 +289,111 @@ class Merkle_Hellman:
         
         self.pk = a
 
-    # cifra un mensaje
+    # cifra un mensaje, sumando solo los elementos de la clave pública de los bits a 1
     def cifrar(self):
-        n       = self.tamano
         pk      = self.pk
         mensaje = self.mensaje
-        s       = 0
 
-        for i in range(n):
-            s += mensaje[i] * pk[i]
-        
+        if isinstance(mensaje, bool):
+            raise ValueError("el mensaje debe ser una lista de 0 y 1 o un entero empaquetado")
+
+        # mensaje empaquetado en un entero: recorremos sus bytes y, de cada uno, solo sus bits a 1
+        if isinstance(mensaje, int):
+            if mensaje < 0 or mensaje >> self.tamano:
+                raise ValueError("el mensaje debe tener como mucho " + str(self.tamano) + " bits")
+            s = 0
+            k = 0
+            for byte in mensaje.to_bytes((self.tamano + 7) // 8, "little"):
+                if byte:
+                    for j in POSICIONES_BITS[byte]:
+                        s += pk[k + j]
+                k += 8
+        else:
+            s = sum([p * x for p, x in zip(pk, mensaje) if x])
+
         self.s = s
 
-    # descifra un mensaje
-    def descifrar(self):
-        n      = self.tamano
-        sk     = self.sk
-        s      = self.s
-        num_it = self.num_it
-        res    = [0 for i in range(n)]
-        p      = len(sk) - 1
+    # construye las tablas de sumas parciales de la clave pública por bloques de 8 bits
+    def __generarTablasCifrado(self):
+        pk     = self.pk
+        tablas = []
 
-        if num_it == 0:
-            # calculamos el inverso multiplicativo de w módulo m
-            inv_w = pow(sk[0][1], -1, sk[0][0])
+        for k in range(0, len(pk), 8):
+            tablas.append(sumasBloque(pk[k:k+8]))
+
+        self.tablas_cifrado = (pk, tablas)
+
+    # cifra una lista de mensajes (listas de 0 y 1 o enteros empaquetados) con la misma clave pública
+    def cifrar_lote(self, mensajes):
+        n = self.tamano
+
+        # las tablas se construyen una sola vez por clave pública
+        if self.tablas_cifrado is None or self.tablas_cifrado[0] is not self.pk:
+            self.__generarTablasCifrado()
+        tablas = self.tablas_cifrado[1]
+        num_bytes = len(tablas)
+
+        cifrados = []
+        for mensaje in mensajes:
+            if isinstance(mensaje, bool):
+                raise ValueError("el mensaje debe ser una lista de 0 y 1 o un entero empaquetado")
+
+            # los mensajes pueden venir ya empaquetados en un entero
+            if isinstance(mensaje, int):
+                if mensaje < 0 or mensaje >> n:
+                    raise ValueError("el mensaje debe tener como mucho " + str(n) + " bits")
+                valor = mensaje
+            else:
+                if len(mensaje) != n:
+                    raise ValueError("el mensaje debe tener longitud " + str(n))
+
+                # empaquetamos el mensaje en bytes (bit i del mensaje = bit i del entero)
+                valor = int(bytes(mensaje[::-1]).translate(BITS_ASCII), 2)
+
+            # sumamos una entrada de la tabla por cada byte del mensaje
+            cifrados.append(sum(map(list.__getitem__, tablas, valor.to_bytes(num_bytes, "little"))))
+
+        return cifrados
+
+    # genera el contexto de descifrado asociado a la clave privada
+    def __generarContextoDescifrado(self, rapido):
+        self.contexto_descifrado = Contexto_Descifrado(self.sk, rapido)
+
+    # devuelve el contexto de descifrado, generándolo solo si la clave privada ha cambiado
+    # o si se pide el modo rápido y el contexto actual no lo tiene
+    def contexto(self, rapido=False):
+        contexto = self.contexto_descifrado
+        if contexto is None or contexto.sk is not self.sk or (rapido and contexto.tablas is None):
+            self.__generarContextoDescifrado(rapido)
+
+        return self.contexto_descifrado
 
-            # calculamos sp
-            sp = (inv_w * s) % sk[0][0]
+    # descifra un mensaje; si el mensaje original está empaquetado, el resultado también
+    def descifrar(self):
+        if isinstance(self.mensaje, int):
+            self.res = self.contexto().descifrarEmpaquetado(self.s)
         else:
-            while p >= 0:
-                sp = (s * sk[p][1]) % sk[p][0]
-                s = sp
-                p -= 1
+            self.res = self.contexto().descifrar(self.s)
 
-        # calculamos el resultado
-        for i in range(n):
-            if sp >= sk[0][2][n - 1 - i]:
-                sp -= sk[0][2][n - 1 - i]
-                res[n - 1 - i] = 1
-        
-        self.res = res
+    # descifra una lista de mensajes cifrados con la misma clave privada; con rapido=True se usan las tablas por bloques,
+    # que ocupan bastante más memoria y solo compensan con lotes muy grandes
+    def descifrar_lote(self, cifrados, empaquetado=False, rapido=False):
+        contexto = self.contexto(rapido)
+
+        if empaquetado:
+            return [contexto.descifrarEmpaquetado(s) for s in cifrados]
+        return [contexto.descifrar(s) for s in cifrados]
 
     # calcula el número de fallos del resultado
     def comprobar(self):
-        n = self.tamano
         mensaje_original = self.mensaje
         mensaje_obtenido = self.res
-        vector_dif = []
 
-        for i in range(n):
-            vector_dif.append(abs(mensaje_original[i] - mensaje_obtenido[i]))
-
-        self.errores = sum(vector_dif)
+        # con los mensajes empaquetados, los fallos son los bits a 1 del XOR
+        if isinstance(mensaje_original, int):
+            self.errores = bin(mensaje_original ^ mensaje_obtenido).count("1")
+        else:
+            self.errores = sum([a != b for a, b in zip(mensaje_original, mensaje_obtenido)])
 
     # aplica todo el criptosistema
     def do(self):
@@ -229,6 +413,223 @@ class Merkle_Hellman:
         print("Errores totales    :", self.errores)
         print()
 
+#------------------------------------------------------------------------------
+# Clase Contexto_Descifrado
+#------------------------------------------------------------------------------
+
+# precalcula todo lo que depende solo de la clave privada iterada, de forma que
+# cada descifrado se reduce a las multiplicaciones modulares y la pasada voraz
+class Contexto_Descifrado:
+    # constructor
+    def __init__(self, sk, rapido=False):
+        self.sk       = sk
+        self.tamano   = len(sk[0][2])
+        self.sucesion = tuple(reversed(sk[0][2]))
+
+        # cadena de pares (módulo, multiplicador) en el orden en que se deshacen
+        if len(sk) == 1:
+            self.cadena = ((sk[0][0], pow(sk[0][1], -1, sk[0][0])),)
+        else:
+            self.cadena = tuple((capa[0], capa[1]) for capa in reversed(sk))
+
+        # las tablas por bloques solo se generan si se piden expresamente
+        self.tablas = None
+        if rapido:
+            self.__generarTablas()
+
+    # comprueba si la sucesión de la clave privada es supercreciente
+    def __esSupercreciente(self):
+        suma = 0
+        for a in self.sk[0][2]:
+            if a <= suma:
+                return False
+            suma += a
+
+        return True
+
+    # genera las tablas de sumas parciales de la sucesión por bloques de 8 elementos
+    def __generarTablas(self):
+        ap     = self.sk[0][2]
+        n      = self.tamano
+        tablas = []
+
+        # sin sucesión supercreciente la búsqueda por bloques no equivale a la voraz
+        if not self.__esSupercreciente():
+            return
+
+        # en una sucesión supercreciente las sumas de cada bloque quedan ordenadas por máscara
+        for k in range(0, n, 8):
+            bloque = ap[k:k+8]
+            tabla  = sumasBloque(bloque)
+            if len(bloque) == 8:
+                bits = BITS_MASCARA
+            else:
+                bits = tuple(b[:len(bloque)] for b in BITS_MASCARA[:len(tabla)])
+            tablas.append((k, k + len(bloque), tabla, bits))
+
+        self.tablas = tuple(reversed(tablas))
+
+    # descifra un mensaje cifrado
+    def descifrar(self, s):
+        n   = self.tamano
+        res = [0] * n
+
+        medidor = instrumentacion
+        if medidor is not None:
+            inicio = time.perf_counter()
+
+        # deshacemos las iteraciones de la clave privada
+        sp = s
+        for m, mult in self.cadena:
+            sp = (sp * mult) % m
+
+        if medidor is not None:
+            medidor.etapa("descifrar_modular", inicio)
+            inicio = time.perf_counter()
+
+        # con las tablas, cada bloque se resuelve con una búsqueda binaria
+        if self.tablas is not None:
+            for ini, fin, tabla, bits in self.tablas:
+                mascara = bisect_right(tabla, sp) - 1
+                sp -= tabla[mascara]
+                res[ini:fin] = bits[mascara]
+
+            if medidor is not None:
+                medidor.etapa("descifrar_voraz", inicio)
+            return res
+
+        # calculamos el resultado recorriendo la sucesión de mayor a menor
+        i = n - 1
+        for a in self.sucesion:
+            if sp >= a:
+                sp -= a
+                res[i] = 1
+            i -= 1
+
+        if medidor is not None:
+            medidor.etapa("descifrar_voraz", inicio)
+        return res
+
+    # descifra un mensaje cifrado y devuelve el mensaje empaquetado en un entero
+    def descifrarEmpaquetado(self, s):
+        res = 0
+
+        medidor = instrumentacion
+        if medidor is not None:
+            inicio = time.perf_counter()
+
+        # deshacemos las iteraciones de la clave privada
+        sp = s
+        for m, mult in self.cadena:
+            sp = (sp * mult) % m
+
+        if medidor is not None:
+            medidor.etapa("descifrar_modular", inicio)
+            inicio = time.perf_counter()
+
+        # con las tablas, la máscara de cada bloque son directamente sus bits del mensaje
+        if self.tablas is not None:
+            for ini, fin, tabla, bits in self.tablas:
+                mascara = bisect_right(tabla, sp) - 1
+                sp -= tabla[mascara]
+                res |= mascara << ini
+
+            if medidor is not None:
+                medidor.etapa("descifrar_voraz", inicio)
+            return res
+
+        # recorremos la sucesión de mayor a menor, escribiendo los bits en binario del de mayor peso al de menor
+        bits = bytearray(b"0") * self.tamano
+        j = 0
+        for a in self.sucesion:
+            if sp >= a:
+                sp -= a
+                bits[j] = 49
+            j += 1
+
+        if medidor is not None:
+            medidor.etapa("descifrar_voraz", inicio)
+        return int(bits, 2)
+
+    # descifra un mensaje deshaciendo las capas una a una, como en Merkle_Hellman
+    def descifrarCapas(self, s):
+        n   = self.tamano
+        sk  = self.sk
+        res = [0 for i in range(n)]
+        p   = len(sk) - 1
+
+        if p == 0:
+            sp = (pow(sk[0][1], -1, sk[0][0]) * s) % sk[0][0]
+        else:
+            while p >= 0:
+                sp = (s * sk[p][1]) % sk[p][0]
+                s = sp
+                p -= 1
+
+        for i in range(n):
+            if sp >= sk[0][2][n - 1 - i]:
+                sp -= sk[0][2][n - 1 - i]
+                res[n - 1 - i] = 1
+
+        return res
+
+#------------------------------------------------------------------------------
+# Activación de la instrumentación
+#------------------------------------------------------------------------------
+
+# métodos cuyo tiempo se mide, como (clase, método, etapa)
+ETAPAS = (
+    (Merkle_Hellman, "_Merkle_Hellman__generarClavePrivada", "generar_clave"),
+    (Merkle_Hellman, "_Merkle_Hellman__iterarClavePrivada", "iterar_clave"),
+    (Merkle_Hellman, "_Merkle_Hellman__generarClavePublicaIterada", "clave_publica"),
+    (Merkle_Hellman, "_Merkle_Hellman__generarClavePublica", "clave_publica"),
+    (Merkle_Hellman, "cifrar", "cifrar"),
+    (Merkle_Hellman, "cifrar_lote", "cifrar_lote"),
+    (Merkle_Hellman, "descifrar", "descifrar"),
+    (Merkle_Hellman, "descifrar_lote", "descifrar_lote"),
+    (Merkle_Hellman, "comprobar", "comprobar"),
+    (Contexto_Descifrado, "__init__", "contexto_descifrado"),
+)
+
+# métodos originales, que se guardan mientras la instrumentación está activa
+originales = {}
+
+# devuelve el método envuelto para que anote su tiempo en la instrumentación indicada
+def medirMetodo(metodo, etapa, medidor):
+    def medido(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return metodo(*args, **kwargs)
+        finally:
+            medidor.etapa(etapa, inicio)
+
+    return medido
+
+# activa la instrumentación y la devuelve; si se indica una función, se suscribe a los datos
+# los métodos solo se envuelven mientras está activa, por lo que desactivada no añade ninguna llamada
+def activarInstrumentacion(funcion=None):
+    global instrumentacion
+
+    desactivarInstrumentacion()
+    instrumentacion = Instrumentacion()
+    if funcion is not None:
+        instrumentacion.suscribir(funcion)
+
+    for clase, metodo, etapa in ETAPAS:
+        originales[(clase, metodo)] = clase.__dict__[metodo]
+        setattr(clase, metodo, medirMetodo(clase.__dict__[metodo], etapa, instrumentacion))
+
+    return instrumentacion
+
+# desactiva la instrumentación, recuperando los métodos originales
+def desactivarInstrumentacion():
+    global instrumentacion
+
+    for (clase, metodo), original in originales.items():
+        setattr(clase, metodo, original)
+    originales.clear()
+    instrumentacion = None
+
 #------------------------------------------------------------------------------
 # Datos de salida
 #------------------------------------------------------------------------------